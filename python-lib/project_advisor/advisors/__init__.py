@@ -1,13 +1,8 @@
 import dataikuapi
 import dataiku
-from typing import List, Any
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 from abc import ABC, abstractmethod
 from types import ModuleType
-from pathlib import Path
-import os
-import io
-import importlib
-import sys, inspect
 import pandas as pd
 import json
 
@@ -25,6 +20,9 @@ from project_advisor.assessments.checks import DSSCheck
 from project_advisor.assessments.checks.project_check import ProjectCheck
 
 from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler, run_profiler
+from project_advisor.pat_registry import assessment_registry
+from project_advisor.pat_storage import DEFAULT_REPORT_FORMAT, TableFormat, get_table_format, read_table_chunks, write_table, write_table_chunks
 
 class DSSAdvisor(ABC):
     """
@@ -36,6 +34,7 @@ class DSSAdvisor(ABC):
     metrics : List[DSSMetric] = None
     checks : List[DSSCheck] = None
     pat_report_folder : dataiku.Folder = None
+    report_chunk_records : int = 1000 # Number of assessment results serialized at a time when saving a report
 
     def __init__(self, 
                  client: dataikuapi.dssclient.DSSClient, 
@@ -97,29 +96,76 @@ class DSSAdvisor(ABC):
         except Exception as error:
             return json.dumps({"pat_report_logging_error" : str(error)})
     
+    def get_report_format(self) -> TableFormat:
+        """
+        Format of the report files (CSV or compressed CSV).
+        """
+        return get_table_format(self.config.config.get("run_config",{}).get("pat_report_format", DEFAULT_REPORT_FORMAT))
+    
     def write_dataframe_to_pat_report_folder(self, path_in_folder: str, filename: str, df : pd.DataFrame):
         """
-        Writes a pandas DataFrame to a Dataiku folder as a CSV using the stream method.
+        Writes a pandas DataFrame to a Dataiku folder using the stream method.
+        Rows are encoded (and compressed) in chunks straight into the folder writer.
         """
         # Construct full path in folder
-        filename = filename +".csv"
+        report_format = self.get_report_format()
+        filename = filename + report_format.extension
         full_path = f"{path_in_folder}/{filename}" if path_in_folder else filename
 
-        # Write DataFrame to a CSV string
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False)
+        write_table(self.pat_report_folder, full_path, df, report_format)
+    
+    def write_dataframes_to_pat_report_folder(self, path_in_folder: str, filename: str, dfs : Iterable[pd.DataFrame]):
+        """
+        Streams DataFrames produced one at a time into a single report file, without concatenating them in memory.
+        """
+        report_format = self.get_report_format()
+        filename = filename + report_format.extension
+        full_path = f"{path_in_folder}/{filename}" if path_in_folder else filename
 
-        with self.pat_report_folder.get_writer(full_path) as stream:
-            stream.write(buffer.getvalue().encode("utf-8"))
+        write_table_chunks(self.pat_report_folder, full_path, dfs, report_format)
     
-    def save_metrics(self, metrics : List[DSSMetric], timestamp : datetime, metric_type : str) -> None:
+    def find_pat_report_file(self, path_in_folder: str, filename: str) -> Optional[str]:
+        """
+        Return the path of a report file in the report folder, whatever its format. Returns None if there is no such file.
+        """
+        prefix = f"/{path_in_folder}/{filename}."
+        for full_path in self.pat_report_folder.list_paths_in_partition():
+            if full_path.startswith(prefix):
+                return full_path
+        return None
+    
+    def read_pat_report_chunks(self, full_path : str) -> Iterator[pd.DataFrame]:
+        """
+        Read a report file in chunks.
+        """
+        return read_table_chunks(self.pat_report_folder, full_path)
+    
+    def stream_report_chunks(self, records_fn : Callable[[list, str], List[dict]], assessments : list, ts_str : str, carried_forward : Iterable[pd.DataFrame] = None) -> Iterator[pd.DataFrame]:
+        """
+        Serialize the assessments report_chunk_records at a time, followed by the carried forward rows with the new timestamp.
+        """
+        for start in range(0, len(assessments), self.report_chunk_records):
+            yield pd.DataFrame.from_dict(records_fn(assessments[start:start + self.report_chunk_records], ts_str))
+        for df in carried_forward or []:
+            yield df.assign(timestamp = ts_str)
+    
+    def save_metrics(self, metrics : List[DSSMetric], timestamp : datetime, metric_type : str, carried_forward : Iterable[pd.DataFrame] = None) -> None:
         """
         Method to save the metrics to a report folder in the flow.
+        Rows saved before the report (Ex : checkpoints, incremental runs) are streamed into the report with the new timestamp.
         """
         logger.debug(f"Logging {len(metrics)} metrics to the flow")
         #self.init_metric_logging_dataset()
 
         ts_str = self.format_ts(timestamp)
+        self.write_dataframes_to_pat_report_folder(path_in_folder = f"metrics/{metric_type}", 
+                                                   filename = ts_str, 
+                                                   dfs = self.stream_report_chunks(self.get_metric_records, metrics, ts_str, carried_forward))
+    
+    def get_metric_records(self, metrics : List[DSSMetric], ts_str : str) -> List[dict]:
+        """
+        Build the report records of the metrics.
+        """
         metric_records = []
         for metric in metrics:
             project_key = ""
@@ -137,20 +183,46 @@ class DSSAdvisor(ABC):
                 }
             logger.debug(f"[metric_record]{json.dumps(metric_record)}") # Logging report metric to job log
             metric_records.append(metric_record)
-        
-        new_metrics_df = pd.DataFrame.from_dict(metric_records)
-        self.write_dataframe_to_pat_report_folder(path_in_folder = f"metrics/{metric_type}", filename = ts_str, df = new_metrics_df)
+        return metric_records
 
 
-    def save_checks(self,checks : List[DSSCheck], timestamp : datetime, check_type : str) -> None:
+    def save_checks(self,checks : List[DSSCheck], timestamp : datetime, check_type : str, carried_forward : Iterable[pd.DataFrame] = None) -> None:
         """
         Method to save all the checks to a report folder in the flow.
+        Rows saved before the report (Ex : checkpoints, incremental runs) are streamed into the report with the new timestamp.
         """
         logger.debug(f"Logging {len(checks)} checks to the flow")
         
         #self.init_check_logging_dataset()
         
         ts_str = self.format_ts(timestamp)
+        self.write_dataframes_to_pat_report_folder(path_in_folder = f"checks/{check_type}", 
+                                                   filename = ts_str, 
+                                                   dfs = self.stream_report_chunks(self.get_check_records, checks, ts_str, carried_forward))
+        return
+    
+    def save_profile(self, timestamp : datetime) -> None:
+        """
+        Save the profile of the run next to its report : 
+        - API calls : a JSON summary (endpoints, stages, top projects & assessments) & the calls per stage, project & assessment.
+        - Time spent : a JSON summary (time per stage, slowest projects & critical path) & the runtime percentiles per assessment.
+        """
+        ts_str = self.format_ts(timestamp)
+        try:
+            self.pat_report_folder.write_json(f"/profiles/{ts_str}/api_profile.json", api_profiler.get_summary())
+            self.write_dataframe_to_pat_report_folder(path_in_folder = f"profiles/{ts_str}", filename = "api_calls", df = api_profiler.get_scopes_df())
+        except Exception as error:
+            logger.warning(f"Failed to save the API profile of the run : {type(error).__name__}:{str(error)}")
+        try:
+            self.pat_report_folder.write_json(f"/profiles/{ts_str}/run_profile.json", run_profiler.get_summary())
+            self.write_dataframe_to_pat_report_folder(path_in_folder = f"profiles/{ts_str}", filename = "assessment_runtimes", df = run_profiler.get_assessment_runtimes_df())
+        except Exception as error:
+            logger.warning(f"Failed to save the run profile : {type(error).__name__}:{str(error)}")
+    
+    def get_check_records(self, checks : List[DSSCheck], ts_str : str) -> List[dict]:
+        """
+        Build the report records of the checks.
+        """
         check_records = []
         for check in checks:
             project_key = ""
@@ -171,10 +243,7 @@ class DSSAdvisor(ABC):
 
             logger.debug(f"[check_record]{json.dumps(check_record)}") # Logging report metric to job logs
             check_records.append(check_record)
-
-        new_checks_df = pd.DataFrame.from_dict(check_records)
-        self.write_dataframe_to_pat_report_folder(path_in_folder = f"checks/{check_type}", filename = ts_str, df = new_checks_df)
-        return
+        return check_records
     
 
 #     def init_metric_logging_dataset(self) -> None:
@@ -231,35 +300,18 @@ class DSSAdvisor(ABC):
     def fetch_built_in_and_add_on_classes(self, root_module : ModuleType, module_class : ModuleType) -> List[ModuleType]:
         """
         Find all the built-in and add on module_class sub classes.
+        The classes are discovered once per process by the assessment registry.
         This requires the macro to be impersonated.
         """
         logger.debug(f"Find all the built-in and add on subclasses of {module_class}")
-        
-        built_in_classes = self.fetch_classes(root_module, module_class)
-        add_on_classes = self.fetch_add_on_classes(module_class)
-        return built_in_classes + add_on_classes
+        return assessment_registry.get_classes(root_module, module_class)
 
     def fetch_add_on_classes(self, module_class : ModuleType) -> List[ModuleType]:
         """
         Find all the module_class sub classes within the default project lib.
         """
         logger.debug(f"Find all custom subclasses of {module_class} in default project lib")
-        
-        try:
-            local_client = dataiku.api_client()
-            project_key = local_client.get_default_project().project_key
-            dataDirPath = local_client.get_instance_info().raw["dataDirPath"]
-            proj_py_lib_root = dataDirPath + f"/config/projects/{project_key}/lib/python"
-            sys.path.append(proj_py_lib_root)
-            
-            import pat_custom_assessments
-            
-            classes = self.fetch_classes(pat_custom_assessments, module_class)
-            return classes
-        except Exception as error:
-            # Case were no custom assessments have been provided in the "pat_custom_assessments" Folder.
-            logger.debug(f"Failed to load custom assessment classes from project libraries folder 'pat_custom_assessments', error : {str(error)}")
-            return []
+        return assessment_registry.get_add_on_classes(module_class)
     
     
     def fetch_classes(self, root_module : ModuleType, module_class : ModuleType) -> List[ModuleType]:
@@ -267,33 +319,7 @@ class DSSAdvisor(ABC):
         Find all the module_class sub classes within a root_module.
         """
         logger.debug(f"Finding all subclasses of {module_class}")
-        
-        module_folder_root = Path(root_module.__path__[0])
-        base_module_name = root_module.__name__
-
-        modules = []
-        for root, subFolder, files in os.walk(module_folder_root):
-            for item in files:
-                if item.endswith(".py") and item != "__init__.py":
-                    path = Path(root, item)
-                    rel_path = path.relative_to(module_folder_root)
-                    module_name = (
-                        base_module_name
-                        + "."
-                        + rel_path.as_posix()[:-3].replace("/", ".")
-                    )
-                    module = importlib.import_module(module_name, package=None)
-                    modules.append(module)
-
-        classes = []
-        for module in modules:
-            for _, c in inspect.getmembers(module, inspect.isclass):
-                if (
-                    issubclass(c, module_class)
-                    and module_class != c
-                ):
-                    classes.append(c)
-        return classes
+        return assessment_registry.find_subclasses(assessment_registry.get_modules(root_module), module_class)
     
     def filter_assessments(self, assessments : List[DSSAssessment]) -> List[DSSAssessment]:
         """
@@ -1,16 +1,29 @@
+import asyncio
+import hashlib
+import json
+import queue
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
 
 import dataiku
 import dataikuapi
+import pandas as pd
 from project_advisor.advisors import DSSAdvisor
 from project_advisor.advisors.project_advisor import ProjectAdvisor
 from project_advisor.assessments import CheckSeverity
 from project_advisor.assessments.config import DSSAssessmentConfig
 from project_advisor.assessments.metrics import DSSMetric
+from project_advisor.pat_checkpoint import RunCheckpoint
+from project_advisor.pat_concurrency import AsyncOrchestrator
 from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler, run_profiler
+from project_advisor.pat_storage import split_filename
+from project_advisor.pat_timeouts import PATTimeoutError
 
 
 @dataclass
@@ -25,18 +38,141 @@ class ProjectFilters:
     folder_id: str = ""
 
 
+class ProjectStandardsEngine():
+    """
+    Runs Project Standards for many projects from a single thread.
+    Runs are submitted up to max_in_flight at a time & all the runs in flight are polled from one loop, 
+    backing off while no run completes. Results are fed to the ProjectAdvisors as soon as they arrive
+    & on_done is called for every ProjectAdvisor once its run is over.
+    """
+
+    def __init__(self, 
+                 max_in_flight : int = 1, 
+                 min_poll_interval : float = 0.5, 
+                 max_poll_interval : float = 10, 
+                 backoff_factor : float = 1.5,
+                 on_done : Callable[[ProjectAdvisor], None] = None):
+        self.max_in_flight = max(1, int(max_in_flight or 1))
+        self.on_done = on_done or (lambda pa : None)
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff_factor = backoff_factor
+        self._async_slots : asyncio.Semaphore = None # Created within the event loop
+
+    def run(self, ready_project_advisors : "queue.Queue[ProjectAdvisor]", nbr_projects : int) -> None:
+        """
+        Run Project Standards for nbr_projects ProjectAdvisors, taken from the ready queue as they become ready 
+        (Ex : once their metrics have been computed).
+        """
+        pending = deque()
+        in_flight : Dict[ProjectAdvisor, object] = {}
+        nbr_done = 0
+        poll_interval = self.min_poll_interval
+
+        while nbr_done < nbr_projects:
+            # Collect the projects that are ready, blocking only if there is nothing else to do
+            try:
+                if not pending and not in_flight:
+                    pending.append(ready_project_advisors.get())
+                while True:
+                    pending.append(ready_project_advisors.get_nowait())
+            except queue.Empty:
+                pass
+
+            # Submit up to the in-flight limit
+            while pending and len(in_flight) < self.max_in_flight:
+                pa = pending.popleft()
+                try:
+                    in_flight[pa] = pa.start_project_standards_run()
+                except Exception as error:
+                    pa.set_project_standards_error(error)
+                    self.on_done(pa)
+                    nbr_done += 1
+
+            # Poll all the runs in flight
+            nbr_completed = 0
+            for pa, future in list(in_flight.items()):
+                if self.poll(pa, future):
+                    del in_flight[pa]
+                    self.on_done(pa)
+                    nbr_completed += 1
+            nbr_done += nbr_completed
+
+            if nbr_completed > 0:
+                poll_interval = self.min_poll_interval
+                logger.info(f"Project Standards : {nbr_done}/{nbr_projects} projects done, {len(in_flight)} run(s) in flight")
+            elif in_flight:
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * self.backoff_factor, self.max_poll_interval)
+
+    def poll(self, pa : ProjectAdvisor, future) -> bool:
+        """
+        Poll a Project Standards run & feed its result to the ProjectAdvisor once available.
+        The run is aborted if the project runs out of time. Return True if the run is over.
+        """
+        try:
+            with pa.project_standards_scope():
+                state = future.get_state()
+                if state.get("hasResult", False):
+                    pa.set_project_standards_results(future.get_result())
+                elif not state.get("alive", True):
+                    raise Exception(f"Project Standards run ended without result : {state.get('error', state)}")
+                elif pa.deadline.expired():
+                    pa.abort_project_standards_run(future)
+                    raise PATTimeoutError(pa.deadline.reason())
+                else:
+                    return False
+        except Exception as error:
+            pa.set_project_standards_error(error)
+        return True
+
+    async def run_async(self, pa : ProjectAdvisor, orchestrator : AsyncOrchestrator) -> None:
+        """
+        Run Project Standards for one ProjectAdvisor within an asyncio orchestration.
+        At most max_in_flight runs are in flight, the run is aborted if the orchestration is cancelled.
+        """
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_in_flight)
+        future = None
+        try:
+            async with self._async_slots:
+                future = await orchestrator.run(pa.start_project_standards_run)
+                poll_interval = self.min_poll_interval
+                while not await orchestrator.run(self.poll, pa, future):
+                    await asyncio.sleep(poll_interval)
+                    poll_interval = min(poll_interval * self.backoff_factor, self.max_poll_interval)
+        except asyncio.CancelledError:
+            if future is not None:
+                pa.abort_project_standards_run(future)
+            raise
+        except Exception as error:
+            pa.set_project_standards_error(error)
+        await orchestrator.run(self.on_done, pa)
+
+
 class BatchProjectAdvisor(DSSAdvisor):
     """
     The BatchProjectAdvisor Class runs the ProjectAdvisor on a set of projects.
     """
     project_folder : dataikuapi.dss.projectfolder.DSSProjectFolder
     project_advisors :List[ProjectAdvisor] = None
+    
+    # Incremental runs
+    incremental_state_path = "/incremental/project_fingerprints.json"
+    run_control_params = ["run_on", "folder_id", "project_status_list", "project_keys", "project_tags", 
+                          "pat_report_folder", "rebuild_pat_backend", "incremental_run", "resume_run_id"] # Not part of the config hash
+    
+    # Scheduling
+    project_costs_path = "/scheduling/project_costs.json"
+    seconds_per_object = 1.0 # Cost estimate of the projects without previous runs, per recipe & dataset
 
     def __init__(self,
                  client: dataikuapi.dssclient.DSSClient, 
                  config: DSSAssessmentConfig,
                  project_filters: ProjectFilters,
-                 pat_report_folder : dataiku.Folder
+                 pat_report_folder : dataiku.Folder,
+                 incremental : bool = False,
+                 resume_run_id : str = None
     ):
 
         super().__init__(client = client, 
@@ -45,7 +181,29 @@ class BatchProjectAdvisor(DSSAdvisor):
                        )
         logger.info("Init of BatchProjectAdvisor")
         self.project_filters = project_filters
-        self.init_project_advisors()
+        self.incremental = incremental
+        self.config_hash : str = None
+        self.project_fingerprints : Dict[str, str] = {}
+        self.previous_incremental_state : dict = {}
+        self.carried_forward_reports : Dict[str, dict] = {} # Previous report timestamp -> report files & carried forward projects
+        self.carried_forward_max_severity : int = None
+        self.project_costs : Dict[str, float] = {} # Project key -> runtime in seconds of the projects of this run
+        
+        # Checkpoint of the run, the run id is the timestamp of the run
+        if resume_run_id:
+            self.checkpoint = RunCheckpoint.resume(pat_report_folder, resume_run_id, self.get_report_format())
+            self.run_timestamp = datetime.fromisoformat(resume_run_id)
+        else:
+            self.run_timestamp = datetime.now()
+            self.checkpoint = RunCheckpoint(pat_report_folder, self.format_ts(self.run_timestamp), self.get_report_format())
+        logger.info(f"Batch run id : {self.checkpoint.run_id}")
+        
+        with api_profiler.scope(stage = "init"), run_profiler.span("init"):
+            self.init_project_advisors()
+            if self.incremental:
+                self.plan_incremental_run()
+            self.skip_completed_projects()
+            self.schedule_project_advisors()
         
     
     def run_checks(self) -> List[ProjectAdvisor]:
@@ -53,9 +211,65 @@ class BatchProjectAdvisor(DSSAdvisor):
         Run all the project checks over all of the projects.
         """
         logger.info(f"Running project checks on all the project advisors")
-        [proj_advisor.run_checks() for proj_advisor in self.project_advisors]
+        ready_project_advisors = queue.Queue()
+        for pa in self.project_advisors:
+            ready_project_advisors.put(pa)
+        self.get_project_standards_engine().run(ready_project_advisors, len(self.project_advisors))
         return self.project_advisors
     
+    def get_project_standards_engine(self) -> ProjectStandardsEngine:
+        """
+        Build the Project Standards engine. In-flight runs are limited by nbr_parallel_ps_runs (nbr_parallel_runs by default).
+        """
+        run_config = self.config.config.get("run_config",{})
+        if run_config.get("run_pat_in_parallel", False):
+            max_in_flight = run_config.get("nbr_parallel_ps_runs") or run_config.get("nbr_parallel_runs",1)
+        else:
+            max_in_flight = 1
+        return ProjectStandardsEngine(max_in_flight = max_in_flight, on_done = self.on_project_done)
+    
+    def use_asyncio(self) -> bool:
+        """
+        Return True if the advisors should be orchestrated with asyncio (orchestration_mode : asyncio).
+        """
+        run_config = self.config.config.get("run_config",{})
+        return run_config.get("run_pat_in_parallel", False) and run_config.get("orchestration_mode", "threads") == "asyncio"
+    
+    def get_orchestrator(self) -> AsyncOrchestrator:
+        """
+        Build an asyncio orchestrator sharing the concurrency budget of the run, timing out with the run time budget at the latest.
+        """
+        orchestrator = AsyncOrchestrator.from_run_config(self.config.config.get("run_config",{}), self.config.budget)
+        deadline = getattr(self.config, "deadline", None)
+        if deadline is not None:
+            orchestrator.timeout = deadline.clamp(orchestrator.timeout)
+        return orchestrator
+    
+    def run_async(self) -> None:
+        """
+        Run the metrics & Project Standards of all the projects with asyncio.
+        Metrics & Project Standards calls share the concurrency budget of the run, 
+        projects not done when the orchestration timeout is reached are cancelled.
+        """
+        orchestrator = self.get_orchestrator()
+        engine = self.get_project_standards_engine()
+        
+        async def run_project_advisor(pa : ProjectAdvisor):
+            try:
+                await orchestrator.run(pa.run_metrics)
+                await engine.run_async(pa, orchestrator)
+            except asyncio.CancelledError:
+                if pa.checks is None:
+                    pa.set_project_standards_error(PATTimeoutError(f"Cancelled after the orchestration timeout of {orchestrator.timeout}s"))
+                raise
+            except Exception as error:
+                logger.warning(f"Project Advisor run failed for project {pa.project.project_key} with error : {type(error).__name__}:{str(error)}")
+                if pa.checks is None:
+                    pa.set_project_standards_error(error)
+        
+        orchestrator.run_all([lambda pa = pa : run_project_advisor(pa) for pa in self.project_advisors])
+        return
+    
 
     def run_metrics(self) -> List[ProjectAdvisor]:
         """
@@ -71,45 +285,369 @@ class BatchProjectAdvisor(DSSAdvisor):
         """
         logger.info(f"Running all of the project advisors")
         
+        # Asyncio run
+        if self.use_asyncio():
+            logger.info(f"Running Project Advisors with asyncio, {self.config.budget.max_workers} API calls at a time")
+            self.run_async()
+        
         # Parallel run
-        if self.config.config.get("run_config",{}).get("run_pat_in_parallel", False):  
-            n_jobs = self.config.config.get("run_config",{}).get("nbr_parallel_runs",1)
-            logger.info(f"Running {n_jobs} Project Advisors in parallel at a time")
+        elif self.config.config.get("run_config",{}).get("run_pat_in_parallel", False):  
+            n_jobs = self.config.budget.max_workers
+            logger.info(f"Running {n_jobs} Project Advisors metrics in parallel at a time")
             
-            def parallel_run(pa):
-                return pa.run()
+            # Metrics are computed by the thread pool. Projects are handed over to the Project Standards engine 
+            # once their metrics are computed, so that no thread is blocked waiting for a Project Standards run.
+            ready_project_advisors = queue.Queue()
+            def parallel_run_metrics(pa):
+                try:
+                    pa.run_metrics()
+                finally:
+                    ready_project_advisors.put(pa)
             
             with ThreadPoolExecutor(max_workers = n_jobs) as executor:
-                results = list(executor.map(parallel_run, self.project_advisors)) 
+                futures = [executor.submit(parallel_run_metrics, pa) for pa in self.project_advisors]
+                self.get_project_standards_engine().run(ready_project_advisors, len(self.project_advisors))
+            for future in futures:
+                if future.exception() is not None:
+                    logger.warning(f"Project metrics run failed with error : {type(future.exception()).__name__}:{str(future.exception())}")
         else:
             logger.info(f"Running Project Advisors sequentially")
-            [pa.run() for pa in self.project_advisors]
+            for pa in self.project_advisors:
+                pa.run()
+                self.on_project_done(pa)
+        
+        self.checkpoint.flush()
+        timed_out_project_keys = [pa.project.project_key for pa in self.project_advisors if pa.timed_out]
+        if timed_out_project_keys:
+            logger.warning(f"{len(timed_out_project_keys)} projects ran out of time, their results so far are saved : {timed_out_project_keys}")
         
+        limiter = getattr(self.config, "limiter", None)
+        if limiter is not None:
+            logger.info(f"Adaptive concurrency ended at {limiter.current_limit} parallel API calls after {len(limiter.decisions)} adjustments")
         return
     
-    def save(self, timestamp : datetime = datetime.now()) -> None:
+    def save(self, timestamp : datetime = None, save_profile : bool = True) -> None:
         """
-        Save the metrics and checks for all the projects
+        Save the metrics and checks for all the projects.
+        The report is the merge of the shards of the completed projects, the projects that could not be checkpointed
+        & the rows carried forward by incremental runs. Defaults to the timestamp of the run.
+        save_profile : Save the profile of the run next to the report (the instance advisor saves it after its own assessments).
         """
         logger.info(f"Saving all the metrics and checks for every project")
+        timestamp = timestamp or self.run_timestamp
         
+        self.checkpoint.flush() # Projects are only completed once their checkpoint is written
+        completed_project_keys = self.checkpoint.completed_project_keys
         metrics = []
         checks = []
         for pa in self.project_advisors:
-            metrics.extend(pa.metrics)
-            checks.extend(pa.checks)
-        self.save_metrics(metrics, timestamp = timestamp, metric_type = "project")
-        self.save_checks(checks, timestamp = timestamp, check_type = "project")
+            if pa.project.project_key not in completed_project_keys:
+                metrics.extend(pa.metrics)
+                checks.extend(pa.checks or [])
+        
+        with api_profiler.scope(stage = "save"), run_profiler.span("save"):
+            self.save_metrics(metrics, timestamp = timestamp, metric_type = "project", carried_forward = self.stream_saved_rows("metrics"))
+            self.save_checks(checks, timestamp = timestamp, check_type = "project", carried_forward = self.stream_saved_rows("checks"))
+            if self.incremental:
+                self.save_incremental_state(timestamp)
+            self.save_project_costs(timestamp)
+            self.checkpoint.complete()
+        if save_profile:
+            self.save_profile(timestamp)
         return 
+    
+    #######################
+    # Checkpoint & resume #
+    #######################
+    
+    def on_project_done(self, pa : ProjectAdvisor) -> None:
+        """
+        Checkpoint the results of a project as soon as it is done & release its result objects once they are saved.
+        The checkpoint is written in the background, not to hold up the Project Standards poll loop.
+        """
+        ts_str = self.checkpoint.run_id
+        if not pa.timed_out: # The runtime of a project cut short would schedule it too late next time
+            self.project_costs[pa.project.project_key] = pa.get_runtime()
+        pa.record_runtimes()
+        try:
+            future = self.checkpoint.save_project(
+                project_key = pa.project.project_key,
+                metrics_df = pd.DataFrame.from_dict(self.get_metric_records(pa.metrics or [], ts_str)),
+                checks_df = pd.DataFrame.from_dict(self.get_check_records(pa.checks or [], ts_str)),
+                max_severity = pa.get_max_severity_level() if pa.checks is not None else CheckSeverity.OK.value
+            )
+        except Exception as error:
+            logger.warning(f"Failed to checkpoint project {pa.project.project_key}, its results are kept in memory : {type(error).__name__}:{str(error)}")
+            return
+        
+        def on_checkpoint_saved(future) -> None:
+            error = future.exception()
+            if error is not None:
+                logger.warning(f"Failed to checkpoint project {pa.project.project_key}, its results are kept in memory : {type(error).__name__}:{str(error)}")
+                return
+            pa.release_results()
+        future.add_done_callback(on_checkpoint_saved)
+    
+    def stream_saved_rows(self, kind : str) -> Iterator[pd.DataFrame]:
+        """
+        Stream the report rows saved before the report, one chunk at a time : 
+        the shards of the completed projects, then the rows carried forward from previous reports.
+        """
+        yield from self.checkpoint.read_shards(kind)
+        for ts_str, carried_forward_report in self.carried_forward_reports.items():
+            project_keys = carried_forward_report["project_keys"]
+            for chunk in self.read_pat_report_chunks(carried_forward_report[kind]):
+                yield chunk[chunk["project_id"].isin(project_keys)]
+    
+    def skip_completed_projects(self) -> None:
+        """
+        Remove the projects already completed by the run being resumed.
+        """
+        completed_project_keys = self.checkpoint.completed_project_keys
+        if completed_project_keys:
+            self.project_advisors = [pa for pa in self.project_advisors if pa.project.project_key not in completed_project_keys]
+            logger.info(f"Skipping {len(completed_project_keys)} projects completed before the run was interrupted, {len(self.project_advisors)} projects left")
   
     def get_max_severity(self) -> str:
         """
         Return the average project score
         """
         logger.debug(f"Computing the batch project Max Severity")
-        if len(self.project_advisors) == 0:
+        self.checkpoint.flush()
+        severity_levels = [project_advisor.get_max_severity_level() for project_advisor in self.project_advisors]
+        run_project_keys = {pa.project.project_key for pa in self.project_advisors}
+        severity_levels.extend([entry["max_severity"] for project_key, entry in self.checkpoint.completed_projects.items() 
+                                if project_key not in run_project_keys]) # Completed before a resume
+        if self.carried_forward_max_severity is not None:
+            severity_levels.append(self.carried_forward_max_severity)
+        if len(severity_levels) == 0:
             return CheckSeverity.OK.name
-        return CheckSeverity(max([project_advisor.get_max_severity_level() for project_advisor in self.project_advisors])).name
+        return CheckSeverity(max(severity_levels)).name
+    
+    ####################
+    # Incremental runs #
+    ####################
+    
+    def get_config_hash(self) -> str:
+        """
+        Hash of what the projects are assessed with : the assessment configs & filters, the plugin version,
+        the enabled project metrics and the Project Standards checks of the instance.
+        A change of any of them requires all the projects to be assessed again.
+        """
+        check_configs = self.config.config.get("check_configs", {}) or {}
+        hashed_config = {
+            "check_configs" : {k : v for k, v in check_configs.items() if k not in self.run_control_params},
+            "plugin_version" : self.get_plugin_version(),
+            "metrics" : sorted({metric.name for pa in self.project_advisors for metric in pa.metrics or []}),
+            "project_standards_checks" : self.get_project_standards_check_names()
+        }
+        return hashlib.sha256(json.dumps(hashed_config, sort_keys = True, default = str).encode("utf-8")).hexdigest()
+    
+    def get_plugin_version(self) -> Optional[str]:
+        """
+        Version of the plugin, from the plugin.json file at the root of the plugin.
+        """
+        try:
+            with open(Path(__file__).resolve().parents[3] / "plugin.json") as plugin_file:
+                return json.load(plugin_file).get("version")
+        except Exception as error:
+            logger.warning(f"Failed to read the plugin version : {type(error).__name__}:{str(error)}")
+            return None
+    
+    def get_project_standards_check_names(self) -> Optional[List[str]]:
+        """
+        Sorted names of the Project Standards checks of the instance.
+        """
+        try:
+            checks = self.config.admin_design_client.get_project_standards().list_checks()
+            return sorted(f"{check.check_element_type}:{check.name}" for check in checks)
+        except Exception as error:
+            logger.warning(f"Failed to list the Project Standards checks : {type(error).__name__}:{str(error)}")
+            return None
+    
+    def get_project_fingerprint(self, pa : ProjectAdvisor, project_versions : Dict[str, str]) -> Optional[str]:
+        """
+        Identifier of the last modification of a project : its versionTag, or the head of its git log as fallback.
+        """
+        project_key = pa.project.project_key
+        version = project_versions.get(project_key)
+        if version is not None and version != "None:None":
+            return version
+        try:
+            commits = pa.project.get_project_git().log(count = 1).get("entries", [])
+            return f"git:{commits[0]['commit']}" if commits else None
+        except Exception as error:
+            logger.debug(f"No fingerprint for project {project_key} : {type(error).__name__}:{str(error)}")
+            return None
+    
+    def load_incremental_state(self) -> dict:
+        """
+        Load the fingerprints of the projects assessed by the previous incremental runs.
+        """
+        try:
+            return self.pat_report_folder.read_json(self.incremental_state_path)
+        except Exception as error:
+            logger.info(f"No previous incremental run state found : {type(error).__name__}:{str(error)}")
+            return {}
+    
+    def save_incremental_state(self, timestamp : datetime) -> None:
+        """
+        Save the fingerprints of the projects of this run, along with the timestamp of the report holding their results.
+        Projects that failed to run are not saved so that they are assessed again on the next run.
+        """
+        ts_str = self.format_ts(timestamp)
+        projects = dict(self.previous_incremental_state.get("projects", {})) if self.previous_incremental_state.get("config_hash") == self.config_hash else {}
+        
+        carried_forward_keys = {project_key for report in self.carried_forward_reports.values() for project_key in report["project_keys"]}
+        assessed_keys = {pa.project.project_key for pa in self.project_advisors if pa.checks}
+        assessed_keys.update({project_key for project_key, entry in self.checkpoint.completed_projects.items() if entry.get("nbr_checks", 0) > 0})
+        for project_key in carried_forward_keys | assessed_keys:
+            fingerprint = self.project_fingerprints.get(project_key)
+            if fingerprint is not None:
+                projects[project_key] = {"fingerprint" : fingerprint, "timestamp" : ts_str}
+        
+        self.pat_report_folder.write_json(self.incremental_state_path, {"config_hash" : self.config_hash, "projects" : projects})
+        logger.info(f"Saved the incremental run state of {len(projects)} projects")
+    
+    def plan_incremental_run(self) -> None:
+        """
+        Remove the projects that have not changed since they were last assessed with the same config.
+        Their metric & check rows are copied forward from the report holding their latest results when saving the report.
+        """
+        self.config_hash = self.get_config_hash()
+        project_versions = self.config.pat_backend_client.get_project_versions()
+        self.project_fingerprints = {pa.project.project_key : self.get_project_fingerprint(pa, project_versions) for pa in self.project_advisors}
+        
+        self.previous_incremental_state = self.load_incremental_state()
+        if self.previous_incremental_state.get("config_hash") != self.config_hash:
+            logger.info("Assessment config has changed since the previous incremental run, running on all the projects")
+            return
+        
+        # Unchanged projects, grouped by the report holding their latest results
+        previous_projects = self.previous_incremental_state.get("projects", {})
+        unchanged_by_ts : Dict[str, List[str]] = {}
+        for project_key, fingerprint in self.project_fingerprints.items():
+            previous = previous_projects.get(project_key)
+            if fingerprint is not None and previous is not None and previous.get("fingerprint") == fingerprint:
+                unchanged_by_ts.setdefault(previous["timestamp"], []).append(project_key)
+        
+        # Only keep the projects with checks in the previous report. Reports are read in chunks, rows are only loaded when saving.
+        for ts_str, project_keys in unchanged_by_ts.items():
+            metrics_path = self.find_pat_report_file("metrics/project", ts_str)
+            checks_path = self.find_pat_report_file("checks/project", ts_str)
+            if metrics_path is None or checks_path is None:
+                continue
+            carried_forward_keys = set()
+            max_severity = CheckSeverity.OK.value
+            try:
+                for chunk in self.read_pat_report_chunks(checks_path):
+                    chunk = chunk[chunk["project_id"].isin(project_keys)]
+                    if len(chunk) > 0:
+                        carried_forward_keys.update(chunk["project_id"])
+                        max_severity = max(int(chunk["severity"].max()), max_severity)
+            except Exception as error:
+                logger.warning(f"Failed to load the report {ts_str}, running its projects again : {type(error).__name__}:{str(error)}")
+                continue
+            if carried_forward_keys:
+                self.carried_forward_reports[ts_str] = {"metrics" : metrics_path, "checks" : checks_path, "project_keys" : carried_forward_keys}
+                self.carried_forward_max_severity = max(max_severity, self.carried_forward_max_severity or CheckSeverity.OK.value)
+        
+        if len(self.carried_forward_reports) == 0:
+            logger.info("No unchanged projects to carry forward, running on all the projects")
+            return
+        
+        carried_forward_keys = {project_key for report in self.carried_forward_reports.values() for project_key in report["project_keys"]}
+        self.project_advisors = [pa for pa in self.project_advisors if pa.project.project_key not in carried_forward_keys]
+        logger.info(f"Incremental run : {len(carried_forward_keys)} unchanged projects carried forward, {len(self.project_advisors)} projects to assess")
+    
+    ##############
+    # Scheduling #
+    ##############
+    
+    def schedule_project_advisors(self) -> None:
+        """
+        Order the projects longest first, so that the most expensive projects do not start last and stretch the end of the run.
+        Costs are the runtimes of the previous runs, or estimated from the number of recipes & datasets of the new projects.
+        """
+        if len(self.project_advisors) < 2:
+            return
+        previous_costs = self.load_project_costs()
+        costs = {pa.project.project_key : previous_costs.get(pa.project.project_key) for pa in self.project_advisors}
+        
+        # Only parallel runs benefit from the order, the object counts are not fetched for sequential runs
+        new_project_advisors = [pa for pa in self.project_advisors if costs[pa.project.project_key] is None]
+        if new_project_advisors and self.config.config.get("run_config",{}).get("run_pat_in_parallel", False):
+            for pa, cost in zip(new_project_advisors, self.config.budget.map(self.estimate_project_cost, new_project_advisors)):
+                costs[pa.project.project_key] = cost
+        
+        self.project_advisors.sort(key = lambda pa : costs[pa.project.project_key] or 0, reverse = True)
+        logger.info(f"Scheduling {len(self.project_advisors)} projects longest first, {len(self.project_advisors) - len(new_project_advisors)} with the runtime of a previous run")
+        logger.debug(f"Project schedule : {[(pa.project.project_key, costs[pa.project.project_key]) for pa in self.project_advisors]}")
+    
+    def estimate_project_cost(self, pa : ProjectAdvisor) -> Optional[float]:
+        """
+        Estimate the cost of a project without previous run from its number of recipes & datasets.
+        Only the counts are kept, the listings are not memoized in the project snapshot so that the queued projects hold no listing until they run.
+        """
+        try:
+            nbr_objects = len(pa.project.list_recipes()) + len(pa.project.list_datasets())
+            return nbr_objects * self.seconds_per_object
+        except Exception as error:
+            logger.debug(f"Failed to estimate the cost of project {pa.project.project_key} : {type(error).__name__}:{str(error)}")
+            return None
+    
+    def load_project_costs(self) -> Dict[str, float]:
+        """
+        Load the project runtimes saved by the previous runs, or read them from the latest report if none were saved.
+        """
+        try:
+            return {project_key : entry["cost"] for project_key, entry in self.pat_report_folder.read_json(self.project_costs_path).get("projects", {}).items()}
+        except Exception as error:
+            logger.debug(f"No project costs saved, reading them from the latest report : {type(error).__name__}:{str(error)}")
+        try:
+            return self.read_report_project_costs()
+        except Exception as error:
+            logger.info(f"No previous project runtimes found : {type(error).__name__}:{str(error)}")
+            return {}
+    
+    def read_report_project_costs(self) -> Dict[str, float]:
+        """
+        Sum the runtimes of the metrics (seconds) & checks (durationMs) of each project of the latest report.
+        """
+        report_paths = sorted(full_path for full_path in self.pat_report_folder.list_paths_in_partition() if full_path.startswith("/metrics/project/"))
+        if len(report_paths) == 0:
+            return {}
+        ts_str, _ = split_filename(report_paths[-1].split("/")[-1])
+        
+        costs : Dict[str, float] = {}
+        for kind, unit in [("metrics", 1), ("checks", 1000)]:
+            full_path = self.find_pat_report_file(f"{kind}/project", ts_str)
+            if full_path is None:
+                continue
+            for chunk in self.read_pat_report_chunks(full_path):
+                runtimes = chunk["result_data"].map(lambda result_data : (json.loads(result_data).get("runtime") or 0) if isinstance(result_data, str) else 0)
+                for project_key, runtime in runtimes.groupby(chunk["project_id"]).sum().items():
+                    costs[project_key] = costs.get(project_key, 0) + runtime / unit
+        logger.info(f"Read the runtimes of {len(costs)} projects from the report {ts_str}")
+        return costs
+    
+    def save_project_costs(self, timestamp : datetime) -> None:
+        """
+        Save the runtimes of the projects of this run, keeping the runtimes of the projects not run (Ex : carried forward).
+        """
+        if len(self.project_costs) == 0:
+            return
+        try:
+            projects = self.pat_report_folder.read_json(self.project_costs_path).get("projects", {})
+        except Exception:
+            projects = {}
+        ts_str = self.format_ts(timestamp)
+        for project_key, cost in self.project_costs.items():
+            projects[project_key] = {"cost" : round(cost, 3), "timestamp" : ts_str}
+        try:
+            self.pat_report_folder.write_json(self.project_costs_path, {"projects" : projects})
+        except Exception as error:
+            logger.warning(f"Failed to save the project costs : {type(error).__name__}:{str(error)}")
     
     def get_project_metric_list(self, metric_name : str) -> List[DSSMetric]:
         """
@@ -195,20 +733,29 @@ class BatchProjectAdvisor(DSSAdvisor):
                 )
                 return None
 
+        def profiled_init_or_filter_project_advisor(project_key : str) -> Optional[ProjectAdvisor]:
+            with api_profiler.scope(stage = "init", project = project_key):
+                return init_or_filter_project_advisor(project_key)
+
         # Build project_advisor list
         project_advisors = []
         user_id = ProjectAdvisor.get_auth_user()
         
+        # Asyncio run
+        if self.use_asyncio():
+            logger.info(f"Initializing Project Advisors with asyncio, {self.config.budget.max_workers} at a time")
+            project_advisors = self.get_orchestrator().map(profiled_init_or_filter_project_advisor, project_keys)
+        
         # Parallel run
-        if self.config.config.get("run_config",{}).get("run_pat_in_parallel", False):  
-            n_jobs = self.config.config.get("run_config",{}).get("nbr_parallel_runs",1)
+        elif self.config.config.get("run_config",{}).get("run_pat_in_parallel", False):  
+            n_jobs = self.config.budget.max_workers
             logger.info(f"Initializing {n_jobs} Project Advisors in parallel at a time")
 
             with ThreadPoolExecutor(max_workers = n_jobs) as executor:
-                project_advisors = list(executor.map(init_or_filter_project_advisor, project_keys)) 
+                project_advisors = list(executor.map(profiled_init_or_filter_project_advisor, project_keys)) 
         else:
             logger.info(f"Initializing Project Advisors sequentially")
-            project_advisors = [init_or_filter_project_advisor(project_key) for project_key in project_keys]
+            project_advisors = [profiled_init_or_filter_project_advisor(project_key) for project_key in project_keys]
         
         # Remove None from the project_advisor list (comming from second filtering)
         project_advisors = [x for x in project_advisors if x is not None]
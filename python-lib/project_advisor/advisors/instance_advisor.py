@@ -26,6 +26,7 @@ import project_advisor.assessments.checks.instance_checks # for loading
 import project_advisor.assessments.metrics.instance_metrics # for loading
 
 from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler, run_profiler
 
 class InstanceAdvisor(DSSAdvisor):
     """
@@ -38,7 +39,9 @@ class InstanceAdvisor(DSSAdvisor):
     def __init__(self,
                  client: dataikuapi.dssclient.DSSClient, 
                  config: DSSAssessmentConfig,
-                 pat_report_folder : dataiku.Folder
+                 pat_report_folder : dataiku.Folder,
+                 incremental : bool = False,
+                 resume_run_id : str = None
     ):
 
         super().__init__(client = client, 
@@ -49,7 +52,9 @@ class InstanceAdvisor(DSSAdvisor):
         self.batch_project_advisor = BatchProjectAdvisor(client=client,
                                                              config=config, 
                                                              project_filters=ProjectFilters(), # No Filters
-                                                             pat_report_folder=pat_report_folder)
+                                                             pat_report_folder=pat_report_folder,
+                                                             incremental=incremental,
+                                                             resume_run_id=resume_run_id)
         logger.info("BatchProjectAdvisor successfully created")
             
         self.init_instance_metric_list()
@@ -63,7 +68,9 @@ class InstanceAdvisor(DSSAdvisor):
         """
         logger.info(f"Running Instance Metrics")
 
-        [metric.safe_run() for metric in self.metrics]
+        with api_profiler.scope(stage = "instance_metrics"), run_profiler.span("instance_metrics"):
+            [metric.safe_run() for metric in self.metrics]
+        run_profiler.record_runtimes("instance_metric", [(metric.name, metric.runtime, metric.status.name) for metric in self.metrics])
         
         return self.metrics
     
@@ -78,7 +85,9 @@ class InstanceAdvisor(DSSAdvisor):
         if self.metrics == None:
             raise Exception('Run project metrics before running project checks')
 
-        [check.safe_run() for check in self.checks]
+        with api_profiler.scope(stage = "instance_checks"), run_profiler.span("instance_checks"):
+            [check.safe_run() for check in self.checks]
+        run_profiler.record_runtimes("instance_check", [(check.name, check.runtime, check.status.name) for check in self.checks])
         
         return self.checks
 
@@ -103,14 +112,17 @@ class InstanceAdvisor(DSSAdvisor):
         """
         logger.info(f"Logging all of the instance and project reports for InstanceAdvisor")
         
-        self.batch_project_advisor.save(timestamp = timestamp)
+        self.batch_project_advisor.save(timestamp = timestamp, save_profile = False)
         logger.info(f"Successfully saved Project Metrics and checks")
         
-        self.save_metrics(self.metrics, timestamp = timestamp, metric_type = "instance")
-        logger.info(f"Successfully saved Instance Metrics")
+        with api_profiler.scope(stage = "save"), run_profiler.span("save"):
+            self.save_metrics(self.metrics, timestamp = timestamp, metric_type = "instance")
+            logger.info(f"Successfully saved Instance Metrics")
+            
+            self.save_checks(self.checks, timestamp = timestamp, check_type = "instance")
+            logger.info(f"Successfully saved Instance Checks")
         
-        self.save_checks(self.checks, timestamp = timestamp, check_type = "instance")
-        logger.info(f"Successfully saved Instance Checks")
+        self.save_profile(timestamp)
         
         return
             
@@ -2,7 +2,7 @@ import pandas as pd
 import dataiku
 import dataikuapi
 
-from typing import Any, List
+from typing import Any, List, Optional
 from types import ModuleType
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -11,21 +11,26 @@ import sys, inspect
 import logging
 from pathlib import Path
 import os
+import time
 import importlib
 from statistics import mean 
 
 from project_advisor.advisors import DSSAdvisor
 from project_advisor.assessments.config import DSSAssessmentConfig
 
-from project_advisor.assessments import CheckSeverity
+from project_advisor.assessments import CheckSeverity, DSSAssessmentStatus
 from project_advisor.assessments.checks.project_standard import ProjectStandardResult
 from project_advisor.assessments.checks.project_check import ProjectCheck
 from project_advisor.assessments.metrics.project_metric import ProjectMetric
+from project_advisor.assessments.metrics.project_snapshot import ProjectSnapshot
 
 import project_advisor.assessments.checks.project_checks # for dynamic loading
 import project_advisor.assessments.metrics.project_metrics # for dynamic loading
 
+from project_advisor.pat_clients import client_factory
 from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler, run_profiler
+from project_advisor.pat_timeouts import PATTimeoutError, RunDeadline
 
 class ProjectAdvisor(DSSAdvisor):
     """
@@ -35,6 +40,14 @@ class ProjectAdvisor(DSSAdvisor):
     """
 
     project: dataikuapi.dss.project.DSSProject
+    snapshot : ProjectSnapshot = None # Project data shared by all the project metrics
+    released_max_severity_level : int = None # Max severity kept once the results are released
+    
+    # Timeouts
+    timeout : float = None # Seconds for the metrics & Project Standards of a project, overridden by the project_timeout run config parameter
+    deadline : RunDeadline = None # Time budget of the project, within the run budget. Started when the project starts running
+    timed_out : bool = False
+    project_standards_start_time : float = None # Start of the Project Standards run, for the run profile
     
     def __init__(self,
                  client: dataikuapi.dssclient.DSSClient, 
@@ -49,6 +62,8 @@ class ProjectAdvisor(DSSAdvisor):
                        )
         logger.info("Init ProjectAdvisor")
         self.project = project
+        self.snapshot = ProjectSnapshot(project, budget = config.budget)
+        self.deadline = RunDeadline(self.get_timeout(), parent = getattr(config, "deadline", None), name = f"Project {project.project_key}", started = False)
         self.init_project_metric_list()
 
     def run_metrics(self) -> List[ProjectMetric]:
@@ -57,8 +72,17 @@ class ProjectAdvisor(DSSAdvisor):
         Note : Do not run directly, use the *run* function instead.
         """
         logger.debug(f"Running Project Metrics for project {self.project.project_key}")
+        self.deadline.start()
 
-        [metric.safe_run() for metric in self.metrics]
+        with api_profiler.scope(stage = "metrics", project = self.project.project_key), run_profiler.span("metrics", self.project.project_key):
+            try:
+                self.snapshot.prefetch_for_metrics(self.metrics)
+            except Exception as error:
+                logger.warning(f"Failed to prefetch the project details of project {self.project.project_key} with error : {type(error).__name__}:{str(error)}")
+            [metric.safe_run() for metric in self.metrics]
+        self.snapshot.clear()
+        if any(metric.status == DSSAssessmentStatus.TIMEOUT for metric in self.metrics):
+            self.timed_out = True
         return self.metrics
     
     def run_checks(self) -> List[ProjectCheck]:
@@ -70,37 +94,116 @@ class ProjectAdvisor(DSSAdvisor):
         logger.info(f"Running Project Checks for project {self.project.project_key}")
 
         try:
-            results_future = self.project.start_run_project_standards_checks()
-            results_future.wait_for_result()
-            results = results_future.get_result()
-
-            self.checks = []
-            for key, result in results.checks_run_info.items():
-                self.checks.append(
-                    ProjectStandardResult(
-                        client = self.client, 
-                        config = self.config,
-                        project = self.project,
-                        project_standard_result = result
-                    )
-                )
+            results_future = self.start_project_standards_run()
+            self.wait_for_project_standards(results_future)
+            with self.project_standards_scope():
+                self.set_project_standards_results(results_future.get_result())
+        except Exception as error:
+            self.set_project_standards_error(error)
+        return self.checks
+    
+    def start_project_standards_run(self) -> dataikuapi.dss.future.DSSFuture:
+        """
+        Submit a Project Standards run for the project without waiting for it.
+        """
+        logger.debug(f"Submitting Project Standards run for project {self.project.project_key}")
+        self.deadline.start()
+        self.deadline.check()
+        self.project_standards_start_time = time.time()
+        with self.project_standards_scope():
+            return self.project.start_run_project_standards_checks()
+    
+    def project_standards_scope(self):
+        """
+        API profiling scope of the Project Standards calls of the project.
+        """
+        return api_profiler.scope(stage = "project_standards", project = self.project.project_key)
+    
+    def wait_for_project_standards(self, future : dataikuapi.dss.future.DSSFuture, poll_interval : float = 1) -> None:
+        """
+        Wait for a Project Standards run to complete, aborting it if the project runs out of time.
+        """
+        if self.deadline.remaining() is None:
+            with self.project_standards_scope():
+                future.wait_for_result()
+            return
+        while True:
+            with self.project_standards_scope():
+                state = future.get_state()
+            if state.get("hasResult", False):
+                return
+            if not state.get("alive", True):
+                raise Exception(f"Project Standards run ended without result : {state.get('error', state)}")
+            if self.deadline.expired():
+                self.abort_project_standards_run(future)
+                raise PATTimeoutError(self.deadline.reason())
+            time.sleep(min(poll_interval, self.deadline.remaining()))
+    
+    def abort_project_standards_run(self, future : dataikuapi.dss.future.DSSFuture) -> None:
+        """
+        Abort a Project Standards run, Ex : when the project runs out of time.
+        """
+        try:
+            with self.project_standards_scope():
+                future.abort()
         except Exception as error:
-            self.checks = []
-            logger.warning(f"Failed to run Project Standards for project {self.project.project_key} with error : {type(error).__name__}:{str(error)}")
+            logger.warning(f"Failed to abort Project Standards run for project {self.project.project_key} : {type(error).__name__}:{str(error)}")
+    
+    def set_project_standards_results(self, results) -> List[ProjectCheck]:
+        """
+        Save the results of a Project Standards run as the checks of the project.
+        """
+        self.checks = []
+        for key, result in results.checks_run_info.items():
+            self.checks.append(
+                ProjectStandardResult(
+                    client = self.client, 
+                    config = self.config,
+                    project = self.project,
+                    project_standard_result = result
+                )
+            )
+        self.record_project_standards_span()
+        return self.checks
+    
+    def set_project_standards_error(self, error : Exception) -> List[ProjectCheck]:
+        """
+        Record a failed Project Standards run.
+        """
+        self.checks = []
+        if isinstance(error, PATTimeoutError):
+            self.timed_out = True
+        logger.warning(f"Failed to run Project Standards for project {self.project.project_key} with error : {type(error).__name__}:{str(error)}")
+        self.record_project_standards_span()
         return self.checks
+    
+    def record_project_standards_span(self) -> None:
+        """
+        Record the time from the submission of the Project Standards run to its outcome in the run profile.
+        """
+        if self.project_standards_start_time is not None:
+            run_profiler.record_span("project_standards", self.project.project_key, self.project_standards_start_time, time.time())
+            self.project_standards_start_time = None
 
     @classmethod
     def get_auth_user(cls):
         """
         Return the current authenticated user_id OR impersonated user in the case of api authentication.
         """
-        auth_info = dataiku.api_client().get_auth_info()
+        auth_info = client_factory.api_client().get_auth_info()
         user_id = auth_info["authIdentifier"]
         if user_id[:4] == "api:": # Case client is authenticated with an API.
             user_id = auth_info["userForImpersonation"]
         return user_id
     
     
+    def get_timeout(self) -> Optional[float]:
+        """
+        Return the timeout of the project in seconds (None for no timeout) : the project_timeout run config parameter or the class timeout.
+        """
+        timeout = (self.config.config.get("run_config") or {}).get("project_timeout", None) or self.timeout
+        return float(timeout) if timeout else None
+    
     def user_has_permissions(self, user_id : str) -> bool:
         """
         Return boolean assessing if a user has permissions to run PAT on a project.
@@ -108,7 +211,7 @@ class ProjectAdvisor(DSSAdvisor):
         """
         try:
             user = self.config.admin_design_client.get_user(user_id)
-            user_client = user.get_client_as()
+            user_client = client_factory.pool(user.get_client_as())
             project = user_client.get_project(self.project.project_key)
             project.get_metadata() # Checks if the user has at least read only access
             return True
@@ -146,6 +249,8 @@ class ProjectAdvisor(DSSAdvisor):
         Compute the project max severity.
         This will be based on the critical checks.
         """
+        if self.released_max_severity_level is not None:
+            return self.released_max_severity_level
         if self.checks == None:
             raise Exception('Run project checks before computing the project score')
         
@@ -154,6 +259,34 @@ class ProjectAdvisor(DSSAdvisor):
         return max([c.check_severity.value for c in self.checks])
         
 
+    def get_runtime(self) -> float:
+        """
+        Return the time spent assessing the project in seconds : the metric runtimes plus the Project Standards check durations.
+        """
+        metrics_runtime = sum(metric.runtime or 0 for metric in self.metrics or [])
+        checks_runtime = sum(check.runtime or 0 for check in self.checks or []) / 1000 # durationMs
+        return metrics_runtime + checks_runtime
+
+    def record_runtimes(self) -> None:
+        """
+        Record the runtimes of the metrics & Project Standards checks in the run profile, before the results are released.
+        """
+        project_key = self.project.project_key
+        run_profiler.record_runtimes("project_metric",
+                                     [(metric.name, metric.runtime, metric.status.name) for metric in self.metrics or []],
+                                     project = project_key)
+        run_profiler.record_runtimes("project_standard",
+                                     [(check.name, None if check.runtime is None else check.runtime / 1000, check.status.name) for check in self.checks or []],
+                                     project = project_key)
+
+    def release_results(self) -> None:
+        """
+        Release the metric & check objects once they have been saved, only keeping the project max severity.
+        """
+        self.released_max_severity_level = self.get_max_severity_level() if self.checks is not None else CheckSeverity.OK.value
+        self.metrics = []
+        self.checks = []
+
     def init_project_metric_list(self) -> None:
         """
         Load all the ProjectMetric Classes under the metrics/project_metrics folder of the library.
@@ -167,9 +300,12 @@ class ProjectAdvisor(DSSAdvisor):
         # Instantiate all the project metrics
         all_metrics = []
         for project_metric_class in project_metric_classes:
-            all_metrics.append(project_metric_class(client = self.client, 
+            project_metric = project_metric_class(client = self.client, 
                                                   config = self.config, 
-                                                  project = self.project))
+                                                  project = self.project)
+            project_metric.snapshot = self.snapshot
+            project_metric.deadline = self.deadline
+            all_metrics.append(project_metric)
 
         # Filter all the checks according the assessment config & save
         self.metrics = self.filter_assessments(all_metrics)
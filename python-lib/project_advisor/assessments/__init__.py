@@ -20,6 +20,7 @@ class DSSAssessmentStatus(Enum):
     RUN_ERROR = auto()
     NOT_APPLICABLE = auto()
     NOT_RUN = auto()
+    TIMEOUT = auto()
 
 
 class ProjectCheckCategory(Enum):
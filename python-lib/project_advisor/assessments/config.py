@@ -4,7 +4,11 @@ from typing import Dict, List
 
 import dataikuapi
 from project_advisor.pat_backend import PATBackendClient
+from project_advisor.pat_clients import client_factory
+from project_advisor.pat_concurrency import AdaptiveLimiter, ConcurrencyBudget
+from project_advisor.pat_instance_cache import InstanceInfoCache
 from project_advisor.pat_logging import logger
+from project_advisor.pat_timeouts import RunDeadline
 
 
 # File to contain the DSSAssessment class implementation.
@@ -30,6 +34,18 @@ class DSSAssessmentConfig(ABC):
     
     # Precomputed mappings
     pat_backend_client : PATBackendClient = None
+    
+    # Concurrency budget shared by all the advisors & the PAT backend for this run
+    budget : ConcurrencyBudget = None
+    
+    # Adaptive limit on the concurrent API calls of the run's clients (None when adaptive concurrency is disabled)
+    limiter : AdaptiveLimiter = None
+    
+    # Instance info & settings shared by all the assessments for this run
+    instance_cache : InstanceInfoCache = None
+    
+    # Time budget of the run (run_timeout), started when the config is built
+    deadline : RunDeadline = None
 
     @property
     def infra_to_client(self) -> Dict[str, dataikuapi.dssclient.DSSClient]:
@@ -52,6 +68,12 @@ class DSSAssessmentConfig(ABC):
         self.design_client = self.config.get("design_client", None)
         self.admin_design_client = self.config.get("admin_design_client", None)
         check_filters = self.config.get("check_filters", {})
+        self.deadline = RunDeadline.from_run_config(self.config.get("run_config") or {})
+        self.budget = ConcurrencyBudget.from_run_config(self.config.get("run_config") or {})
+        self.instance_cache = InstanceInfoCache()
+        self.limiter = AdaptiveLimiter.from_run_config(self.config.get("run_config") or {})
+        self.instrument_client(self.design_client)
+        self.instrument_client(self.admin_design_client)
         
         logger.info("Running DEPLOYMENT related computations")
         
@@ -60,6 +82,10 @@ class DSSAssessmentConfig(ABC):
         if self.deployment_method != None:
             self.set_deployer_client()
             self.set_infra_to_clients_mapping()
+            self.instrument_client(self.deployer_client)
+            for clients in self.infra_to_clients.values():
+                for client in clients:
+                    self.instrument_client(client)
             logger.info("deployer_client and infra_to_clients mapping have been created & set")
         else:
             logger.info("deployment_method is set to None - skipping connection to deployement infra")
@@ -70,13 +96,21 @@ class DSSAssessmentConfig(ABC):
     def get_config(self) -> dict:
         return self.config
     
+    def instrument_client(self, client : dataikuapi.dssclient.DSSClient) -> None:
+        """
+        Route the API calls of a client through the adaptive limiter of the run, if enabled.
+        """
+        if self.limiter is not None and client is not None:
+            self.limiter.instrument(client)
+    
     def set_pat_backend_client(self):
 
         self.pat_backend_client = PATBackendClient(
             dss_client = self.admin_design_client,
             run_config = self.config.get("run_config"),
             deployer_client = self.deployer_client,
-            infra_to_client = self.infra_to_client
+            infra_to_client = self.infra_to_client,
+            budget = self.budget
         )
         
     ###############################
@@ -111,7 +145,7 @@ class DSSAssessmentConfig(ABC):
         Fetch the deployment_mode for manually connected Nodes (deployment_method : manual)
         """
         logger.debug("Get the deployment mode for manually connected nodes")
-        mode = self.admin_design_client.get_general_settings().settings.get("deployerClientSettings", {}).get("mode", None)
+        mode = self.instance_cache.get_general_settings(self.admin_design_client).get("deployerClientSettings", {}).get("mode", None)
         if mode == "LOCAL":
             return "local"
         elif mode == "REMOTE":
@@ -130,9 +164,7 @@ class DSSAssessmentConfig(ABC):
         instance_clients = []
         for instance in instances:
             if instance.get_status()["cloudMachineIsUp"]== True and instance.instance_data.get("virtualNetworkId") == vn_id:
-                client = instance.get_client()
-                if not self.config.get("deployment_config",{}).get("verify_ssl_certificate",True):
-                    client._session.verify = False
+                client = client_factory.pool(instance.get_client(), self.config.get("deployment_config",{}).get("verify_ssl_certificate",True))
                 instance_clients.append(client)
         return instance_clients   
     
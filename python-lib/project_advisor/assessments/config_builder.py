@@ -4,6 +4,9 @@ import dataiku
 import dataikuapi
 from project_advisor.assessments import InstanceCheckCategory
 from project_advisor.assessments.config import DSSAssessmentConfig
+from project_advisor.pat_clients import client_factory
+from project_advisor.pat_profiling import api_profiler, run_profiler
+from project_advisor.pat_storage import DEFAULT_REPORT_FORMAT
 from project_advisor.pat_tools import throw_if_not_an_url
 
 
@@ -18,6 +21,12 @@ class DSSAssessmentConfigBuilder():
         """
         
         ### Loading parameters ###
+        # Run Config, first to size the API client connection pools
+        run_config = DSSAssessmentConfigBuilder.build_run_config(plugin_config)
+        client_factory.configure(run_config)
+        api_profiler.reset() # Profile the API calls & time spent of this run only
+        run_profiler.reset()
+        
         check_filters = DSSAssessmentConfigBuilder.build_check_filters(config)
         
         # Project & Instance Check Configs
@@ -27,14 +36,9 @@ class DSSAssessmentConfigBuilder():
         deployment_config = DSSAssessmentConfigBuilder.build_deployment_config(plugin_config)
         
         # Setup Design Clients
-        client = dataiku.api_client()
-        if not deployment_config["verify_ssl_certificate"]:
-            client._session.verify = False
+        client = client_factory.pool(dataiku.api_client(), deployment_config["verify_ssl_certificate"])
         admin_client = DSSAssessmentConfigBuilder.build_admin_design_client(plugin_config)
         
-        # Run Config
-        run_config = DSSAssessmentConfigBuilder.build_run_config(plugin_config)
-        
         ### Defining the final DSSAssessemntConfig
         return DSSAssessmentConfig({
              "design_client" : client,
@@ -95,10 +99,7 @@ class DSSAssessmentConfigBuilder():
             design_host = dataiku.api_client().host
         
         ### Build Admin Design Node Client
-        admin_design_client = dataikuapi.DSSClient(host=design_host, api_key=design_admin_api_key)
-        if not verify_ssl_certificate:
-            admin_design_client._session.verify = False
-        return admin_design_client
+        return client_factory.dss_client(design_host, design_admin_api_key, verify_ssl_certificate)
         
     
     @classmethod
@@ -129,15 +130,15 @@ class DSSAssessmentConfigBuilder():
         automation_nodes = {}
         if deployment_method == "fm-azure":
             throw_if_not_an_url(fm_host, "Cloud Stacks Host")
-            fm_client = dataikuapi.fmclient.FMClientAzure(fm_host, fm_api_key_id, fm_api_key_secret)
+            fm_client = client_factory.fm_client(dataikuapi.fmclient.FMClientAzure, fm_host, fm_api_key_id, fm_api_key_secret, verify_ssl_certificate)
 
         elif deployment_method == "fm-aws":
             throw_if_not_an_url(fm_host, "Cloud Stacks Host")
-            fm_client = dataikuapi.fmclient.FMClientAWS(fm_host, fm_api_key_id, fm_api_key_secret)
+            fm_client = client_factory.fm_client(dataikuapi.fmclient.FMClientAWS, fm_host, fm_api_key_id, fm_api_key_secret, verify_ssl_certificate)
 
         elif deployment_method == "fm-gcp":
             throw_if_not_an_url(fm_host, "Cloud Stacks Host")
-            fm_client = dataikuapi.fmclient.FMClientGCP(fm_host, fm_api_key_id, fm_api_key_secret)
+            fm_client = client_factory.fm_client(dataikuapi.fmclient.FMClientGCP, fm_host, fm_api_key_id, fm_api_key_secret, verify_ssl_certificate)
 
         elif deployment_method == "manual":
             # Manually entered automation nodes
@@ -149,12 +150,7 @@ class DSSAssessmentConfigBuilder():
             if use_external_deployer_node:
                 # Manually entered deployer
                 throw_if_not_an_url(deployer_host, "Deployer Host")
-                external_deployer_client = dataikuapi.DSSClient(host=deployer_host, api_key=deployer_api_key)
-                if not verify_ssl_certificate:
-                    external_deployer_client._session.verify = False
-
-        if not verify_ssl_certificate and fm_client != None:
-            fm_client._session.verify = False
+                external_deployer_client = client_factory.dss_client(deployer_host, deployer_api_key, verify_ssl_certificate)
 
         deployment_config = {
             "deployment_method": deployment_method,
@@ -175,18 +171,16 @@ class DSSAssessmentConfigBuilder():
         if infra_type == "multi":
             auto_multi_nodes = infra_config.get("auto_multi_nodes", [])
             auto_clients = [
-                dataikuapi.DSSClient(host=node.get("auto_host", None), api_key=node.get("auto_api_key", None))
+                client_factory.dss_client(node.get("auto_host", None), node.get("auto_api_key", None), verify_ssl_certificate)
                 for node in auto_multi_nodes
             ]
         else:
             auto_host = infra_config.get("auto_host", None)
             auto_api_key = infra_config.get("auto_api_key", None)
-            auto_clients = [dataikuapi.DSSClient(host=auto_host, api_key=auto_api_key)]
+            auto_clients = [client_factory.dss_client(auto_host, auto_api_key, verify_ssl_certificate)]
 
         for auto_client in auto_clients:
             throw_if_not_an_url(auto_client.host, f"Automation Node Host for infra {infra_id}")
-            if not verify_ssl_certificate:
-                auto_client._session.verify = False
 
         return auto_clients
 
@@ -201,10 +195,25 @@ class DSSAssessmentConfigBuilder():
         # Plugin (Instance) level config
         run_pat_in_parallel = plugin_config.get("run_pat_in_parallel", None)
         nbr_parallel_runs = plugin_config.get("nbr_parallel_runs", None)
+        nbr_parallel_ps_runs = plugin_config.get("nbr_parallel_ps_runs", None)
+        orchestration_mode = plugin_config.get("orchestration_mode", "threads")
+        orchestration_timeout = plugin_config.get("orchestration_timeout", None)
+        api_timeout = plugin_config.get("api_timeout", None)
+        api_retries = plugin_config.get("api_retries", None)
+        run_timeout = plugin_config.get("run_timeout", None)
+        project_timeout = plugin_config.get("project_timeout", None)
+        assessment_timeout = plugin_config.get("assessment_timeout", None)
+        assessment_timeouts = plugin_config.get("assessment_timeouts", None) or {}
+        adaptive_concurrency = plugin_config.get("adaptive_concurrency", False)
+        max_parallel_api_calls = plugin_config.get("max_parallel_api_calls", None)
+        cpu_process_workers = plugin_config.get("cpu_process_workers", 0)
         logging_level = plugin_config.get("logging_level", "DEBUG")
         
         pat_backend_folder_full_id = plugin_config.get("pat_backend_folder_full_id", None)
         pat_backend_folder = dataiku.Folder(pat_backend_folder_full_id)
+        pat_backend_format = plugin_config.get("pat_backend_format", "parquet")
+        pat_backend_storage = plugin_config.get("pat_backend_storage", "full")
+        pat_report_format = plugin_config.get("pat_report_format", DEFAULT_REPORT_FORMAT)
             
         use_llm_powered_checks = plugin_config.get("use_llm_powered_checks", False)
         llm_id = plugin_config.get("llm_id", None)
@@ -212,8 +221,23 @@ class DSSAssessmentConfigBuilder():
         return {
             "run_pat_in_parallel" : run_pat_in_parallel,
             "nbr_parallel_runs" : nbr_parallel_runs,
+            "nbr_parallel_ps_runs" : nbr_parallel_ps_runs,
+            "orchestration_mode" : orchestration_mode,
+            "orchestration_timeout" : orchestration_timeout,
+            "adaptive_concurrency" : adaptive_concurrency,
+            "max_parallel_api_calls" : max_parallel_api_calls,
+            "cpu_process_workers" : cpu_process_workers,
+            "api_timeout" : api_timeout,
+            "api_retries" : api_retries,
+            "run_timeout" : run_timeout,
+            "project_timeout" : project_timeout,
+            "assessment_timeout" : assessment_timeout,
+            "assessment_timeouts" : assessment_timeouts,
             "logging_level" : logging_level,
             "pat_backend_folder" : pat_backend_folder,
+            "pat_backend_format" : pat_backend_format,
+            "pat_backend_storage" : pat_backend_storage,
+            "pat_report_format" : pat_report_format,
             "use_llm_powered_checks" : use_llm_powered_checks,
             "llm_id" : llm_id
         }
@@ -1,16 +1,20 @@
 import dataikuapi
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from typing_extensions import Self
 from abc import ABC, abstractmethod
 
 from packaging.version import Version
 import time
 import re
+import copy
+import subprocess
 
 from project_advisor.assessments.config import DSSAssessmentConfig
 
 from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler
+from project_advisor.pat_timeouts import PATTimeoutError, RunDeadline, call_with_timeout
 from project_advisor.assessments import DSSAssessmentStatus
 
 class DSSAssessment(ABC):
@@ -35,6 +39,11 @@ class DSSAssessment(ABC):
     tags : List[str] = []
     status : DSSAssessmentStatus = DSSAssessmentStatus.NOT_RUN
     
+    # Timeouts
+    timeout : float = None # Seconds, overridden by the assessment_timeouts run config parameter
+    fs_timeout : float = 1800 # Seconds, default timeout of the assessments using the file system (Ex : du on large folders)
+    deadline : RunDeadline = None # Time budget of the project or run of the assessment (run budget by default)
+    
     # Filter Params
     has_llm = False
     uses_fs = False
@@ -83,8 +92,25 @@ class DSSAssessment(ABC):
         logger.debug(f"Safe run of Assessment of name {self.name}")
         start_time = time.time()
         try:
-            self.run()
+            deadline = self.get_deadline()
+            if deadline is not None:
+                deadline.check()
+            timeout = self.get_timeout()
+            with api_profiler.scope(assessment = self.name):
+                if timeout is None:
+                    self.run()
+                else:
+                    outcome = call_with_timeout(self.run_isolated, timeout, f"Assessment {self.name}")
+                    self.__dict__.update(outcome["outputs"]) # Only the outputs of a run that finished in time are kept
+                    if outcome["error"] is not None:
+                        raise outcome["error"]
             self.status = DSSAssessmentStatus.RUN_SUCCESS
+        except (PATTimeoutError, subprocess.TimeoutExpired) as error: # Ex : du timing out on a file system metric
+            self.status = DSSAssessmentStatus.TIMEOUT
+            self.run_result = {
+                                "error" : type(error).__name__,
+                                "error_message" : str(error)
+                              }
         except Exception as error:
             self.status = DSSAssessmentStatus.RUN_ERROR
             error_dict = {
@@ -99,6 +125,24 @@ class DSSAssessment(ABC):
         self.runtime = time.time() - start_time
         return self
     
+    def run_isolated(self) -> dict:
+        """
+        Run the assessment on a copy and return its attributes (outputs) with the error it raised, if any.
+        A run that times out keeps writing to its copy : the attributes it rebinds & the dict, list or set attributes it updates in place
+        (copied one level deep) never reach the assessment. The other objects are shared, Ex : a timed out run can keep
+        calling the API through the project snapshot, which is why the timed out calls still running are capped (see TimedOutCalls).
+        """
+        assessment = copy.copy(self)
+        for attribute, value in vars(assessment).items():
+            if isinstance(value, (dict, list, set)):
+                setattr(assessment, attribute, copy.copy(value))
+        try:
+            assessment.run()
+            error = None
+        except Exception as run_error:
+            error = run_error
+        return {"outputs" : vars(assessment), "error" : error}
+    
     def print_tags(self) -> str:
         if isinstance(self.tags, list):
             return "|".join(self.tags)
@@ -150,7 +194,7 @@ class DSSAssessment(ABC):
         """
         Method to determin if an Assessment is compatible with current the DSS verion
         """
-        dss_version_raw = self.client.get_instance_info().raw["dssVersion"]
+        dss_version_raw = self.get_instance_info()["dssVersion"]
         match = re.match(r"(\d+)\.(\d+)\.(\d+).*", dss_version_raw) # Manage edge case where version has trailing characters.
         if match:
             x, y, z = match.groups()
@@ -180,16 +224,57 @@ class DSSAssessment(ABC):
                }
     
     
+    def get_deadline(self) -> Optional[RunDeadline]:
+        """
+        Return the time budget the assessment runs within : its project's, or the run's.
+        """
+        if self.deadline is not None:
+            return self.deadline
+        return getattr(self.config, "deadline", None)
+    
+    def get_timeout(self) -> Optional[float]:
+        """
+        Return the timeout of the assessment in seconds (None for no timeout), within the time left to its project & run.
+        The assessment_timeouts run config parameter (by assessment name or class name) overrides the class timeout
+        (fs_timeout for the assessments using the file system), assessment_timeout applies to the other assessments without timeout.
+        """
+        run_config = (self.config.config.get("run_config") or {}) if self.config is not None else {}
+        overrides = run_config.get("assessment_timeouts") or {}
+        timeout = overrides.get(self.name, overrides.get(type(self).__name__))
+        if timeout is None:
+            timeout = self.timeout or (self.fs_timeout if self.uses_fs else None) or run_config.get("assessment_timeout", None)
+        timeout = float(timeout) if timeout else None
+        
+        deadline = self.get_deadline()
+        return deadline.clamp(timeout) if deadline is not None else timeout
+    
+    
     ### Helper Functions ###
+    def get_instance_info(self) -> dict:
+        """
+        Return the raw instance info, read once per run from the shared instance cache.
+        """
+        instance_cache = getattr(self.config, "instance_cache", None)
+        if instance_cache is None:
+            return self.client.get_instance_info().raw
+        return instance_cache.get_instance_info(self.client)
+    
+    def get_general_settings(self) -> dict:
+        """
+        Return the raw instance general settings, read once per run from the shared instance cache.
+        """
+        instance_cache = getattr(self.config, "instance_cache", None)
+        if instance_cache is None:
+            return self.client.get_general_settings().settings
+        return instance_cache.get_general_settings(self.client)
+    
     def get_project_info(self, project : dataikuapi.dss.project.DSSProject) -> dict:
         """
         Return a dict with project specific metadata
         """
         try:
-            project_to_folder_path_df = self.config.pat_backend_client.get_table("project_to_folder_path")  
-            if project_to_folder_path_df is not None:
-                project_folder = project_to_folder_path_df[project_to_folder_path_df["project_key"] == project.project_key]["path"][0]
-            else:
+            project_folder = self.config.pat_backend_client.get_value("project_to_folder_path", "path", project_key = project.project_key)
+            if project_folder is None:
                 project_folder = project.get_project_folder().get_path()
             return {
                 "project_key" : project.project_key,
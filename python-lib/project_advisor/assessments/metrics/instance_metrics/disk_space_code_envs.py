@@ -34,7 +34,7 @@ class DiskSpaceCodeEnvs(InstanceMetric):
             dss_version_min = Version("11.3.2"),
             dss_version_max = None
         )
-        self.datadir_path = client.get_instance_info().raw["dataDirPath"]
+        self.datadir_path = self.get_instance_info()["dataDirPath"]
         self.folder_name= "code-envs"
         self.uses_fs = True
         self.metric_unit = "kb"
@@ -45,7 +45,7 @@ class DiskSpaceCodeEnvs(InstanceMetric):
         files = glob.glob(subfolder_path)
         if files:
             for file in files:
-                c=subprocess.run(["du", "-s", "-k", file], stdout=subprocess.PIPE)
+                c=subprocess.run(["du", "-s", "-k", file], stdout=subprocess.PIPE, timeout=self.get_timeout())
                 folder_size_in_kb = int(c.stdout.decode('utf-8').strip().split("\t")[0])
                 code_env_name = file.split("/")[-1]
                 size[code_env_name] = folder_size_in_kb     
@@ -70,7 +70,7 @@ class DiskSpaceCodeEnvs(InstanceMetric):
         folder_path = os.path.join(self.datadir_path,self.folder_name)
         folder_size_in_kb = 0
         if os.path.isdir(folder_path):
-            result = subprocess.run(["du", "-s", "-k", folder_path], stdout=subprocess.PIPE)
+            result = subprocess.run(["du", "-s", "-k", folder_path], stdout=subprocess.PIPE, timeout=self.get_timeout())
             folder_size_in_kb = int(result.stdout.decode('utf-8').strip().split("\t")[0])
         self.value = folder_size_in_kb
 
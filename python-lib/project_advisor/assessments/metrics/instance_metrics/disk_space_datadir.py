@@ -33,7 +33,7 @@ class DiskSpaceDatadir(InstanceMetric):
             dss_version_min = Version("3.0.0"),
             dss_version_max = None
         )
-        self.datadir_path = client.get_instance_info().raw["dataDirPath"]
+        self.datadir_path = self.get_instance_info()["dataDirPath"]
         self.uses_fs = True
         self.metric_unit = "kb"
     
@@ -44,7 +44,7 @@ class DiskSpaceDatadir(InstanceMetric):
         """
         folder_size_in_kb = 0
         if os.path.isdir(self.datadir_path):
-            result = subprocess.run(["du", "-s", "-k", self.datadir_path], stdout=subprocess.PIPE)
+            result = subprocess.run(["du", "-s", "-k", self.datadir_path], stdout=subprocess.PIPE, timeout=self.get_timeout())
             folder_size_in_kb = int(result.stdout.decode('utf-8').strip().split("\t")[0])
         
         self.value = folder_size_in_kb
@@ -12,6 +12,7 @@ from packaging.version import Version
 
 from project_advisor.assessments.metrics import (DSSMetric, AssessmentMetricType)
 from project_advisor.assessments.config import DSSAssessmentConfig 
+from project_advisor.assessments.metrics.project_snapshot import ProjectSnapshot
 
 
 class ProjectMetric(DSSMetric):
@@ -19,6 +20,12 @@ class ProjectMetric(DSSMetric):
     An abstract class to run and store Project specific DSS metric computations
     """
     project : dataikuapi.dss.project.DSSProject = None
+    snapshot : ProjectSnapshot = None # Shared by all the metrics of a project run, set by the ProjectAdvisor
+    
+    # Per object details read from the snapshot, prefetched concurrently before the project metrics run
+    prefetch_recipe_statuses : bool = False
+    prefetch_recipe_settings_types : List[str] = []
+    prefetch_webapp_settings_types : List[str] = []
      
     def __init__(
         self,
@@ -65,6 +72,22 @@ class ProjectMetric(DSSMetric):
     ####################
     # Shared Functions #
     ####################
+    def get_snapshot(self) -> ProjectSnapshot:
+        """
+        Return the project snapshot shared by the metrics of the project run (a private one if the metric runs on its own).
+        """
+        if self.snapshot is None:
+            self.snapshot = ProjectSnapshot(self.project)
+        return self.snapshot
+    
+    def get_project_settings(self, project : dataikuapi.dss.project.DSSProject) -> dict:
+        """
+        Return the raw settings of a project, from the snapshot for the project of the metric.
+        """
+        if project is self.project:
+            return self.get_snapshot().get_project_settings().settings
+        return project.get_settings().settings
+
     def get_default_project_visual_exec_config(self, project : dataikuapi.dss.project.DSSProject) -> str:
         """
         Return the default containerized exec config for a visual recipe
@@ -72,10 +95,10 @@ class ProjectMetric(DSSMetric):
         DSS_ENGINE = "DSS"
 
         # Instance defaults
-        instance_exec_conf = self.client.get_general_settings().settings.get("containerSettings")
+        instance_exec_conf = self.get_general_settings().get("containerSettings", {})
         instance_default_visual_exec_config = instance_exec_conf.get('defaultExecutionConfigForVisualRecipesWorkloads')
         # Project defaults
-        p_settings = project.get_settings().settings.get("settings",{})
+        p_settings = self.get_project_settings(project).get("settings",{})
         project_visual_exec_mode = p_settings.get("containerForVisualRecipesWorkloads",{}).get("containerMode")
         project_visual_exec_config = p_settings.get("containerForVisualRecipesWorkloads",{}).get("containerConf")
 
@@ -99,11 +122,11 @@ class ProjectMetric(DSSMetric):
         DSS_ENGINE = "DSS"
 
         # Instance defaults
-        instance_exec_conf = self.client.get_general_settings().settings.get("containerSettings")
+        instance_exec_conf = self.get_general_settings().get("containerSettings", {})
         instance_default_code_exec_config = instance_exec_conf.get('defaultExecutionConfig')
 
         # Project defaults
-        p_settings = project.get_settings().settings.get("settings",{})
+        p_settings = self.get_project_settings(project).get("settings",{})
         project_code_exec_mode = p_settings.get("container",{}).get("containerMode")
         project_code_exec_config = p_settings.get("container",{}).get("containerConf")
 
@@ -32,6 +32,7 @@ class MaxNbrOfSqlRowsInRecipeMetric(ProjectMetric):
             dss_version_max=None,  # Latest
             tags = ["DESIGN_PATTERN"]
         )
+        self.prefetch_recipe_settings_types = ["sql_query"]
 
     def run(self) -> ProjectMetric:
         """
@@ -43,15 +44,15 @@ class MaxNbrOfSqlRowsInRecipeMetric(ProjectMetric):
         allSQLRecipes = []
 
         # Get all recipes in the project
-        recipe_list = self.project.list_recipes()
+        snapshot = self.get_snapshot()
+        recipe_list = snapshot.list_recipes()
 
         # Filter for SQL code recipes
         sql_recipes_list = [recipe for recipe in recipe_list if recipe['type'] == 'sql_query']
             
         for recipe in sql_recipes_list:
             recipe_name = recipe["name"]
-            recipe = self.project.get_recipe(recipe_name)
-            settings = recipe.get_settings()
+            settings = snapshot.get_recipe_settings(recipe_name)
             sql_code = settings.get_payload()
                     
             if sql_code == None:
@@ -25,13 +25,15 @@ class NumberRecipesWithSQLEngine(ProjectMetric):
             dss_version_max = None, # Latest
             tags = ["DESIGN_PATTERN"]
         )
+        self.prefetch_recipe_statuses = True
 
     def run(self) -> ProjectMetric:
         """
         Finds and count all the recipes in the Flow that use the SQL engine.
         """
         engine_type = "SQL"
-        sql_recipes = [r for r in self.project.list_recipes(as_type = "objects") if r.get_status().data.get("selectedEngine",{}).get("type") == engine_type]
+        snapshot = self.get_snapshot()
+        sql_recipes = [r for r in snapshot.list_recipes() if snapshot.get_recipe_engine(r.name) == engine_type]
         run_result  = {"sql_recipes" : [r.name for r in sql_recipes]}
         
         self.value = len(sql_recipes)
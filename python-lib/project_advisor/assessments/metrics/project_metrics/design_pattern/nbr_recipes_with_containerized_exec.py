@@ -25,6 +25,7 @@ class NumberRecipesContainerizedExec(ProjectMetric):
             dss_version_max = None,
             tags = ["DESIGN_PATTERN"]
         )
+        self.prefetch_recipe_statuses = True
 
     def run(self) -> ProjectMetric:
         """
@@ -38,10 +39,11 @@ class NumberRecipesContainerizedExec(ProjectMetric):
         default_project_code_recipe_exec_config = self.get_default_project_code_exec_config(self.project)
        
         containerized_recipes = []
-        for r in self.project.list_recipes(as_type = "objects"):
+        snapshot = self.get_snapshot()
+        for r in snapshot.list_recipes():
 
             # Get recipe engine
-            engine = r.get_status().data.get("selectedEngine",{}).get("type", "NOT_SELECTED")
+            engine = snapshot.get_recipe_engine(r.name)
             containerized_config = None
             is_containerized = False
 
@@ -53,7 +55,7 @@ class NumberRecipesContainerizedExec(ProjectMetric):
 
             # Case for python/R code recipe and plugin recipes 
             elif engine in ["USER_CODE","PLUGIN_CODE"]:
-                container_selection = r.get_settings().get_recipe_params().get("containerSelection",{})
+                container_selection = snapshot.get_recipe_settings(r.name).get_recipe_params().get("containerSelection",{})
                 code_recipe_engine = self.get_code_engine_from_container_selection(project = self.project, 
                                                                                    default_project_code_recipe_exec_config = default_project_code_recipe_exec_config, 
                                                                                    **container_selection)
@@ -67,7 +69,7 @@ class NumberRecipesContainerizedExec(ProjectMetric):
 
             if is_containerized:
                 containerized_recipes.append({"name" :r.name, 
-                                           "type":r.get_settings().data.get('recipe',{}).get('type'),
+                                           "type":r.type,
                                              "containerized_config" : containerized_config 
                                           })
         
@@ -25,6 +25,7 @@ class NumberRecipesWithLocalDSSEngine(ProjectMetric):
             dss_version_max = None, # Latest
             tags = ["DESIGN_PATTERN"]
         )
+        self.prefetch_recipe_statuses = True
 
     def run(self) -> ProjectMetric:
         """
@@ -37,10 +38,11 @@ class NumberRecipesWithLocalDSSEngine(ProjectMetric):
         default_project_visual_recipe_exec_config = self.get_default_project_visual_exec_config(self.project)
         default_project_code_recipe_exec_config = self.get_default_project_code_exec_config(self.project)
         dss_engine_recipes = []
-        for r in self.project.list_recipes(as_type = "objects"):
+        snapshot = self.get_snapshot()
+        for r in snapshot.list_recipes():
 
             # Get recipe engine
-            engine = r.get_status().data.get("selectedEngine",{}).get("type", "NOT_SELECTED")
+            engine = snapshot.get_recipe_engine(r.name)
 
             # Case for Visual Recipes with DSS engine selected
             if engine == "DSS":
@@ -50,7 +52,7 @@ class NumberRecipesWithLocalDSSEngine(ProjectMetric):
                     uses_dss_engine = False
             # Case for python/R code recipe and plugin recipes 
             elif engine in ["USER_CODE","PLUGIN_CODE"]:
-                container_selection = r.get_settings().get_recipe_params().get("containerSelection",{})
+                container_selection = snapshot.get_recipe_settings(r.name).get_recipe_params().get("containerSelection",{})
                 print (f"container_selection : {container_selection}")
                 
                 code_recipe_engine = self.get_code_engine_from_container_selection(self.project, 
@@ -66,7 +68,7 @@ class NumberRecipesWithLocalDSSEngine(ProjectMetric):
 
             if uses_dss_engine:
                 dss_engine_recipes.append({"name" :r.name, 
-                                           "type":r.get_settings().data.get('recipe',{}).get('type')
+                                           "type":r.type
                                           })
         
         run_result = {"dss_engine_recipes" : dss_engine_recipes}
@@ -32,6 +32,7 @@ class NumberOfTooBigPyRecipesMetric(ProjectMetric):
             dss_version_max=None,  # Latest
             tags = ["DESIGN_PATTERN"]
         )
+        self.prefetch_recipe_settings_types = ["python"]
 
     def run(self) -> ProjectMetric:
         """
@@ -46,14 +47,14 @@ class NumberOfTooBigPyRecipesMetric(ProjectMetric):
          }
 
         # Get all recipes in the project
-        recipe_list = self.project.list_recipes()
+        snapshot = self.get_snapshot()
+        recipe_list = snapshot.list_recipes()
 
         # Filter for Python code recipes
         python_recipes_list = [recipe for recipe in recipe_list if recipe['type'] == 'python']
 
         for recipe in python_recipes_list:
-            dss_recipe = recipe.to_recipe()
-            python_code = dss_recipe.get_settings().get_code()
+            python_code = snapshot.get_recipe_settings(recipe["name"]).get_code()
             if python_code == None:
                 python_code = ""
 
@@ -65,7 +66,7 @@ class NumberOfTooBigPyRecipesMetric(ProjectMetric):
                  and not line.startswith("from")
                 ]
             if len(lines) > max_nbr_row_python_recipe:
-                result['recipe_ids'][dss_recipe.id] = len(lines)
+                result['recipe_ids'][recipe.id] = len(lines)
         
         self.value = len(result['recipe_ids'])
         self.run_result = result
@@ -32,6 +32,8 @@ class GenAIinFlowMetric(ProjectMetric):
             dss_version_max=None,  # Latest
             tags = ["FEATURE_USAGE"]
         )
+        self.prefetch_recipe_settings_types = ["python"]
+        self.prefetch_webapp_settings_types = ["DASH","BOKEH","STANDARD"]
 
     def run(self) -> ProjectMetric:
         """
@@ -48,6 +50,7 @@ class GenAIinFlowMetric(ProjectMetric):
         """
         result = {}
         overall_result = False
+        snapshot = self.get_snapshot()
         
         # Part 1:
         #  Uses llm powered nlp recipes
@@ -57,7 +60,7 @@ class GenAIinFlowMetric(ProjectMetric):
         genai_recipe_types = ["nlp_llm_user_provided_classification", "nlp_llm_rag_embedding", "nlp_llm_model_provided_classification","prompt", "nlp_llm_summarization", "nlp_llm_evaluation","nlp_llm_finetuning"]
         genai_recipe_counter = 0
         genai_recipe_ids = []
-        recipes = self.project.list_recipes()
+        recipes = snapshot.list_recipes()
 
         for r in recipes:
             if r.type in genai_recipe_types:
@@ -67,7 +70,7 @@ class GenAIinFlowMetric(ProjectMetric):
         # Part 2 :
         # Uses KB
 
-        knowledge_banks = self.project.list_knowledge_banks(as_type='listitems')
+        knowledge_banks = snapshot.list_knowledge_banks()
         knowledge_bank_ids = []
         knowledge_bank_counter = 0 
         for kb in knowledge_banks:
@@ -78,7 +81,7 @@ class GenAIinFlowMetric(ProjectMetric):
         #  Uses prompt studios: API call not possible as of now 
 
         #  Uses LLM mesh python API in python recipe OR webapp: usage of get_llm()
-        project_webapps= self.project.list_webapps()
+        project_webapps= snapshot.list_webapps()
         python_webapps_list = [w for w in project_webapps if w.get('type') in ['DASH','BOKEH','STANDARD']]
 
 
@@ -86,8 +89,7 @@ class GenAIinFlowMetric(ProjectMetric):
         genai_webapp_counter=0
         for webapp in python_webapps_list:
             webapp_name = webapp.get("name")
-            webapp_current = self.project.get_webapp(webapp.get("id"))
-            settings = webapp_current.get_settings().get_raw()
+            settings = snapshot.get_webapp_settings(webapp.get("id"))
             python_code = settings.get("params",{}).get("python")
             if python_code == None:
                 python_code = ""
@@ -95,7 +97,7 @@ class GenAIinFlowMetric(ProjectMetric):
                 genai_webapp_counter+= 1
                 genai_webapp_ids.append(webapp.get('id'))
 
-        recipe_list = self.project.list_recipes()
+        recipe_list = snapshot.list_recipes()
 
         # Filter for Python code recipes
         python_recipes_list = [recipe for recipe in recipe_list if recipe.get('type') == 'python']
@@ -104,8 +106,7 @@ class GenAIinFlowMetric(ProjectMetric):
         genai_used=False     
         for recipe in python_recipes_list:
             recipe_name = recipe.get("name")
-            recipe = self.project.get_recipe(recipe_name)
-            settings = recipe.get_settings()
+            settings = snapshot.get_recipe_settings(recipe_name)
             python_code = settings.get_payload()
                     
             if python_code == None:
@@ -125,7 +126,7 @@ class GenAIinFlowMetric(ProjectMetric):
                     
         #  Uses Answers
 
-        project_webapps= self.project.list_webapps()
+        project_webapps= snapshot.list_webapps()
         answers_webapp_ids = []
         answers_webapp_counter=0
         for answers in project_webapps:
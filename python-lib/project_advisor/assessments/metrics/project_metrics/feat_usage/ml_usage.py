@@ -50,7 +50,7 @@ class MLUsageMetric(ProjectMetric):
         ml_recipe_types = ["score", "nlp_llm_user_provided_classification", "nlp_llm_rag_embedding", "nlp_llm_model_provided_classification","prompt", "nlp_llm_summarization", "nlp_llm_evaluation","nlp_llm_finetuning"]
         ml_recipe_counter = 0
         ml_recipe_ids = []
-        recipes = self.project.list_recipes()
+        recipes = self.get_snapshot().list_recipes()
 
         for r in recipes:
             if r.type in ml_recipe_types:
@@ -58,7 +58,7 @@ class MLUsageMetric(ProjectMetric):
                 ml_recipe_ids.append(r.id)
         
         #other ML elements
-        saved_models=self.project.list_saved_models()
+        saved_models=self.get_snapshot().list_saved_models()
         saved_model_ids = []
         saved_model_counter = 0
         for s in saved_models:
@@ -72,7 +72,7 @@ class MLUsageMetric(ProjectMetric):
             model_evaluation_store_counter+= 1
             model_evaluation_store_ids.append(me.get_settings().get_raw()['id'])
 
-        knowledge_banks = self.project.list_knowledge_banks(as_type='listitems')
+        knowledge_banks = self.get_snapshot().list_knowledge_banks()
         knowledge_bank_ids = []
         knowledge_bank_counter = 0 
         for kb in knowledge_banks:
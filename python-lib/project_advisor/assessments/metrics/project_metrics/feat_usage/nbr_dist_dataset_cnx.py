@@ -42,7 +42,7 @@ class NumberOfUsedDatasetConectionsMetric(ProjectMetric):
         cnxs = []
         unmanaged_datasets = []
         result = {}
-        datasets = self.project.list_datasets()
+        datasets = self.get_snapshot().list_datasets()
         
         for dataset in datasets:
             try:
@@ -39,7 +39,7 @@ class NumberOfDatasets(ProjectMetric):
         :return: self
         """
         result = {}
-        datasets = self.project.list_datasets()
+        datasets = self.get_snapshot().list_datasets()
         
         d_names = [d["name"] for d in datasets]
         result["dataset_names"] = d_names
@@ -44,7 +44,7 @@ class NumberOfDistinctVisualRecipesMetric(ProjectMetric):
         visual_recipe_counter = 0
         visual_recipe_types = []
         visual_recipe_ids = []
-        recipes = self.project.list_recipes()
+        recipes = self.get_snapshot().list_recipes()
 
         for r in recipes:
             if r.type not in code_recipe_types:
@@ -34,7 +34,7 @@ class NumberPartitionedDatasets(ProjectMetric):
         """
         Computes the number of Partitioned datasets.
         """
-        datasets = self.project.list_datasets()
+        datasets = self.get_snapshot().list_datasets()
         partitioned_datasets = [d for d in datasets if len(d.get("partitioning",{}).get("dimensions",[]))>0]
         run_result = {"partitioned_datasets" : [
                             {
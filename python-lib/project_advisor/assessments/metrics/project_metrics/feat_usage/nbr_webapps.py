@@ -40,7 +40,7 @@ class UsageOfWebapps(ProjectMetric):
         """
         result = {}
 
-        webapps = self.project.list_webapps()
+        webapps = self.get_snapshot().list_webapps()
 
         webapp_counter = 0
         webapp_ids = []
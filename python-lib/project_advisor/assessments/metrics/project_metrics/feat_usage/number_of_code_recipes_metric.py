@@ -43,7 +43,7 @@ class NumberOfCodeRecipesMetric(ProjectMetric):
         code_recipe_types = ["python", "sql_query", "sql_script", "r", "shell", "spark_sql_query", "spark_scala", "sparkr", "pyspark"]
         code_recipe_counter = 0
         code_recipe_ids = []
-        recipes = self.project.list_recipes()
+        recipes = self.get_snapshot().list_recipes()
 
         for r in recipes:
             if r.type in code_recipe_types:
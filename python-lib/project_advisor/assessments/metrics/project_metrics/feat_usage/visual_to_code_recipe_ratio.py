@@ -42,7 +42,7 @@ class PercentageOfCodeRecipes(ProjectMetric):
         result = {}
         code_recipe_types = ["python", "sql_query", "sql_script", "r", "shell"]
         
-        recipes = self.project.list_recipes()
+        recipes = self.get_snapshot().list_recipes()
         
         nbr_recipes = len(recipes)
         code_recipe_counter = 0
@@ -33,7 +33,7 @@ class DiskSpaceManagedDatasets(ProjectMetric):
             dss_version_max = None,
             tags = ["FILE_SYSTEM"]
         )
-        self.datadir_path = client.get_instance_info().raw["dataDirPath"]
+        self.datadir_path = self.get_instance_info()["dataDirPath"]
         self.folder_name= "managed_datasets"
         self.uses_fs = True
         self.metric_unit = "kb"
@@ -48,7 +48,7 @@ class DiskSpaceManagedDatasets(ProjectMetric):
         folder_size_in_kb = 0
         if files:
             for file in files:
-                c=subprocess.run(["du", "-s", "-k", file], stdout=subprocess.PIPE)
+                c=subprocess.run(["du", "-s", "-k", file], stdout=subprocess.PIPE, timeout=self.get_timeout())
                 folder_size_in_kb += int(c.stdout.decode('utf-8').strip().split("\t")[0])        
         self.value = folder_size_in_kb
         self.run_result = {}
@@ -32,7 +32,7 @@ class DiskSpaceScenarioLogs(ProjectMetric):
             dss_version_max = None,
             tags = ["FILE_SYSTEM"]
         )
-        self.datadir_path = client.get_instance_info().raw["dataDirPath"]
+        self.datadir_path = self.get_instance_info()["dataDirPath"]
         self.folder_name= "scenarios"
         self.uses_fs = True
         self.metric_unit = "kb"
@@ -45,7 +45,7 @@ class DiskSpaceScenarioLogs(ProjectMetric):
         project_folder_path = os.path.join(self.datadir_path,self.folder_name,self.project.project_key)
         folder_size_in_kb = 0
         if os.path.isdir(project_folder_path):
-            result = subprocess.run(["du", "-s", "-k", project_folder_path], stdout=subprocess.PIPE)
+            result = subprocess.run(["du", "-s", "-k", project_folder_path], stdout=subprocess.PIPE, timeout=self.get_timeout())
             folder_size_in_kb = int(result.stdout.decode('utf-8').strip().split("\t")[0])
         self.value = folder_size_in_kb
         self.run_result = {}
@@ -0,0 +1,123 @@
+# File to contain the ProjectSnapshot class, shared by all the ProjectMetrics of a project run.
+
+import dataikuapi
+
+from typing import Any, Iterable, List, Set
+
+from project_advisor.pat_concurrency import ConcurrencyBudget, SharedListings
+from project_advisor.pat_logging import logger
+
+
+class ProjectSnapshot():
+    """
+    Lazily populated view of a project, shared by all the ProjectMetrics of a project run.
+    - Listings (recipes, webapps, datasets...), the project settings & the flow graph are fetched at most once.
+    - Per object details (recipe settings & engine status, webapp settings) are fetched at most once per object,
+      and can be prefetched concurrently before the metrics run.
+    Note : Snapshot values are shared by all the metrics and must be treated as read only.
+    """
+
+    def __init__(self, project : dataikuapi.dss.project.DSSProject, budget : ConcurrencyBudget = None):
+        self.project = project
+        self.budget = budget if budget is not None else ConcurrencyBudget(1)
+        self._values = SharedListings()
+
+    def clear(self) -> None:
+        """
+        Release the snapshot values once the project metrics have run.
+        """
+        self._values.clear()
+
+    ############
+    # Listings #
+    ############
+
+    def list_recipes(self) -> List[dataikuapi.dss.recipe.DSSRecipeListItem]:
+        return self._values.get("recipes", lambda : self.project.list_recipes())
+
+    def list_webapps(self) -> List[dict]:
+        return self._values.get("webapps", lambda : self.project.list_webapps())
+
+    def list_datasets(self) -> List[dataikuapi.dss.dataset.DSSDatasetListItem]:
+        return self._values.get("datasets", lambda : self.project.list_datasets())
+
+    def list_knowledge_banks(self) -> list:
+        return self._values.get("knowledge_banks", lambda : self.project.list_knowledge_banks(as_type = "listitems"))
+
+    def list_saved_models(self) -> List[dict]:
+        return self._values.get("saved_models", lambda : self.project.list_saved_models())
+
+    def get_project_settings(self) -> dataikuapi.dss.project.DSSProjectSettings:
+        return self._values.get("project_settings", lambda : self.project.get_settings())
+
+    def get_flow_graph(self) -> dataikuapi.dss.flow.DSSProjectFlowGraph:
+        return self._values.get("flow_graph", lambda : self.project.get_flow().get_graph())
+
+    ######################
+    # Per object details #
+    ######################
+
+    def get_recipe(self, recipe_name : str) -> dataikuapi.dss.recipe.DSSRecipe:
+        return self.project.get_recipe(recipe_name)
+
+    def get_recipe_settings(self, recipe_name : str) -> dataikuapi.dss.recipe.DSSRecipeSettings:
+        return self._values.get(f"recipe_settings:{recipe_name}", lambda : self.get_recipe(recipe_name).get_settings())
+
+    def get_recipe_status(self, recipe_name : str) -> dataikuapi.dss.recipe.DSSRecipeStatus:
+        return self._values.get(f"recipe_status:{recipe_name}", lambda : self.get_recipe(recipe_name).get_status())
+
+    def get_recipe_engine(self, recipe_name : str) -> str:
+        """
+        Return the engine type selected for a recipe (Ex : DSS, SQL, SPARK, USER_CODE).
+        """
+        return self.get_recipe_status(recipe_name).data.get("selectedEngine",{}).get("type", "NOT_SELECTED")
+
+    def get_webapp_settings(self, webapp_id : str) -> dict:
+        return self._values.get(f"webapp_settings:{webapp_id}", lambda : self.project.get_webapp(webapp_id).get_settings().get_raw())
+
+    ############
+    # Prefetch #
+    ############
+
+    def prefetch(self, recipe_statuses : bool = False, recipe_settings_types : Iterable[str] = (), webapp_settings_types : Iterable[str] = ()) -> None:
+        """
+        Fetch the requested per object details concurrently, using the free slots of the run budget.
+        Failed fetches are not cached : the metric reading them gets the error when it runs.
+        """
+        recipe_settings_types = set(recipe_settings_types)
+        webapp_settings_types = set(webapp_settings_types)
+
+        fetches = []
+        if recipe_statuses or recipe_settings_types:
+            for recipe in self.list_recipes():
+                if recipe_statuses:
+                    fetches.append((self.get_recipe_status, recipe["name"]))
+                if recipe["type"] in recipe_settings_types:
+                    fetches.append((self.get_recipe_settings, recipe["name"]))
+        if webapp_settings_types:
+            for webapp in self.list_webapps():
+                if webapp.get("type") in webapp_settings_types:
+                    fetches.append((self.get_webapp_settings, webapp.get("id")))
+        if len(fetches) == 0:
+            return
+
+        logger.debug(f"Prefetching {len(fetches)} object details for project {self.project.project_key}")
+        def safe_fetch(fetch):
+            fn, object_id = fetch
+            try:
+                fn(object_id)
+            except Exception as error:
+                logger.debug(f"Failed to prefetch {fn.__name__} of {object_id} with error : {type(error).__name__}:{str(error)}")
+        self.budget.map_with_free_slots(safe_fetch, fetches)
+
+    def prefetch_for_metrics(self, metrics : list) -> None:
+        """
+        Prefetch the union of the per object details declared by the metrics (see ProjectMetric prefetch_* attributes).
+        """
+        recipe_statuses = any(metric.prefetch_recipe_statuses for metric in metrics)
+        recipe_settings_types : Set[str] = set()
+        webapp_settings_types : Set[str] = set()
+        for metric in metrics:
+            recipe_settings_types.update(metric.prefetch_recipe_settings_types)
+            webapp_settings_types.update(metric.prefetch_webapp_settings_types)
+        self.prefetch(recipe_statuses, recipe_settings_types, webapp_settings_types)
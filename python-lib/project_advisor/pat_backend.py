@@ -1,14 +1,36 @@
 import dataiku
-from typing import List, Union
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
 import logging
 import dataikuapi
 from datetime import datetime
-import io
 import os
+import time
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
 
 from project_advisor.pat_logging import logger
+from project_advisor.pat_cache import backend_table_cache
+from project_advisor.pat_concurrency import ConcurrencyBudget, SharedListings
+from project_advisor.pat_index import TableIndex
+from project_advisor.pat_storage import (ARCHIVE_FOLDER,
+                                         ARCHIVE_SNAPSHOT_COLUMN,
+                                         DELTA_MARKER,
+                                         RetentionPolicy,
+                                         TableFormat,
+                                         TableManifest,
+                                         ParquetTableFormat,
+                                         apply_table_delta,
+                                         archive_snapshot,
+                                         compute_table_delta,
+                                         get_table_format,
+                                         is_delta_file,
+                                         pyarrow_available,
+                                         read_table,
+                                         reconstruct_from_archive,
+                                         resolve_snapshot_chains,
+                                         snapshot_timestamp,
+                                         split_filename,
+                                         write_table)
 
 class PATBackendClient():
     """
@@ -27,12 +49,37 @@ class PATBackendClient():
         "scenarios" : None
     }
 
+    # Natural keys of the tables, used to store delta snapshots
+    table_keys = {
+        "project_dependencies" : ["source_project_key", "target_project_key", "type", "local_name"],
+        "project_deployments" : ["deployment_id"],
+        "plugins_usage" : ["plugin_id", "project_key", "object_type", "object_id", "element_type", "element_kind"],
+        "project_to_folder_path" : ["project_key"],
+        "projects" : ["projectKey"],
+        "users" : ["login"],
+        "user_to_project_mapping" : ["user_login", "project_key"],
+        "scenarios" : ["projectKey", "id"]
+    }
+
+    # Columns indexed when a table is loaded, other columns are indexed on their first lookup
+    index_columns = {
+        "project_dependencies" : ["source_project_key", "target_project_key"],
+        "project_deployments" : ["deployment_id", "active_bundle_source_project_key", "deployed_project_key"],
+        "plugins_usage" : ["project_key", "plugin_id"],
+        "project_to_folder_path" : ["project_key"],
+        "projects" : ["projectKey"],
+        "users" : ["login"],
+        "user_to_project_mapping" : ["user_login", "project_key"],
+        "scenarios" : ["projectKey"]
+    }
+
     backend_folder : dataiku.Folder = None
     
     def __init__(self, dss_client :dataikuapi.dssclient.DSSClient , 
                  run_config : dict, 
                  deployer_client : dataikuapi.dssclient.DSSClient = None,
-                 infra_to_client : dict = None):
+                 infra_to_client : dict = None,
+                 budget : ConcurrencyBudget = None):
         
         self.client = dss_client
         self.data_tables : List[str] = list(self.data.keys()) # Consider all the data
@@ -40,6 +87,22 @@ class PATBackendClient():
         self.deployer_client : dict = deployer_client
         self.infra_to_client : dict = infra_to_client
         self.backend_folder : dataiku.Folder = run_config.get("pat_backend_folder")
+        self.table_format : TableFormat = get_table_format(run_config.get("pat_backend_format"))
+        self.use_cache : bool = run_config.get("use_pat_backend_cache", True)
+        self.storage_mode : str = run_config.get("pat_backend_storage", "full") # full | delta
+        self.delta_base_interval : int = run_config.get("pat_backend_delta_base_interval", 7) # Max nbr of deltas between two full snapshots
+        self.max_delta_ratio : float = run_config.get("pat_backend_max_delta_ratio", 0.5) # Write a full snapshot if the delta is larger
+        self.build_state : Dict[str, dict] = {} # Builder specific state saved in the manifest (Ex : project versions)
+        self.budget : ConcurrencyBudget = budget or ConcurrencyBudget.from_run_config(run_config) # Shared by all the builders
+        self.listings : SharedListings = SharedListings()
+        self.indexes : Dict[Tuple[str, Tuple[str, ...]], TableIndex] = {}
+    
+    @property
+    def folder_key(self) -> str:
+        """
+        Identifier of the backend folder in the backend cache.
+        """
+        return getattr(self.backend_folder, "full_name", None) or str(id(self.backend_folder))
     
     def process_data_tables(self, data_tables : Union[list, str]) -> List[str]:
         if data_tables == "ALL":
@@ -56,12 +119,89 @@ class PATBackendClient():
         """
         return self.data.get(name)
     
-    def build(self, data_tables : Union[list, str] = "ALL"):
+    ###############
+    # Table Query #
+    ###############
+    
+    def get_index(self, table : str, columns : Union[str, List[str]]) -> TableIndex:
+        """
+        Return the index of a table on one or several columns, building it if the table changed since the last lookup.
+        Returns None if the table is not loaded.
+        """
+        df = self.data.get(table)
+        if df is None:
+            return None
+        columns = (columns,) if isinstance(columns, str) else tuple(columns)
+        index = self.indexes.get((table, columns))
+        if index is None or index.df is not df:
+            index = TableIndex(df, list(columns))
+            self.indexes[(table, columns)] = index
+        return index
+    
+    def index_table(self, table : str) -> None:
+        """
+        Build the indexes of the key columns of a table.
+        """
+        df = self.data.get(table)
+        if df is None:
+            return
+        for column in self.index_columns.get(table, []):
+            if column in df.columns:
+                self.get_index(table, column)
+    
+    def get_rows(self, table : str, **filters) -> pd.DataFrame:
+        """
+        Return the rows of a table matching all the filters (Ex : get_rows("plugins_usage", project_key = "MY_PROJECT")).
+        Returns None if the table is not loaded.
+        """
+        if not filters:
+            return self.data.get(table)
+        columns = sorted(filters.keys())
+        index = self.get_index(table, columns)
+        if index is None:
+            return None
+        key = filters[columns[0]] if len(columns) == 1 else tuple(filters[c] for c in columns)
+        return index.get_rows(key)
+    
+    def get_rows_in(self, table : str, column : Union[str, List[str]], values : Iterable) -> pd.DataFrame:
+        """
+        Return the rows of a table whose column value is in values (tuples of values for several columns), in a single pass over the keys.
+        Returns None if the table is not loaded.
+        """
+        index = self.get_index(table, column)
+        if index is None:
+            return None
+        return index.get_rows_in(values)
+    
+    def get_group(self, table : str, key : Union[str, List[str]]) -> Dict[Any, pd.DataFrame]:
+        """
+        Return the rows of a table grouped by the value of the key column(s).
+        Returns None if the table is not loaded.
+        """
+        index = self.get_index(table, key)
+        if index is None:
+            return None
+        return index.get_groups()
+    
+    def get_value(self, table : str, column : str, default : Any = None, **filters) -> Any:
+        """
+        Return the value of a column in the first row of a table matching the filters, or default if there is none.
+        """
+        rows = self.get_rows(table, **filters)
+        if rows is None or rows.empty or column not in rows.columns:
+            return default
+        return rows[column].iloc[0]
+    
+    def build(self, data_tables : Union[list, str] = "ALL", incremental : bool = False):
         """
         Build all of the tables in data_tables
+        incremental : Only re-fetch the projects that changed since the previous snapshot (for the tables that support it)
+        When running in parallel, the tables are built concurrently. All of the API calls of all the builders share 
+        one concurrency budget (nbr_parallel_runs) & the instance listings (projects, users, groups) are only fetched once.
         """
         data_tables = self.process_data_tables(data_tables)
         logger.info(f"Building the following PAT backend tables : {data_tables}")   
+        self.listings.clear() # Listings are shared within a build only
         build_methods = {
             "project_dependencies": self.build_project_dependencies,
             "project_deployments": self.build_project_deployments,
@@ -72,103 +212,413 @@ class PATBackendClient():
             "user_to_project_mapping": self.build_user_to_project_mapping,
             "scenarios": self.build_scenarios,
         }
+        incremental_tables = ["project_dependencies", "scenarios"]
 
-        for table in data_tables:
-            build_fn = build_methods.get(table)
-            if build_fn:
-                logger.info(f"Building PAT Backend Table : {table}")
-                try:
+        def build_table(table : str):
+            build_fn = build_methods[table]
+            logger.info(f"Building PAT Backend Table : {table}")
+            start_time = time.time()
+            try:
+                if table in incremental_tables:
+                    build_fn(incremental = incremental)
+                else:
                     build_fn()
-                except Exception as error:
-                    logger.warning(f"Failed to build PAT Backend Table : {table} with error : {type(error).__name__}:{str(error)}")
+                logger.info(f"Built PAT Backend Table : {table} in {round(time.time() - start_time, 2)}s")
+            except Exception as error:
+                logger.warning(f"Failed to build PAT Backend Table : {table} with error : {type(error).__name__}:{str(error)}")
+
+        tables_to_build = []
+        for table in data_tables:
+            if table in build_methods:
+                tables_to_build.append(table)
             else:
                 logger.warning(f"Table {table} does not exist. Please provide a table name that exists")
+
+        if self.budget.is_parallel and len(tables_to_build) > 1:
+            # Table threads only orchestrate, the API calls they make are bounded by the shared budget.
+            logger.info(f"Building {len(tables_to_build)} tables concurrently with {self.budget.max_workers} parallel API calls at a time")
+            with ThreadPoolExecutor(max_workers = len(tables_to_build)) as executor:
+                list(executor.map(build_table, tables_to_build))
+        else:
+            for table in tables_to_build:
+                build_table(table)
                 
     
     def save(self, dt = datetime.now(), data_tables : Union[list, str] = "ALL"):
         """
-        Save all of the tables in data_tables
+        Save all of the tables in data_tables and update the backend manifest.
+        In delta storage mode, tables are saved as the rows changed since their previous snapshot, 
+        with a full snapshot every delta_base_interval saves or when the delta is too large.
         """
         data_tables = self.process_data_tables(data_tables)  
         logger.info(f"Saving the following PAT backend tables : {data_tables}")
             
         dt_str = dt.isoformat().split(".")[0]
+        manifest = TableManifest.load(self.backend_folder)
+        if manifest is None:
+            manifest = self.build_manifest_from_listing()
+        
+        saved_tables = {}
         for table in data_tables:
             df = self.data.get(table)
             if df is not None:
                 logger.info(f"Saving Table : {table}")
-                self.write_dataframe_to_folder(table,dt_str, df)
+                saved_tables[table] = self.write_table_snapshot(table, dt_str, df, manifest)
             else:
                 logger.warning(f"Table {table} was not built properly. It cannot be saved")
+        
+        # The manifest is only written once all of the table files exist.
+        if saved_tables:
+            for table, (filename, chain) in saved_tables.items():
+                manifest.set_entry(table, 
+                                   file = filename, 
+                                   row_count = len(self.data.get(table)), 
+                                   build_time = dt_str, 
+                                   table_format = self.table_format.name,
+                                   build_state = self.build_state.get(table),
+                                   chain = chain)
+                if self.use_cache:
+                    backend_table_cache.put_table(self.folder_key, table, filename, self.data.get(table))
+            manifest.save(self.backend_folder)
+            backend_table_cache.invalidate_latest_files(self.folder_key)
+    
+    def write_table_snapshot(self, table : str, dt_str : str, df : pd.DataFrame, manifest : TableManifest) -> Tuple[str, List[str]]:
+        """
+        Write a full or a delta snapshot of a table.
+        Returns the written file name and the chain of files needed to reconstruct the table.
+        """
+        previous_chain = manifest.get_chain(table)
+        previous_entry = manifest.get_entry(table)
+        can_write_delta = (self.storage_mode == "delta"
+                           and table in self.table_keys
+                           and isinstance(self.table_format, ParquetTableFormat)
+                           and previous_chain is not None
+                           and previous_entry.get("format") == ParquetTableFormat.name
+                           and len(previous_chain) <= self.delta_base_interval)
+        if can_write_delta:
+            delta = None
+            try:
+                previous_df = self.read_table_chain(table, previous_chain)
+                delta = compute_table_delta(previous_df, df, self.table_keys[table])
+            except Exception as error:
+                logger.warning(f"Failed to compute the delta of table {table}, saving a full snapshot. Error : {type(error).__name__}:{str(error)}")
+            if delta is not None and len(delta) <= self.max_delta_ratio * len(df):
+                logger.info(f"Saving table {table} as a delta of {len(delta)} row(s)")
+                filename = self.write_dataframe_to_folder(table, dt_str + DELTA_MARKER, delta)
+                return filename, previous_chain + [filename]
+        
+        filename = self.write_dataframe_to_folder(table, dt_str, df)
+        return filename, [filename]
     
     def load_latest(self, data_tables : Union[list, str] = "ALL"):
         """
-        Load all off the tables in data_tables
+        Load all off the tables in data_tables.
+        The latest files are resolved with the backend manifest, the folder is only listed if the manifest is missing or corrupt.
+        Tables are served from the process wide backend cache when the same snapshot has already been loaded.
         """
         data_tables = self.process_data_tables(data_tables)
         logger.info(f"Loading the following PAT backend tables : {data_tables}")
         
+        if not self.use_cache:
+            backend_table_cache.invalidate_latest_files(self.folder_key)
+        latest_chains = backend_table_cache.get_latest_files(self.folder_key, self.resolve_latest_chains, version = TableManifest.get_version(self.backend_folder))
+        listed_chains = None
+        
+        for table in data_tables:
+            latest_chain = latest_chains.get(table)
+            if not latest_chain:
+                # Tables saved before the manifest existed are only found by listing the folder
+                if listed_chains is None:
+                    listed_chains = self.list_latest_chains()
+                latest_chain = listed_chains.get(table)
+            if not latest_chain:
+                logger.warning(f"There is no data to load for table : {table}")
+                continue
+            
+            logger.info(f"Loading the latest version of table : {table} with file name {latest_chain[-1]}")
+            try:
+                self.data[table] = self.read_table_chain(table, latest_chain)
+                self.index_table(table)
+            except Exception as error:
+                # The manifest can point to a file that was deleted, fall back to a listing of the folder
+                logger.warning(f"Failed to load table {table} from file {latest_chain[-1]}, falling back to a folder listing. Error : {type(error).__name__}:{str(error)}")
+                backend_table_cache.invalidate_latest_files(self.folder_key)
+                if listed_chains is None:
+                    listed_chains = self.list_latest_chains()
+                latest_chain = listed_chains.get(table)
+                if latest_chain:
+                    self.data[table] = self.read_table_chain(table, latest_chain)
+                    self.index_table(table)
+                else:
+                    logger.warning(f"There is no data to load for table : {table}")
+    
+    def load_as_of(self, as_of : Union[datetime, str], data_tables : Union[list, str] = "ALL"):
+        """
+        Load the tables in data_tables as they were at a point in time (Ex : the timestamp of a PAT report).
+        The latest snapshot at or before as_of is reconstructed from the folder or, for older points in time, from the archive.
+        """
+        data_tables = self.process_data_tables(data_tables)
+        as_of_str = pd.Timestamp(as_of).to_pydatetime().isoformat().split(".")[0]
+        logger.info(f"Loading the following PAT backend tables as of {as_of_str} : {data_tables}")
+        
+        all_files = self.list_snapshot_files()
+        for table in data_tables:
+            files = [f for f in all_files.get(table, []) if snapshot_timestamp(f) <= as_of_str]
+            chain = resolve_snapshot_chains(files)[max(files, key = snapshot_timestamp)] if files else []
+            try:
+                if chain and not is_delta_file(chain[0]):
+                    self.data[table] = self.read_table_chain(table, chain)
+                    self.index_table(table)
+                    continue
+                # The base snapshot was compacted into the archive
+                df = self.read_archive_as_of(table, as_of_str, [self.read_dataframe_from_folder(table, f) for f in chain])
+            except Exception as error:
+                logger.warning(f"Failed to load table {table} as of {as_of_str} with error : {type(error).__name__}:{str(error)}")
+                df = None
+            if df is None:
+                logger.warning(f"There is no data to load for table : {table} as of {as_of_str}")
+            self.data[table] = df
+            self.index_table(table)
+    
+    def read_table_chain(self, table : str, chain : List[str]) -> pd.DataFrame:
+        """
+        Reconstruct a table from a full snapshot & the delta snapshots that follow it, through the backend cache.
+        """
+        if is_delta_file(chain[0]):
+            raise ValueError(f"Cannot reconstruct table {table}, the full snapshot before {chain[0]} is missing")
+        if len(chain) == 1:
+            return self.read_table_snapshot(table, chain[0])
+        
+        def reconstruct() -> pd.DataFrame:
+            df = self.read_table_snapshot(table, chain[0])
+            for delta_file in chain[1:]:
+                df = apply_table_delta(df, self.read_dataframe_from_folder(table, delta_file), self.table_keys[table])
+            return df
+        
+        if not self.use_cache:
+            return reconstruct()
+        return backend_table_cache.get_table(self.folder_key, table, chain[-1], reconstruct)
+    
+    def read_table_snapshot(self, table : str, filename : str) -> pd.DataFrame:
+        """
+        Read a table snapshot through the backend cache.
+        """
+        if not self.use_cache:
+            return self.read_dataframe_from_folder(table, filename)
+        return backend_table_cache.get_table(self.folder_key, table, filename, 
+                                             lambda : self.read_dataframe_from_folder(table, filename))
+    
+    def resolve_latest_chains(self) -> dict:
+        """
+        Return the files of the latest snapshot of every table, from the manifest or from a listing of the folder if there is no valid manifest.
+        """
+        manifest = TableManifest.load(self.backend_folder)
+        if manifest is None:
+            return self.list_latest_chains()
+        latest_chains = {}
+        for table in manifest.tables.keys():
+            chain = manifest.get_chain(table)
+            if chain is not None:
+                latest_chains[table] = chain
+        return latest_chains
+    
+    def list_latest_chains(self) -> dict:
+        """
+        List the backend folder and return the files of the latest snapshot of every table.
+        """
+        all_files = self.list_snapshot_files()
+        latest_chains = {}
+        for topic in all_files.keys():
+            latest_file = max(all_files[topic], key = snapshot_timestamp)
+            latest_chains[topic] = resolve_snapshot_chains(all_files[topic])[latest_file]
+        return latest_chains
+    
+    def list_snapshot_files(self) -> Dict[str, List[str]]:
+        """
+        List the backend folder and return all the snapshot file names of every table.
+        """
         all_files = {}
         for full_path in self.backend_folder.list_paths_in_partition():
             path, file = os.path.split(full_path)
+            if path[1:] == "" or path.startswith(ARCHIVE_FOLDER):
+                continue # Files at the root of the folder (Ex: manifest) & archives are not table snapshots
             all_files.setdefault(path[1:], []).append(file)
+        return all_files
+    
+    def build_manifest_from_listing(self) -> TableManifest:
+        """
+        Rebuild a manifest from a folder listing (used when the manifest is missing or corrupt).
+        Row counts are unknown for tables that are not being saved.
+        """
+        logger.info("Rebuilding the PAT backend manifest from a folder listing")
+        manifest = TableManifest()
+        for table, chain in self.list_latest_chains().items():
+            filename = chain[-1]
+            manifest.set_entry(table, 
+                               file = filename, 
+                               row_count = None, 
+                               build_time = snapshot_timestamp(filename), 
+                               table_format = split_filename(filename)[1].lstrip("."),
+                               chain = chain)
+        return manifest
+            
+    ##########################
+    # Retention & Compaction #
+    ##########################
+    
+    def garbage_collect(self, retention_policy : RetentionPolicy = None, compact : bool = True, dry_run : bool = False) -> dict:
+        """
+        Delete the snapshots that are not kept by the retention policy.
+        compact : Merge the deleted snapshots into the columnar archive of their table before deleting them (requires pyarrow).
+        dry_run : Only compute what would be deleted.
+        The latest snapshot of every table (referenced by the manifest) is never deleted.
+        Returns a report with the number of deleted files, the archived snapshots & the bytes reclaimed.
+        """
+        retention_policy = retention_policy if retention_policy is not None else RetentionPolicy()
+        if compact and not pyarrow_available():
+            logger.warning("pyarrow is not installed, old PAT backend snapshots will be deleted without being archived")
+            compact = False
         
-        latest_files = {}
-        for topic in all_files.keys():
-            latest_files[topic] =  max(all_files[topic])
-        
-        for table in data_tables:
-            latest_file = latest_files.get(table)
-            if latest_file:
-                logger.info(f"Loading the latest version of table : {table} with file name {latest_file}")
-                self.data[table] = self.read_dataframe_from_folder(table,latest_file)
-            else:
-                logger.warning(f"There is no data to load for table : {table}")
-                
+        manifest = TableManifest.load(self.backend_folder)
+        report = {"deleted_files" : 0, "archived_snapshots" : 0, "bytes_reclaimed" : 0, "tables" : {}}
+        for table, files in self.list_snapshot_files().items():
+            chains = resolve_snapshot_chains(files)
+            latest_chain = manifest.get_chain(table) if manifest is not None else None
+            if latest_chain is None:
+                latest_chain = chains[max(files, key = snapshot_timestamp)]
+            
+            # Delta snapshots that are kept also need the snapshots they are built upon
+            kept_files = set(latest_chain)
+            kept_timestamps = set(retention_policy.select_snapshots_to_keep([snapshot_timestamp(f) for f in files]))
+            for f in files:
+                if snapshot_timestamp(f) in kept_timestamps:
+                    kept_files.update(chains[f])
+            files_to_delete = sorted([f for f in files if f not in kept_files], key = snapshot_timestamp)
+            if not files_to_delete:
+                continue
             
+            bytes_reclaimed = sum(self.get_file_size(f"{table}/{f}") for f in files_to_delete)
+            if not dry_run:
+                if compact:
+                    try:
+                        bytes_reclaimed -= self.compact_snapshots(table, files_to_delete)
+                    except Exception as error:
+                        # The snapshots are only deleted once their archive part is fully written
+                        logger.warning(f"Failed to archive {len(files_to_delete)} snapshot(s) of table {table}, keeping them. Error : {type(error).__name__}:{str(error)}")
+                        continue
+                for f in files_to_delete:
+                    self.backend_folder.delete_path(f"{table}/{f}")
+            
+            logger.info(f"{'[DRY RUN] ' if dry_run else ''}Table {table} : removing {len(files_to_delete)} snapshot(s), keeping {len(files) - len(files_to_delete)}")
+            report["tables"][table] = {"deleted_files" : len(files_to_delete), "kept_files" : len(files) - len(files_to_delete), "bytes_reclaimed" : bytes_reclaimed}
+            report["deleted_files"] += len(files_to_delete)
+            report["archived_snapshots"] += len(files_to_delete) if compact else 0
+            report["bytes_reclaimed"] += bytes_reclaimed
+        
+        if not dry_run:
+            backend_table_cache.invalidate_latest_files(self.folder_key)
+        return report
+    
+    def compact_snapshots(self, table : str, files : List[str]) -> int:
+        """
+        Write snapshots to a new part of the archive of a table, the existing parts are never read nor rewritten.
+        Every archived row is tagged with its snapshot id. Returns the size of the new part in bytes.
+        """
+        part_path = self.get_archive_part_path(table, datetime.now().isoformat()) # Unique per garbage collection
+        snapshot_dfs = []
+        for f in files:
+            snapshot_id = split_filename(f)[0] # Delta snapshots keep their delta marker
+            snapshot_dfs.append(archive_snapshot(snapshot_id, self.read_dataframe_from_folder(table, f)))
+        
+        write_table(self.backend_folder, part_path, pd.concat(snapshot_dfs, ignore_index = True), ParquetTableFormat())
+        return self.get_file_size(part_path)
+    
+    def list_archive_parts(self, table : str) -> List[str]:
+        """
+        List the archive parts of a table, oldest first. The single archive file of older versions comes first.
+        """
+        legacy_path = f"{ARCHIVE_FOLDER}/{table}{ParquetTableFormat.extension}"
+        parts_folder = f"{ARCHIVE_FOLDER}/{table}/"
+        paths = self.backend_folder.list_paths_in_partition()
+        parts = sorted(path for path in paths if path.startswith(parts_folder) and path.endswith(ParquetTableFormat.extension))
+        return ([legacy_path] if legacy_path in paths else []) + parts
+    
+    def read_archive(self, table : str) -> pd.DataFrame:
+        """
+        Read the archive parts of a table as a single table. Returns None if the table has no archive.
+        A snapshot archived in several parts (Ex : by an interrupted garbage collection) is only read from its first part,
+        unreadable parts (Ex : partially written) are skipped.
+        """
+        archive_dfs = []
+        archived_ids = set()
+        for part_path in self.list_archive_parts(table):
+            try:
+                part_df = read_table(self.backend_folder, part_path)
+            except Exception as error:
+                logger.warning(f"Failed to read archive part {part_path}, skipping it. Error : {type(error).__name__}:{str(error)}")
+                continue
+            part_df = part_df[~part_df[ARCHIVE_SNAPSHOT_COLUMN].isin(archived_ids)]
+            archived_ids.update(part_df[ARCHIVE_SNAPSHOT_COLUMN].unique())
+            archive_dfs.append(part_df)
+        if not archive_dfs:
+            logger.debug(f"No archive to read for table {table}")
+            return None
+        return pd.concat(archive_dfs, ignore_index = True)
+
+    def read_archive_as_of(self, table : str, as_of_str : str, deltas : List[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Reconstruct a table from its archive as of a point in time, then apply the given (not archived) deltas.
+        Returns None if the archive has no full snapshot at or before as_of.
+        """
+        return reconstruct_from_archive(self.read_archive(table), as_of_str, self.table_keys[table], deltas)
+
+    def get_archive_part_path(self, table : str, part_id : str) -> str:
+        return f"{ARCHIVE_FOLDER}/{table}/{part_id}{ParquetTableFormat.extension}"
+    
+    def get_file_size(self, path : str) -> int:
+        try:
+            return int(self.backend_folder.get_path_details(path).get("size") or 0)
+        except Exception:
+            return 0
+    
     ###########################
     # Saving Helper Functions #
     ###########################
     
     def write_dataframe_to_folder(self, path_in_folder: str, filename: str, df : pd.DataFrame):
         """
-        Writes a pandas DataFrame to a Dataiku folder as a CSV using the stream method.
+        Writes a pandas DataFrame to a Dataiku folder in the backend table format using the stream method.
 
         Parameters:
-        - folder: dataiku.Folder object where the file will be written
         - path_in_folder: Path inside the folder (can be empty string for root)
-        - filename: Name of the CSV file to create
+        - filename: Name of the file to create (without extension)
         - df: pandas DataFrame to write
+
+        Returns:
+        - The name of the written file
         """
         # Construct full path in folder
-        filename = filename +".csv"
+        filename = filename + self.table_format.extension
         full_path = f"{path_in_folder}/{filename}" if path_in_folder else filename
 
-        # Write DataFrame to a CSV string
-        buffer = io.StringIO()
-        df.to_csv(buffer, index=False)
-
-        with self.backend_folder.get_writer(full_path) as stream:
-            stream.write(buffer.getvalue().encode("utf-8"))
+        write_table(self.backend_folder, full_path, df, self.table_format)
+        return filename
     
     def read_dataframe_from_folder(self, path_in_folder: str, filename: str) -> pd.DataFrame:
         """
-        Reads a CSV file from a Dataiku folder using the stream method and returns a pandas DataFrame.
+        Reads a backend table file from a Dataiku folder using the stream method and returns a pandas DataFrame.
+        The format is resolved from the file extension so that older CSV snapshots can still be loaded.
 
         Parameters:
-        - folder: dataiku.Folder object to read from
         - path_in_folder: Path inside the folder (can be empty string for root)
-        - filename: Name of the CSV file to read
+        - filename: Name of the file to read (with extension)
 
         Returns:
-        - A pandas DataFrame containing the CSV contents
+        - A pandas DataFrame containing the file contents
         """
         # Construct full path in folder
         full_path = f"{path_in_folder}/{filename}" if path_in_folder else filename
-
-        # Read the file stream and load into DataFrame
-        with self.backend_folder.get_download_stream(full_path) as stream:
-            return pd.read_csv(stream)
+        return read_table(self.backend_folder, full_path)
 
     ##################################
     # Precompuation Helper Functions #
@@ -181,21 +631,127 @@ class PATBackendClient():
         except:
             return default_value
     
+    def list_projects(self) -> List[dict]:
+        """
+        Listing of the projects of the instance, shared by all the builders of a build (read only).
+        """
+        return self.listings.get("projects", lambda : self.budget.call(self.client.list_projects))
+    
+    def list_users(self) -> List[dict]:
+        """
+        Listing of the users of the instance, shared by all the builders of a build (read only).
+        """
+        return self.listings.get("users", lambda : self.budget.call(self.client.list_users))
+    
+    def list_groups(self) -> List[dict]:
+        """
+        Listing of the groups of the instance, shared by all the builders of a build (read only).
+        """
+        return self.listings.get("groups", lambda : self.budget.call(self.client.list_groups))
+    
+    def get_project_versions(self) -> Dict[str, str]:
+        """
+        Return a version identifier for every project of the instance.
+        The versionTag of a project is bumped on every modification of the project.
+        """
+        project_versions = {}
+        for p in self.list_projects():
+            version_tag = p.get("versionTag") or {}
+            project_versions[p["projectKey"]] = f"{version_tag.get('versionNumber')}:{version_tag.get('lastModifiedOn')}"
+        return project_versions
+    
+    def load_previous_build(self, table : str) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        """
+        Return the latest saved snapshot of a table with the project versions it was built from.
+        Returns (None, {}) if the snapshot cannot be used as the base of an incremental build.
+        """
+        manifest = TableManifest.load(self.backend_folder)
+        entry = manifest.get_entry(table) if manifest is not None else None
+        if entry is None:
+            return None, {}
+        previous_versions = (entry.get("build_state") or {}).get("project_versions")
+        if not previous_versions:
+            return None, {}
+        if entry.get("format") != ParquetTableFormat.name:
+            # Nested columns of CSV snapshots are read back as strings and cannot be merged with new rows
+            return None, {}
+        try:
+            return self.read_table_chain(table, manifest.get_chain(table)), previous_versions
+        except Exception as error:
+            logger.warning(f"Failed to load the previous snapshot of table {table}, running a full build. Error : {type(error).__name__}:{str(error)}")
+            return None, {}
+    
+    def plan_incremental_build(self, table : str, incremental : bool) -> Tuple[Dict[str, str], List[str], pd.DataFrame]:
+        """
+        Return the current project versions, the projects to (re)fetch and the previous snapshot of the table.
+        When the build is not incremental or there is no usable previous snapshot, all the projects are fetched.
+        """
+        project_versions = self.get_project_versions()
+        previous_df, previous_versions = self.load_previous_build(table) if incremental else (None, {})
+        if previous_df is None:
+            return project_versions, list(project_versions.keys()), None
+        
+        changed_project_keys = [p_key for p_key, version in project_versions.items() if previous_versions.get(p_key) != version]
+        logger.info(f"Incremental build of table {table} : {len(changed_project_keys)} changed project(s) out of {len(project_versions)}")
+        return project_versions, changed_project_keys, previous_df
+    
+    def merge_incremental_build(self, 
+                                table : str, 
+                                key_column : str, 
+                                project_versions : Dict[str, str], 
+                                fetched_project_keys : List[str],
+                                failed_project_keys : Set[str],
+                                previous_df : pd.DataFrame,
+                                rows : List[dict],
+                                related_key_columns : List[str] = None) -> pd.DataFrame:
+        """
+        Merge the rows of the fetched projects with the rows of the unchanged projects of the previous snapshot.
+        Rows of deleted projects are dropped, including the kept rows pointing to a deleted project (related_key_columns, Ex : the target of a dependency).
+        Projects that failed to be fetched keep their previous rows & are fetched again on the next build.
+        """
+        new_df = pd.DataFrame.from_dict(rows)
+        if previous_df is not None:
+            kept_project_keys = (set(project_versions.keys()) - set(fetched_project_keys)) | set(failed_project_keys)
+            if key_column in previous_df.columns:
+                kept_df = previous_df[previous_df[key_column].isin(kept_project_keys)]
+                for related_key_column in related_key_columns or []:
+                    if related_key_column in kept_df.columns:
+                        kept_df = kept_df[kept_df[related_key_column].isin(list(project_versions.keys()))]
+            else:
+                kept_df = previous_df.iloc[0:0]
+            new_df = pd.concat([kept_df, new_df], ignore_index = True)
+        
+        self.build_state[table] = {
+            "project_versions" : {p_key : version for p_key, version in project_versions.items() if p_key not in failed_project_keys}
+        }
+        return new_df
+    
     ##########################
     # Precomputation Methods #
     ##########################
     
-    def build_project_dependencies(self):
+    def build_project_dependencies(self, incremental : bool = False):
         """
         project_dependencies : Dict[str, set] = {} # ProjectKey to list of projects it is dependent on (that share an object with it)
+        incremental : Only re-fetch the projects that changed since the previous snapshot
         """
         try: 
             shared_objects = []
-            project_keys = self.client.list_project_keys()
+            failed_project_keys = set()
+            project_versions, project_keys, previous_df = self.plan_incremental_build("project_dependencies", incremental)
 
-            for source_project_key in project_keys:
-                project = self.client.get_project(source_project_key)
-                exposed_objects = project.get_settings().get_raw()["exposedObjects"]["objects"]
+            def fetch_exposed_objects(source_project_key : str):
+                try:
+                    project = self.client.get_project(source_project_key)
+                    return project.get_settings().get_raw()["exposedObjects"]["objects"]
+                except Exception as error:
+                    logger.warning(f"Failed to fetch exposed objects for project {source_project_key} with error : {type(error).__name__}:{str(error)}")
+                    return None
+
+            for source_project_key, exposed_objects in zip(project_keys, self.budget.map(fetch_exposed_objects, project_keys)):
+                if exposed_objects is None:
+                    failed_project_keys.add(source_project_key)
+                    continue
                 for exposed_object in exposed_objects:
                     for rule in exposed_object["rules"]:
                         shared_objects.append({
@@ -206,7 +762,14 @@ class PATBackendClient():
                             "local_name" : exposed_object.get("localName"),
                             "quick_sharing_enabled" : exposed_object.get("quickSharingEnabled"),
                         })
-            self.data["project_dependencies"] = pd.DataFrame.from_dict(shared_objects)
+            self.data["project_dependencies"] = self.merge_incremental_build("project_dependencies",
+                                                                             key_column = "source_project_key",
+                                                                             project_versions = project_versions,
+                                                                             fetched_project_keys = project_keys,
+                                                                             failed_project_keys = failed_project_keys,
+                                                                             previous_df = previous_df,
+                                                                             rows = shared_objects,
+                                                                             related_key_columns = ["target_project_key"])
         except Exception as e:
             logger.warning(f"Project inter-dependencies computation failed with error : {e}")
             self.data["project_dependencies"] = None
@@ -219,9 +782,9 @@ class PATBackendClient():
         logger.info("Running computation of project deployment mapping")
         deployment_project_mapping = []
         try:
-            deployments = self.deployer_client.get_projectdeployer().list_deployments()
-            for deployment in deployments:
-                deployment_info = deployment.get_status().get_light()
+            deployments = self.budget.call(self.deployer_client.get_projectdeployer().list_deployments)
+            all_deployment_info = self.budget.map(lambda deployment : deployment.get_status().get_light(), deployments)
+            for deployment_info in all_deployment_info:
 
                 # Build extra deployment insights
                 active_bundle_id = deployment_info["deploymentBasicInfo"]["bundleId"]
@@ -262,18 +825,8 @@ class PATBackendClient():
                 return (plugin_id, None)
 
         try: 
-            if self.run_config.get("run_pat_in_parallel", False):  
-                n_jobs = self.run_config.get("nbr_parallel_runs",1)
-                logger.info(f"Running {n_jobs} Plugin usage in parallel at a time")
-
-                with ThreadPoolExecutor(max_workers = n_jobs) as executor:
-                    all_plugin_usage = list(executor.map(plugin_usage_run, self.client.list_plugins())) 
-            else:
-                logger.info(f"Running Plugin usage one at a time")
-                all_plugin_usage = []
-                for plugin_dict in self.client.list_plugins():
-                    plugin_usage_run_result = plugin_usage_run(plugin_dict)
-                    all_plugin_usage.append(plugin_usage_run_result)
+            logger.info(f"Running {self.budget.max_workers} Plugin usage at a time")
+            all_plugin_usage = self.budget.map(plugin_usage_run, self.budget.call(self.client.list_plugins))
 
             project_plugin_usage = []
             for plugin_id, plugin_usages in all_plugin_usage:
@@ -316,7 +869,7 @@ class PATBackendClient():
         """
         List all of the projects on the instance with their metadata
         """
-        projects = self.client.list_projects()
+        projects = self.list_projects()
         projects_df = pd.DataFrame.from_dict(projects)
         self.data["projects"] = projects_df
     
@@ -324,13 +877,13 @@ class PATBackendClient():
         """
         List all of the users on the instance with their metadata
         """
-        users = self.client.list_users(as_objects = True)
-        users_data = []
-        for user in users:
+        def fetch_user(user_login : str) -> dict:
+            user = self.client.get_user(user_login)
             user_dict = {}
             user_dict.update(user.get_info().get_raw())
             user_dict.update(user.get_activity().get_raw())
-            users_data.append(user_dict)
+            return user_dict
+        users_data = self.budget.map(fetch_user, [user["login"] for user in self.list_users()])
         users_df = pd.DataFrame.from_dict(users_data)
         self.data["users"] = users_df
         
@@ -339,78 +892,136 @@ class PATBackendClient():
         """
         List all of the users on the instance with their metadata
         """
-        groups = self.client.list_groups()
+        groups = self.list_groups()
         groups_df = pd.DataFrame.from_dict(groups)
         self.data["groups"] = groups_df
     
     def build_user_to_project_mapping(self):
         """
         List all of the users to project relationships on the instance
+        A user is mapped to a project if they own it or have at least write access to it, directly or through one of their groups.
+        The mapping is built from indexes of the write grants (user -> projects & group -> projects) expanded through a group -> users index,
+        so the cost is O(grants + users x groups) instead of O(users x projects x permissions).
         """
-        client = self.client
-        users = client.list_users()
-        groups = client.list_groups()
-        projects = client.list_projects()
+        users = self.list_users()
 
-        # Enrich projects
-        for p in projects:
+        # Fetch project permissions (the project listing is shared with the other builders and is not modified)
+        def fetch_permissions(p : dict) -> list:
+            project = self.client.get_project(p["projectKey"])
+            return project.get_permissions()["permissions"]
+        projects = self.list_projects()
+        all_permissions = self.budget.map(fetch_permissions, projects)
+
+        # Index the owners & write grants
+        project_order = {}
+        owner_to_projects : Dict[str, Set[str]] = {}
+        user_to_granted_projects : Dict[str, Set[str]] = {}
+        group_to_granted_projects : Dict[str, Set[str]] = {}
+        for p, permissions in zip(projects, all_permissions):
             project_key = p["projectKey"]
-            project = self.client.get_project(project_key)
-            p.update({"permissions": project.get_permissions()["permissions"]})
+            project_order[project_key] = len(project_order)
+            owner_to_projects.setdefault(p.get("ownerLogin"), set()).add(project_key)
+            for permission in permissions:
+                # If permission at least write
+                if not (permission.get("admin") or permission.get("writeProjectContent")):
+                    continue
+                if permission.get("user") is not None:
+                    user_to_granted_projects.setdefault(permission["user"], set()).add(project_key)
+                if permission.get("group") is not None:
+                    group_to_granted_projects.setdefault(permission["group"], set()).add(project_key)
+
+        # Expand group grants through the group membership index
+        group_to_users : Dict[str, List[str]] = {}
+        for user in users:
+            for group in user.get("groups") or []:
+                group_to_users.setdefault(group, []).append(user["login"])
+        user_to_group_projects : Dict[str, Set[str]] = {}
+        for group, group_projects in group_to_granted_projects.items():
+            for user_login in group_to_users.get(group, []):
+                user_to_group_projects.setdefault(user_login, set()).update(group_projects)
 
         user_to_project_mapping = []
         for user in users:
             user_login = user["login"]
-            user_groups = user["groups"]
+            owned_projects = owner_to_projects.get(user_login, set())
+            shared_by_user = user_to_granted_projects.get(user_login, set())
+            shared_by_group = user_to_group_projects.get(user_login, set())
 
-            for p in projects:
-                project_key = p["projectKey"]
-                project_owner = p["ownerLogin"]
-
-                is_project_owner = False
-                is_shared_by_user = False
-                is_shared_by_group = False
-                if user_login == project_owner:
-                    is_project_owner = True
-                else:
-                    for permission in p["permissions"]:
-                        # If permission at least write
-                        if any([permission['admin'],
-                               permission['writeProjectContent']]):
-
-                            if permission.get("user") == user_login:
-                                is_shared_by_user = True
-
-                            if permission.get("group") in user_groups:
-                                is_shared_by_group = True
-
-                if any([is_project_owner,is_shared_by_user, is_shared_by_group]):
-                    user_to_project_mapping.append({
-                        "user_login" : user_login,
-                        "project_key" : project_key,
-                        "is_project_owner" : is_project_owner,
-                        "is_shared_by_user" : is_shared_by_user,
-                        "is_shared_by_group" : is_shared_by_group
-                    })
+            for project_key in sorted(owned_projects | shared_by_user | shared_by_group, key = project_order.get):
+                is_project_owner = project_key in owned_projects
+                user_to_project_mapping.append({
+                    "user_login" : user_login,
+                    "project_key" : project_key,
+                    "is_project_owner" : is_project_owner,
+                    "is_shared_by_user" : (not is_project_owner) and project_key in shared_by_user,
+                    "is_shared_by_group" : (not is_project_owner) and project_key in shared_by_group
+                })
         # Write recipe outputs
         user_to_project_df = pd.DataFrame.from_dict(user_to_project_mapping)
         self.data["user_to_project_mapping"] = user_to_project_df
         
-    def build_scenarios(self):
+    def build_scenarios(self, incremental : bool = False):
         """
         List all the scenarios throughout the whole instance.
+        incremental : Only re-fetch the projects that changed since the previous snapshot.
+        Scenario runs do not change the version of a project, so the last runs of the active scenarios 
+        of unchanged projects are refreshed unless refresh_scenario_last_runs is disabled in the run config.
         """
         scenarios = []
-        for p_key in self.client.list_project_keys():
+        failed_project_keys = set()
+        project_versions, project_keys, previous_df = self.plan_incremental_build("scenarios", incremental)
+        def fetch_project_scenarios(p_key : str):
             try:
                 p = self.client.get_project(p_key)
+                p_scenarios = []
                 for s in p.list_scenarios(as_type = "objects"):
                     s_data = s.get_settings().data
                     s_data.update({"last_runs" : [run.get_info() for run in s.get_last_runs()]})
-                    scenarios.append(s_data)
+                    p_scenarios.append(s_data)
+                return p_scenarios
             except Exception as error:
-                self.checks = []
                 logger.warning(f"Failed to fetch scenarios for project {p_key} with error : {type(error).__name__}:{str(error)}")
+                return None
+
+        for p_key, p_scenarios in zip(project_keys, self.budget.map(fetch_project_scenarios, project_keys)):
+            if p_scenarios is None:
+                failed_project_keys.add(p_key)
+            else:
+                scenarios.extend(p_scenarios)
+        
+        scenarios_df = self.merge_incremental_build("scenarios",
+                                                    key_column = "projectKey",
+                                                    project_versions = project_versions,
+                                                    fetched_project_keys = project_keys,
+                                                    failed_project_keys = failed_project_keys,
+                                                    previous_df = previous_df,
+                                                    rows = scenarios)
+        if previous_df is not None and self.run_config.get("refresh_scenario_last_runs", True):
+            scenarios_df = self.refresh_scenario_last_runs(scenarios_df, skip_project_keys = set(project_keys) - failed_project_keys)
+        self.data["scenarios"] = scenarios_df
+    
+    def refresh_scenario_last_runs(self, scenarios_df : pd.DataFrame, skip_project_keys : Set[str]) -> pd.DataFrame:
+        """
+        Refresh the last runs of the active scenarios copied over from a previous snapshot.
+        """
+        if scenarios_df.empty or "active" not in scenarios_df.columns:
+            return scenarios_df
+        scenarios_df = scenarios_df.copy() # Previous snapshots can be shared through the backend cache
+        last_runs = list(scenarios_df["last_runs"]) if "last_runs" in scenarios_df.columns else [None] * len(scenarios_df)
+        to_refresh = [(i, p_key, scenario_id) 
+                      for i, (p_key, scenario_id, active) in enumerate(zip(scenarios_df["projectKey"], scenarios_df["id"], scenarios_df["active"]))
+                      if p_key not in skip_project_keys and active == True]
+        
+        def fetch_last_runs(item : tuple):
+            i, p_key, scenario_id = item
+            try:
+                scenario = self.client.get_project(p_key).get_scenario(scenario_id)
+                return [run.get_info() for run in scenario.get_last_runs()]
+            except Exception as error:
+                logger.warning(f"Failed to refresh the last runs of scenario {p_key}.{scenario_id} with error : {type(error).__name__}:{str(error)}")
+                return last_runs[i]
         
-        scenarios_df = pd.DataFrame.from_dict(scenarios)
-        self.data["scenarios"] = scenarios_df
\ No newline at end of file
+        for (i, _, _), scenario_last_runs in zip(to_refresh, self.budget.map(fetch_last_runs, to_refresh)):
+            last_runs[i] = scenario_last_runs
+        scenarios_df["last_runs"] = last_runs
+        return scenarios_df
\ No newline at end of file
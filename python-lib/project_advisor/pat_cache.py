@@ -0,0 +1,230 @@
+# PAT Backend table cache
+
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from project_advisor.pat_logging import logger
+from project_advisor.pat_storage import ParquetTableFormat, pyarrow_available
+
+
+class BackendTableCache():
+    """
+    Process wide read-through cache of PAT backend tables.
+    - Tables are keyed by (folder, table, snapshot id). A new snapshot gets a new key, so entries never need to be invalidated.
+    - The resolution of the latest snapshot ids of a folder is cached until the version of the folder manifest changes
+      (modification time & size, a cheap metadata call). Without a version, it is cached for a short time (ttl).
+    - The memory cache is bounded both in number of tables (LRU) and in bytes.
+    - Tables are spilled to a private local disk folder (per user, mode 0700) so that other processes of the same user can reuse them.
+      The spill is disabled if the folder is not owned by the current user or is accessible to other users.
+
+    Note : Cached DataFrames are shared between all the callers and must be treated as read only.
+    """
+
+    def __init__(self,
+                 max_entries : int = 32,
+                 max_bytes : int = 512 * 1024 * 1024,
+                 latest_files_ttl : float = 60,
+                 spill_dir : str = None,
+                 max_spill_bytes : int = 2 * 1024 * 1024 * 1024
+                ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.latest_files_ttl = latest_files_ttl
+        self.spill_dir = spill_dir if spill_dir is not None else os.path.join(tempfile.gettempdir(), f"pat_backend_cache_{get_user_id()}")
+        self.max_spill_bytes = max_spill_bytes
+
+        self._tables : "OrderedDict[Tuple[str, str, str], Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._latest_files : Dict[str, Tuple[float, Any, Dict[str, str]]] = {} # folder -> resolution time, manifest version, latest files
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._spill_dir_checked : Optional[bool] = None
+        self.stats = {"hits" : 0, "disk_hits" : 0, "misses" : 0, "evictions" : 0}
+
+    #######################
+    # Snapshot resolution #
+    #######################
+
+    def get_latest_files(self, folder_key : str, resolver : Callable[[], Dict[str, str]], version : Any = None) -> Dict[str, str]:
+        """
+        Return the table to latest file mapping of a folder, calling the resolver only if the folder manifest changed since
+        the cached resolution (version), or if the cached value is older than the ttl when the version is unknown (None).
+        """
+        with self._lock:
+            cached = self._latest_files.get(folder_key)
+            if cached is not None:
+                resolved_at, cached_version, latest_files = cached
+                if version is not None and version == cached_version:
+                    return latest_files
+                if version is None and time.time() - resolved_at < self.latest_files_ttl:
+                    return latest_files
+        latest_files = resolver()
+        with self._lock:
+            self._latest_files[folder_key] = (time.time(), version, latest_files)
+        return latest_files
+
+    def invalidate_latest_files(self, folder_key : str = None) -> None:
+        """
+        Force the next load to resolve the latest snapshots again (Ex : after a save).
+        """
+        with self._lock:
+            if folder_key is None:
+                self._latest_files.clear()
+            else:
+                self._latest_files.pop(folder_key, None)
+
+    ##########
+    # Tables #
+    ##########
+
+    def get_table(self, folder_key : str, table : str, snapshot_id : str, loader : Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return a table snapshot from memory, from the local disk spill or by calling the loader.
+        """
+        key = (folder_key, table, snapshot_id)
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._tables[key][0]
+
+        df = self._read_spill(key)
+        if df is not None:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            self._put_in_memory(key, df)
+            return df
+
+        with self._lock:
+            self.stats["misses"] += 1
+        df = loader()
+        self.put_table(folder_key, table, snapshot_id, df)
+        return df
+
+    def put_table(self, folder_key : str, table : str, snapshot_id : str, df : pd.DataFrame) -> None:
+        """
+        Add a table snapshot to the cache (Ex : write-through after a save).
+        """
+        if df is None:
+            return
+        key = (folder_key, table, snapshot_id)
+        self._put_in_memory(key, df)
+        self._write_spill(key, df)
+
+    def clear(self) -> None:
+        """
+        Empty the memory cache. The disk spill is kept.
+        """
+        with self._lock:
+            self._tables.clear()
+            self._latest_files.clear()
+            self._bytes = 0
+
+    def _put_in_memory(self, key : Tuple[str, str, str], df : pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep = True).sum())
+        if size > self.max_bytes:
+            logger.debug(f"Table {key[1]} is too large ({size} bytes) to be cached in memory")
+            return
+        with self._lock:
+            if key in self._tables:
+                self._bytes -= self._tables.pop(key)[1]
+            self._tables[key] = (df, size)
+            self._bytes += size
+            while len(self._tables) > self.max_entries or self._bytes > self.max_bytes:
+                evicted_key, (_, evicted_size) = self._tables.popitem(last = False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+                logger.debug(f"Evicted table {evicted_key[1]} snapshot {evicted_key[2]} from the PAT backend cache")
+
+    ##############
+    # Disk spill #
+    ##############
+
+    def _check_spill_dir(self) -> bool:
+        """
+        Create the spill folder as private to the current user (0700), and check that it is owned by the current user 
+        and not accessible to other users. Otherwise (Ex : planted by another user), the spill is disabled.
+        """
+        if self._spill_dir_checked is not None:
+            return self._spill_dir_checked
+        try:
+            os.makedirs(self.spill_dir, mode = 0o700, exist_ok = True)
+            stat = os.lstat(self.spill_dir)
+            is_private = (os.path.isdir(self.spill_dir) 
+                          and not os.path.islink(self.spill_dir)
+                          and (not hasattr(os, "getuid") or stat.st_uid == os.getuid())
+                          and stat.st_mode & 0o077 == 0)
+        except OSError as error:
+            logger.warning(f"Failed to create the PAT backend cache folder {self.spill_dir}, error : {type(error).__name__}:{str(error)}")
+            is_private = False
+        if not is_private:
+            logger.warning(f"PAT backend cache folder {self.spill_dir} is not private to the current user, tables will not be spilled to disk")
+        self._spill_dir_checked = is_private
+        return is_private
+
+    def _spill_path(self, key : Tuple[str, str, str]) -> str:
+        digest = hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, digest + ParquetTableFormat.extension)
+
+    def _read_spill(self, key : Tuple[str, str, str]) -> pd.DataFrame:
+        if not pyarrow_available() or not self._check_spill_dir():
+            return None
+        path = self._spill_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as stream:
+                return ParquetTableFormat().read(stream)
+        except Exception as error:
+            logger.debug(f"Failed to read spilled table {key[1]}, error : {type(error).__name__}:{str(error)}")
+            return None
+
+    def _write_spill(self, key : Tuple[str, str, str], df : pd.DataFrame) -> None:
+        if not pyarrow_available() or not self._check_spill_dir():
+            return
+        path = self._spill_path(key)
+        try:
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as stream:
+                ParquetTableFormat().write(df, stream)
+            os.replace(tmp_path, path) # Atomic, readers never see partial files
+            self._prune_spill()
+        except Exception as error:
+            logger.debug(f"Failed to spill table {key[1]} to disk, error : {type(error).__name__}:{str(error)}")
+
+    def _prune_spill(self) -> None:
+        """
+        Delete the least recently written spill files above max_spill_bytes.
+        """
+        files = []
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            if name.endswith(ParquetTableFormat.extension):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def get_user_id() -> str:
+    """
+    Id of the unix user running the process, to keep the disk spill of each user separate.
+    """
+    return str(os.getuid()) if hasattr(os, "getuid") else os.environ.get("USERNAME", "default")
+
+
+# Init cache shared by all the PAT backend clients of the process
+backend_table_cache = BackendTableCache()
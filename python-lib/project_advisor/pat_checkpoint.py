@@ -0,0 +1,162 @@
+# PAT run checkpoints
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Set
+
+import dataiku
+import pandas as pd
+
+from project_advisor.pat_logging import logger
+from project_advisor.pat_storage import TableFormat, read_table_chunks, write_table
+
+
+class RunCheckpoint():
+    """
+    Checkpoint of a batch run, saved in the report folder as the projects complete :
+    - <root>/<run_id>/manifest.json : status of the run, written when the run starts & when it completes.
+    - <root>/<run_id>/<metrics|checks>/<project_key>.<ext> : one shard of report rows per completed project.
+    - <root>/<run_id>/done/<project_key>.json : one small marker per completed project, written once its shards are.
+    A run interrupted before its report is saved can be resumed from its run_id, skipping the completed projects (listed from the markers).
+    Shards & markers are written by a background writer so that the caller (Ex : the Project Standards poll loop) is not blocked,
+    up to max_pending writes.
+    """
+
+    root = "/_runs"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+
+    def __init__(self, folder : dataiku.Folder, run_id : str, table_format : TableFormat, max_pending : int = 16):
+        self.folder = folder
+        self.run_id = run_id
+        self.table_format = table_format
+        self.manifest : dict = {
+            "run_id" : run_id,
+            "status" : self.RUNNING,
+            "started_on" : datetime.now().isoformat()
+        }
+        self.completed_projects : Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._manifest_saved = False
+        self._writer : Optional[ThreadPoolExecutor] = None
+        self._pending : Set[Future] = set()
+        self._pending_slots = threading.BoundedSemaphore(max_pending)
+
+    @classmethod
+    def resume(cls, folder : dataiku.Folder, run_id : str, table_format : TableFormat) -> "RunCheckpoint":
+        """
+        Load the checkpoint of a previous run. Raise if the run has already completed.
+        """
+        checkpoint = cls(folder, run_id, table_format)
+        try:
+            manifest = folder.read_json(checkpoint.manifest_path)
+        except Exception as error:
+            logger.warning(f"No checkpoint found for run {run_id}, starting it from scratch : {type(error).__name__}:{str(error)}")
+            return checkpoint
+        if manifest.get("status") == cls.DONE:
+            raise Exception(f"Run {run_id} has already completed, its report has been saved")
+        checkpoint.completed_projects = {**manifest.pop("completed_projects", {}), **checkpoint.read_markers()} # Manifests of older versions listed the projects
+        checkpoint.manifest = manifest
+        checkpoint._manifest_saved = True
+        logger.info(f"Resuming run {run_id} : {len(checkpoint.completed_project_keys)} projects already completed")
+        return checkpoint
+
+    @property
+    def path(self) -> str:
+        return f"{self.root}/{self.run_id}"
+
+    @property
+    def manifest_path(self) -> str:
+        return f"{self.path}/manifest.json"
+
+    @property
+    def markers_path(self) -> str:
+        return f"{self.path}/done"
+
+    @property
+    def completed_project_keys(self) -> Set[str]:
+        return set(self.completed_projects.keys())
+
+    def save_manifest(self) -> None:
+        self.folder.write_json(self.manifest_path, self.manifest)
+
+    def read_markers(self) -> Dict[str, dict]:
+        """
+        Rebuild the completed projects from their markers.
+        """
+        completed_projects = {}
+        for path in self.folder.list_paths_in_partition():
+            if path.startswith(f"{self.markers_path}/") and path.endswith(".json"):
+                try:
+                    marker = self.folder.read_json(path)
+                    completed_projects[marker["project_key"]] = marker
+                except Exception as error:
+                    logger.warning(f"Ignoring unreadable checkpoint marker {path} : {type(error).__name__}:{str(error)}")
+        return completed_projects
+
+    def save_project(self, project_key : str, metrics_df : pd.DataFrame, checks_df : pd.DataFrame, max_severity : int) -> Future:
+        """
+        Save the report rows of a completed project in the background, then record it with its marker.
+        Returns the future of the write, blocks only if max_pending writes are already pending.
+        """
+        self._pending_slots.acquire()
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "pat-checkpoint")
+            future = self._writer.submit(self._write_project, project_key, metrics_df, checks_df, max_severity)
+            self._pending.add(future)
+        future.add_done_callback(self._on_write_done)
+        return future
+
+    def _write_project(self, project_key : str, metrics_df : pd.DataFrame, checks_df : pd.DataFrame, max_severity : int) -> None:
+        if not self._manifest_saved:
+            self.save_manifest()
+            self._manifest_saved = True
+        marker = {"project_key" : project_key, "nbr_checks" : len(checks_df), "max_severity" : max_severity}
+        for kind, df in [("metrics", metrics_df), ("checks", checks_df)]:
+            marker[kind] = f"{self.path}/{kind}/{project_key}{self.table_format.extension}"
+            write_table(self.folder, marker[kind], df, self.table_format)
+        self.folder.write_json(f"{self.markers_path}/{project_key}.json", marker)
+        with self._lock:
+            self.completed_projects[project_key] = marker
+
+    def _on_write_done(self, future : Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+        self._pending_slots.release()
+
+    def flush(self) -> None:
+        """
+        Wait for the pending writes (Ex : before reading the shards).
+        """
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def read_shards(self, kind : str) -> Iterator[pd.DataFrame]:
+        """
+        Read the metrics or checks shards of all the completed projects, one chunk at a time.
+        """
+        self.flush()
+        for project_key, entry in list(self.completed_projects.items()):
+            yield from read_table_chunks(self.folder, entry[kind])
+
+    def complete(self) -> None:
+        """
+        Mark the run as done once its report is saved & remove the shards & markers.
+        """
+        self.flush()
+        with self._lock:
+            if self._writer is not None:
+                self._writer.shutdown(wait = True)
+                self._writer = None
+            self.manifest["status"] = self.DONE
+            self.manifest["completed_on"] = datetime.now().isoformat()
+            self.manifest["nbr_completed_projects"] = len(self.completed_projects)
+            self.save_manifest()
+        for kind in ["metrics", "checks", "done"]:
+            try:
+                self.folder.delete_path(f"{self.path}/{kind}")
+            except Exception as error:
+                logger.warning(f"Failed to remove the {kind} files of run {self.run_id} : {type(error).__name__}:{str(error)}")
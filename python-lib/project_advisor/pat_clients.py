@@ -0,0 +1,154 @@
+# PAT API client factory
+
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import dataiku
+import dataikuapi
+import requests
+from urllib3.util.retry import Retry
+
+from project_advisor.pat_concurrency import ConcurrencyBudget
+from project_advisor.pat_logging import logger
+from project_advisor.pat_profiling import api_profiler
+
+
+class PooledAdapter(requests.adapters.HTTPAdapter):
+    """
+    Keep-alive connection pool of a host, with the retries & the default timeout of the factory.
+    Every call is recorded in the API profile of the process.
+    """
+
+    def __init__(self, timeout : Tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        start_time = time.time()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException:
+            api_profiler.record(request.method, request.url, time.time() - start_time, bytes_sent = self.get_body_size(request), error = True)
+            raise
+        # Non streamed bodies are read here rather than by the session, to time & measure the whole transfer
+        bytes_received = int(response.headers.get("Content-Length", 0) or 0) if kwargs.get("stream") else len(response.content)
+        api_profiler.record(request.method, request.url, time.time() - start_time,
+                            bytes_sent = self.get_body_size(request),
+                            bytes_received = bytes_received,
+                            error = response.status_code == 429 or response.status_code >= 500)
+        return response
+
+    def get_body_size(self, request) -> int:
+        body = request.body
+        if isinstance(body, (bytes, str)):
+            return len(body)
+        return int(request.headers.get("Content-Length", 0) or 0) # Streamed uploads
+
+
+class ClientFactory():
+    """
+    Process wide factory of the dataikuapi clients used by PAT (advisors, backend, webapp, check specs).
+    - All the clients of a host share one keep-alive connection pool, sized to the concurrency of the run,
+      so that parallel runs do not queue on (or discard connections of) the default pools of 10 connections.
+    - Retries (idempotent calls on connection errors, 502, 503 & 504) and timeouts are configured in one place.
+    - Authentication stays on each client session : only the connection pools are shared.
+    """
+
+    def __init__(self,
+                 pool_size : int = 10,
+                 retries : int = 3,
+                 backoff_factor : float = 0.5,
+                 connect_timeout : float = 10,
+                 read_timeout : float = 300
+                ):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._adapters : Dict[str, PooledAdapter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, run_config : dict) -> None:
+        """
+        Size the pools to the concurrency of the run (run config or plugin config) & apply the api_retries & api_timeout parameters.
+        The pools already handed out are resized, the retries & timeout apply to the hosts pooled from now on.
+        """
+        budget = ConcurrencyBudget.from_run_config(run_config)
+        pool_size = max(10, budget.max_workers + int(run_config.get("nbr_parallel_ps_runs", None) or 0) + 2)
+        retries = run_config.get("api_retries", None)
+        read_timeout = run_config.get("api_timeout", None)
+        with self._lock:
+            if pool_size > self.pool_size:
+                self.pool_size = pool_size
+                for adapter in self._adapters.values():
+                    adapter.init_poolmanager(1, self.pool_size)
+            if retries is not None:
+                self.retries = int(retries)
+            if read_timeout:
+                self.read_timeout = float(read_timeout)
+        logger.debug(f"API clients : {self.pool_size} pooled connections per host, {self.retries} retries, {self.read_timeout}s read timeout")
+
+    def get_adapter(self, host : str) -> PooledAdapter:
+        """
+        Return the connection pool shared by all the clients of a host.
+        """
+        url = urlparse(host)
+        key = f"{url.scheme}://{url.netloc}"
+        with self._lock:
+            if key not in self._adapters:
+                retry = Retry(total = self.retries,
+                              read = 0, # Requests that reached DSS are not replayed, except on the statuses below
+                              backoff_factor = self.backoff_factor,
+                              status_forcelist = [502, 503, 504],
+                              allowed_methods = frozenset(["GET", "HEAD", "OPTIONS"]),
+                              raise_on_status = False)
+                self._adapters[key] = PooledAdapter(timeout = (self.connect_timeout, self.read_timeout),
+                                                    pool_connections = 1,
+                                                    pool_maxsize = self.pool_size,
+                                                    max_retries = retry)
+            return self._adapters[key]
+
+    def pool(self, client, verify_ssl_certificate : bool = True):
+        """
+        Mount the shared connection pool of its host on a client (DSSClient, FMClient...) & return it.
+        """
+        session = getattr(client, "_session", None)
+        host = getattr(client, "host", None)
+        if session is None or not host:
+            return client
+        url = urlparse(host)
+        session.mount(f"{url.scheme}://{url.netloc}", self.get_adapter(host))
+        if not verify_ssl_certificate:
+            session.verify = False
+        return client
+
+    ###########
+    # Clients #
+    ###########
+
+    def api_client(self) -> dataikuapi.dssclient.DSSClient:
+        """
+        Client of the local DSS instance with the identity of the current run (Ex : the macro user).
+        """
+        return self.pool(dataiku.api_client())
+
+    def dss_client(self, host : str, api_key : str, verify_ssl_certificate : bool = True) -> dataikuapi.dssclient.DSSClient:
+        """
+        Client of a DSS node (design, deployer, automation) authenticated with an API key.
+        """
+        return self.pool(dataikuapi.DSSClient(host = host, api_key = api_key), verify_ssl_certificate)
+
+    def fm_client(self, fm_client_class : type, host : str, api_key_id : str, api_key_secret : str, verify_ssl_certificate : bool = True) -> dataikuapi.fmclient.FMClient:
+        """
+        Cloud Stacks Fleet Manager client (FMClientAWS, FMClientAzure or FMClientGCP).
+        """
+        return self.pool(fm_client_class(host, api_key_id, api_key_secret), verify_ssl_certificate)
+
+
+# Init factory shared by all the PAT components of the process
+client_factory = ClientFactory()
@@ -0,0 +1,466 @@
+# PAT Concurrency helpers
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum, auto
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from project_advisor.pat_logging import logger
+
+
+class ConcurrencyBudget():
+    """
+    Bound on the number of concurrent API calls shared by several workloads.
+    Each unit of work holds a slot of the budget while it runs, whatever the thread pool it is running in,
+    so nested or concurrent maps never exceed max_workers in-flight calls overall.
+    """
+
+    def __init__(self, max_workers : int = 1):
+        self.max_workers = max(1, int(max_workers or 1))
+        self._semaphore = threading.BoundedSemaphore(self.max_workers)
+
+    @classmethod
+    def from_run_config(cls, run_config : dict) -> "ConcurrencyBudget":
+        """
+        Build a budget from the run_pat_in_parallel & nbr_parallel_runs run config parameters.
+        With adaptive concurrency, the budget is sized to max_parallel_api_calls & the AdaptiveLimiter decides how many calls run at a time.
+        """
+        if run_config.get("run_pat_in_parallel", False):
+            if run_config.get("adaptive_concurrency", False):
+                return cls(AdaptiveLimiter.get_max_limit(run_config))
+            return cls(run_config.get("nbr_parallel_runs", 1))
+        return cls(1)
+
+    @property
+    def is_parallel(self) -> bool:
+        return self.max_workers > 1
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one slot of the budget.
+        """
+        self._semaphore.acquire()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    def call(self, fn : Callable, *args, **kwargs) -> Any:
+        """
+        Run fn while holding a slot of the budget.
+        """
+        with self.slot():
+            return fn(*args, **kwargs)
+
+    def map(self, fn : Callable, items : Iterable) -> List[Any]:
+        """
+        Apply fn to all the items, each call holding a slot of the budget. Results are returned in the order of the items.
+        Errors are raised to the caller, fn is expected to catch the errors of the items that can fail independently.
+        Calls run within a copy of the caller's context (Ex : the API profiling scope).
+        """
+        items = list(items)
+        if not self.is_parallel or len(items) <= 1:
+            return [self.call(fn, item) for item in items]
+        contexts = [contextvars.copy_context() for _ in items]
+        with ThreadPoolExecutor(max_workers = min(self.max_workers, len(items))) as executor:
+            return list(executor.map(lambda item, context : context.run(self.call, fn, item), items, contexts))
+
+    def map_with_free_slots(self, fn : Callable, items : Iterable) -> List[Any]:
+        """
+        Apply fn to all the items on the calling thread, helped by one thread per slot of the budget free right now.
+        Never waits for a slot, so it can be used by work already holding a slot (Ex : an asyncio orchestrated project run).
+        Results are returned in the order of the items. The first error is raised to the caller once all the items are processed.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        errors = []
+        next_items = iter(enumerate(items))
+        lock = threading.Lock()
+
+        def work():
+            while True:
+                with lock:
+                    next_item = next(next_items, None)
+                if next_item is None:
+                    return
+                i, item = next_item
+                try:
+                    results[i] = fn(item)
+                except Exception as error:
+                    errors.append(error)
+
+        def work_and_release():
+            try:
+                work()
+            finally:
+                self._semaphore.release()
+
+        helpers = []
+        for _ in range(min(self.max_workers, len(items)) - 1):
+            if not self._semaphore.acquire(blocking = False):
+                break
+            helper = threading.Thread(target = contextvars.copy_context().run, args = (work_and_release,), daemon = True)
+            helper.start()
+            helpers.append(helper)
+        work()
+        for helper in helpers:
+            helper.join()
+        if errors:
+            raise errors[0]
+        return results
+
+
+class SharedListings():
+    """
+    Listings (Ex : list_projects, list_users) fetched at most once and shared by concurrent consumers.
+    Consumers asking for a listing that is being fetched wait for the first fetch instead of calling the API again.
+    Shared values must be treated as read only.
+    """
+
+    def __init__(self):
+        self._values : Dict[str, Any] = {}
+        self._locks : Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name : str, fetch : Callable[[], Any]) -> Any:
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._values:
+                logger.debug(f"Fetching shared listing : {name}")
+                self._values[name] = fetch()
+            return self._values[name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._locks.clear()
+
+
+class AdaptiveLimiter():
+    """
+    AIMD limit on the number of concurrent DSS API calls, adjusted from their observed latency & errors.
+    Every window_size calls :
+    - If the error rate (5xx, 429, timeouts, connection errors) exceeds max_error_rate or the median latency exceeds
+      latency_tolerance times the baseline latency, the limit is multiplied by backoff_ratio.
+    - Else if the limit was reached during the window, the limit is increased by one.
+    The baseline is the lowest healthy median latency, slowly drifting toward the recent ones.
+    Each change of the limit is logged & kept in decisions.
+    """
+
+    def __init__(self,
+                 initial_limit : int,
+                 min_limit : int = 1,
+                 max_limit : int = None,
+                 window_size : int = 20,
+                 max_error_rate : float = 0.05,
+                 latency_tolerance : float = 2.0,
+                 backoff_ratio : float = 0.7
+                ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit or initial_limit))
+        self.limit = float(min(max(int(initial_limit), self.min_limit), self.max_limit))
+        self.window_size = window_size
+        self.max_error_rate = max_error_rate
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.baseline_latency : Optional[float] = None
+        self.decisions = deque(maxlen = 1000)
+
+        self._in_flight = 0
+        self._window : List[tuple] = []
+        self._saturated = False
+        self._condition = threading.Condition()
+
+    @classmethod
+    def get_max_limit(cls, run_config : dict) -> int:
+        """
+        Ceiling of the limit : max_parallel_api_calls, defaults to 4 times nbr_parallel_runs.
+        """
+        return int(run_config.get("max_parallel_api_calls", None) or 4 * (run_config.get("nbr_parallel_runs", 1) or 1))
+
+    @classmethod
+    def from_run_config(cls, run_config : dict) -> Optional["AdaptiveLimiter"]:
+        """
+        Build a limiter starting at nbr_parallel_runs if run_pat_in_parallel & adaptive_concurrency are enabled, None otherwise.
+        """
+        if not (run_config.get("run_pat_in_parallel", False) and run_config.get("adaptive_concurrency", False)):
+            return None
+        return cls(initial_limit = run_config.get("nbr_parallel_runs", 1) or 1, max_limit = cls.get_max_limit(run_config))
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one of the slots allowed by the current limit.
+        """
+        with self._condition:
+            while self._in_flight >= self.current_limit:
+                self._condition.wait()
+            self._in_flight += 1
+            if self._in_flight >= self.current_limit:
+                self._saturated = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def record(self, latency : float, error : bool) -> None:
+        """
+        Record the outcome of a call & adjust the limit at the end of each window.
+        """
+        with self._condition:
+            self._window.append((latency, error))
+            if len(self._window) < self.window_size:
+                return
+            latencies = sorted(latency for latency, _ in self._window)
+            median_latency = latencies[len(latencies) // 2]
+            error_rate = sum(1 for _, error in self._window if error) / len(self._window)
+            saturated = self._saturated
+            self._window = []
+            self._saturated = False
+
+            if self.baseline_latency is None:
+                self.baseline_latency = median_latency
+            slow = median_latency > self.latency_tolerance * self.baseline_latency
+            previous_limit = self.current_limit
+            if error_rate > self.max_error_rate or slow:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                reason = f"error rate {error_rate:.0%}" if error_rate > self.max_error_rate else f"latency above {self.latency_tolerance}x baseline {self.baseline_latency * 1000:.0f}ms"
+            else:
+                if saturated:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                reason = "healthy"
+                self.baseline_latency = min(median_latency, 0.95 * self.baseline_latency + 0.05 * median_latency)
+            self._condition.notify_all()
+
+            if self.current_limit != previous_limit:
+                decision = {
+                    "time" : time.time(),
+                    "previous_limit" : previous_limit,
+                    "limit" : self.current_limit,
+                    "reason" : reason,
+                    "median_latency" : median_latency,
+                    "error_rate" : error_rate
+                }
+                self.decisions.append(decision)
+                logger.info(f"Adaptive concurrency : {previous_limit} -> {self.current_limit} parallel API calls ({reason}, median latency {median_latency * 1000:.0f}ms, error rate {error_rate:.0%})")
+
+    def instrument(self, client) -> None:
+        """
+        Route all the HTTP calls of a dataikuapi client (DSSClient, FMClient...) through the limiter.
+        """
+        session = getattr(client, "_session", None)
+        if session is None:
+            return
+        for prefix, adapter in list(session.adapters.items()):
+            if isinstance(adapter, AdaptiveLimiterAdapter):
+                continue
+            session.mount(prefix, AdaptiveLimiterAdapter(self, adapter))
+
+
+class AdaptiveLimiterAdapter(requests.adapters.BaseAdapter):
+    """
+    requests adapter holding a slot of an AdaptiveLimiter while the wrapped adapter sends a request, recording its outcome.
+    """
+
+    def __init__(self, limiter : AdaptiveLimiter, adapter : requests.adapters.BaseAdapter):
+        super().__init__()
+        self.limiter = limiter
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        with self.limiter.slot():
+            start_time = time.time()
+            try:
+                response = self.adapter.send(request, **kwargs)
+            except requests.exceptions.RequestException:
+                self.limiter.record(time.time() - start_time, error = True)
+                raise
+            self.limiter.record(time.time() - start_time, error = response.status_code == 429 or response.status_code >= 500)
+            return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class AsyncOrchestrator():
+    """
+    asyncio orchestration of blocking API calls.
+    Calls run in an executor bounded by the budget & each call holds a slot of the budget, so that the asyncio 
+    workloads share the same limit as the thread based ones (Ex : the PAT backend builders).
+    Coroutines still running after the timeout are cancelled : calls waiting for a slot are dropped,
+    calls already running in the executor complete in the background.
+    """
+
+    def __init__(self, budget : ConcurrencyBudget, timeout : Optional[float] = None):
+        self.budget = budget
+        self.timeout = timeout if timeout else None # None or 0 : no timeout
+        self._executor : ThreadPoolExecutor = None
+        self._semaphore : asyncio.Semaphore = None
+
+    @classmethod
+    def from_run_config(cls, run_config : dict, budget : ConcurrencyBudget) -> "AsyncOrchestrator":
+        """
+        Build an orchestrator from the orchestration_timeout run config parameter.
+        """
+        return cls(budget, timeout = run_config.get("orchestration_timeout", None))
+
+    async def run(self, fn : Callable, *args) -> Any:
+        """
+        Run a blocking fn in the bounded executor, holding a slot of the budget.
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, functools.partial(context.run, self.budget.call, fn, *args))
+
+    def run_all(self, coroutine_fns : List[Callable[[], Awaitable]], default : Any = None) -> List[Any]:
+        """
+        Run all the coroutines concurrently & return their results in order.
+        Coroutines cancelled on timeout return the default value. Errors are raised to the caller.
+        """
+        coroutine_fns = list(coroutine_fns)
+        if len(coroutine_fns) == 0:
+            return []
+
+        async def main():
+            self._semaphore = asyncio.Semaphore(self.budget.max_workers)
+            tasks = [asyncio.ensure_future(coroutine_fn()) for coroutine_fn in coroutine_fns]
+            done, pending = await asyncio.wait(tasks, timeout = self.timeout)
+            if pending:
+                logger.warning(f"Orchestration timeout of {self.timeout}s reached, cancelling {len(pending)}/{len(tasks)} tasks")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions = True) # Let the tasks clean up
+            return [default if task.cancelled() else task.result() for task in tasks]
+
+        self._executor = ThreadPoolExecutor(max_workers = self.budget.max_workers)
+        try:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(main())
+            # Already within an event loop (Ex : notebook), run in a dedicated thread
+            with ThreadPoolExecutor(max_workers = 1) as loop_executor:
+                return loop_executor.submit(asyncio.run, main()).result()
+        finally:
+            self._executor.shutdown(wait = False, cancel_futures = True)
+            self._executor = None
+
+    def map(self, fn : Callable, items : Iterable, default : Any = None) -> List[Any]:
+        """
+        Apply a blocking fn to all the items. Results are returned in the order of the items.
+        Items cancelled on timeout return the default value.
+        """
+        return self.run_all([functools.partial(self.run, fn, item) for item in items], default = default)
+
+
+class CostClass(Enum):
+    """
+    Enumeration representing the dominant cost of a unit of work.
+    """
+    IO_BOUND = auto() # API calls : run in process
+    CPU_BOUND = auto() # Pure python computation (Ex : code formatting, regex) : run on the process lane
+
+
+class ProcessLane():
+    """
+    Process pool for CPU-bound work, which does not scale on threads because of the GIL.
+    fn must be a module level function of the library & the items must be picklable (Ex : code text, names), 
+    never API clients. Opt-in : without worker processes, the work runs in process.
+    The pool is created on the first parallel map & reused by all the lanes of the process, so each worker imports
+    the libraries it runs (Ex : yapf, sqlfluff) once. It is shut down at exit.
+    """
+
+    _pool : Optional[ProcessPoolExecutor] = None
+    _pool_workers = 0
+    _pool_lock = threading.Lock()
+
+    def __init__(self, max_workers : int = 0):
+        self.max_workers = max(0, int(max_workers or 0))
+
+    @classmethod
+    def from_run_config(cls, run_config : dict) -> "ProcessLane":
+        """
+        Build a lane from the cpu_process_workers parameter (run config or plugin config), bounded by the number of CPUs.
+        """
+        return cls(min(run_config.get("cpu_process_workers", 0) or 0, os.cpu_count() or 1))
+
+    @property
+    def is_parallel(self) -> bool:
+        return self.max_workers > 1
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """
+        Return the pool of the process, created on the first call (or again if the number of workers changed).
+        """
+        with ProcessLane._pool_lock:
+            if ProcessLane._pool is None or ProcessLane._pool_workers != self.max_workers:
+                if ProcessLane._pool is not None:
+                    ProcessLane._pool.shutdown(wait = False)
+                logger.debug(f"Starting a process pool of {self.max_workers} workers for CPU-bound work")
+                # spawn : the workers do not inherit the locks held by the threads of the parent process
+                ProcessLane._pool = ProcessPoolExecutor(max_workers = self.max_workers, mp_context = multiprocessing.get_context("spawn"))
+                ProcessLane._pool_workers = self.max_workers
+            return ProcessLane._pool
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Shut down the pool of the process, if any. The next parallel map starts a new one.
+        """
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait = False, cancel_futures = True)
+            cls._pool = None
+            cls._pool_workers = 0
+
+    def map(self, fn : Callable, items : Iterable) -> List[Any]:
+        """
+        Apply fn to all the items in the worker processes. Results are returned in the order of the items.
+        Runs in process if the lane is not parallel or if the pool is broken.
+        """
+        items = list(items)
+        if not self.is_parallel or len(items) <= 1:
+            return [fn(item) for item in items]
+        try:
+            chunksize = max(1, len(items) // (self.max_workers * 4))
+            return list(self.get_pool().map(fn, items, chunksize = chunksize))
+        except BrokenProcessPool as error:
+            logger.warning(f"Process pool is broken, running in process : {type(error).__name__}:{str(error)}")
+            ProcessLane.shutdown()
+            return [fn(item) for item in items]
+
+
+def map_on_lane(owner : Any, fn : Callable, items : Iterable) -> List[Any]:
+    """
+    Apply fn to all the items on the lane of the cost_class of owner (Ex : a project standards check spec).
+    CPU_BOUND work runs on the process lane sized by the cpu_process_workers parameter of owner.plugin_config,
+    other work runs in process.
+    """
+    if getattr(owner, "cost_class", None) == CostClass.CPU_BOUND:
+        return ProcessLane.from_run_config(getattr(owner, "plugin_config", None) or {}).map(fn, items)
+    return [fn(item) for item in items]
+
+
+# Shut down the process pool shared by the lanes of the process at exit
+atexit.register(ProcessLane.shutdown)
@@ -0,0 +1,156 @@
+# PAT CPU-bound tasks
+# Module level functions run in the ProcessLane workers : inputs & outputs must be picklable (no API clients).
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+
+####################################
+# Code formatting (yapf, sqlfluff) #
+####################################
+
+def get_python_formatting_status(script : Tuple[str, str, str]) -> Dict[str, int]:
+    """
+    Input : (script name, python code, yapf style)
+    Return the number of lines of the script & the number of lines to be formatted.
+    """
+    from yapf.yapflib.yapf_api import FormatCode
+    from yapf.yapflib.errors import YapfError
+
+    name, code, style = script
+    n_lines = code.count("\n")
+    try:
+        n_lines_to_format = FormatCode(code, print_diff = True, style_config = style)[0].count("\n-")
+    except YapfError:
+        raise Exception(f"Found a syntax error in {name}; unable to evaluate formatting.")
+    return {
+        "name": name,
+        "n_lines": n_lines,
+        "n_lines_to_format": n_lines_to_format,
+    }
+
+
+def get_sql_formatting_status(query : Tuple[str, str, str]) -> Dict[str, int]:
+    """
+    Input : (recipe name, sql query, sqlfluff dialect)
+    Return the number of formatting changes of the query.
+    """
+    import sqlfluff
+
+    name, sql_query, sql_dialect = query
+    return {
+        "name": name,
+        "n_formatting_changes": len(sqlfluff.lint(sql_query, dialect = sql_dialect)),
+    }
+
+
+#################
+# Naming checks #
+#################
+
+def _parse_allowed_from_charclass_pattern(pattern: str) -> Optional[Set[str]]:
+    """
+    Parse simple charclass forms like: ^[a-z0-9_]+$ and build an allowed ASCII set.
+    Returns None if the pattern is more complex (fallback will handle).
+    """
+    m = re.match(r'^\^\[([^\]]+)\][+*]\$$', pattern or "")
+    if not m:
+        return None
+    body = m.group(1)
+    allowed: Set[str] = set()
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        # escaped char
+        if ch == '\\' and i + 1 < len(body):
+            allowed.add(body[i + 1])
+            i += 2
+            continue
+        # range a-z / 0-9
+        if i + 2 < len(body) and body[i + 1] == '-' and body[i + 2] not in (']',):
+            start, end = ord(body[i]), ord(body[i + 2])
+            if start <= end:
+                for c in range(start, end + 1):
+                    allowed.add(chr(c))
+            i += 3
+            continue
+        # literal
+        allowed.add(ch)
+        i += 1
+    return allowed
+
+
+def diagnose_nonmatch(name: str, pattern: str) -> List[str]:
+    """
+    Return human-readable reasons why 'name' failed 'pattern'.
+    If the only issue is the presence of spaces, return just ["contains spaces"].
+    """
+    reasons: List[str] = []
+    if name == "":
+        return ["empty/blank name"]
+
+    # Detect spaces (not generic whitespace)
+    has_spaces = (' ' in name)
+    if has_spaces:
+        reasons.append("contains spaces")
+        # Note: we'll compress to only ["contains spaces"] at the end if that's the sole issue
+        if name != name.strip(' '):
+            reasons.append("leading/trailing whitespace")
+
+    # Non-ASCII
+    if any(not c.isascii() for c in name):
+        reasons.append("contains non-ASCII characters")
+
+    # Starts-with rules
+    if pattern.startswith('^[A-Za-z]') or pattern.startswith('^[a-zA-Z]'):
+        if not re.match(r'^[A-Za-z]', name or ""):
+            reasons.append("must start with a letter")
+
+    # Lowercase-only heads (e.g., ^[a-z][a-z0-9_]*$)
+    if pattern.startswith('^[a-z]') and re.search(r'[A-Z]', name):
+        reasons.append("uppercase letters not allowed")
+
+    # Character-class analysis (ignore spaces when categorizing special chars)
+    allowed = _parse_allowed_from_charclass_pattern(pattern or "")
+    if allowed is not None:
+        offenders = {c for c in name if c not in allowed}
+        offenders_no_space = offenders - {' '}  # <-- key change: ignore spaces here
+
+        if offenders_no_space:
+            if any(c in "-–—" for c in offenders_no_space):
+                reasons.append("contains hyphen/dash")
+            if "." in offenders_no_space:
+                reasons.append("contains dot")
+            if any(c in "/\\" for c in offenders_no_space):
+                reasons.append("contains slash or backslash")
+            if any(c in "'\"" for c in offenders_no_space):
+                reasons.append("contains quotes")
+            if any(c in "()[]{}" for c in offenders_no_space):
+                reasons.append("contains brackets/parentheses")
+
+            remaining = [c for c in offenders_no_space if c not in set("-–—./\\'\"()[]{}")]
+            if remaining:
+                reasons.append(f"contains special characters: {''.join(sorted(set(remaining)))}")
+    else:
+        if not reasons:
+            reasons.append("does not satisfy the selected naming rule")
+
+    seen = set()
+    reasons = [r for r in reasons if not (r in seen or seen.add(r))]
+
+    # If spaces are the only problem, return only that reason
+    only_spaces_issue = all(r in {"contains spaces", "leading/trailing whitespace"} for r in reasons) and has_spaces
+    if only_spaces_issue:
+        return ["contains spaces"]
+
+    return reasons
+
+
+def get_non_conforming_names(names_to_check : Tuple[str, List[str], str]) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Input : (owner name Ex : a dataset, names to check Ex : its columns, naming pattern)
+    Return the owner name & the names not matching the pattern, with the reasons why.
+    """
+    owner, names, pattern = names_to_check
+    compiled_pattern = re.compile(pattern)
+    return owner, {name : diagnose_nonmatch(name, pattern) for name in names if not compiled_pattern.fullmatch(name)}
@@ -0,0 +1,53 @@
+# PAT Backend table indexes
+
+from typing import Any, Dict, Iterable, List, Union
+
+import numpy as np
+import pandas as pd
+
+
+class TableIndex():
+    """
+    Hash index of the rows of a DataFrame on one or several key columns.
+    Built once in O(rows), each lookup is then O(1) + O(matching rows) instead of a full boolean mask.
+    Keys of composite indexes are tuples in the order of the index columns.
+    """
+
+    def __init__(self, df : pd.DataFrame, columns : Union[str, List[str]]):
+        self.df = df
+        self.columns : List[str] = [columns] if isinstance(columns, str) else list(columns)
+        missing_columns = [c for c in self.columns if c not in df.columns]
+        if missing_columns:
+            raise KeyError(f"Cannot index on missing column(s) : {missing_columns}")
+
+        if df.empty:
+            self.positions : Dict[Any, np.ndarray] = {}
+        else:
+            by = self.columns[0] if len(self.columns) == 1 else self.columns
+            self.positions = df.groupby(by, sort = False, dropna = False).indices
+
+    def get_positions(self, key : Any) -> np.ndarray:
+        """
+        Return the row positions matching a key.
+        """
+        return self.positions.get(key, np.array([], dtype = np.int64))
+
+    def get_rows(self, key : Any) -> pd.DataFrame:
+        """
+        Return the rows matching a key.
+        """
+        return self.df.iloc[self.get_positions(key)]
+
+    def get_rows_in(self, keys : Iterable) -> pd.DataFrame:
+        """
+        Return the rows matching any of the keys, in the order of the table.
+        """
+        positions = [self.get_positions(key) for key in set(keys)]
+        positions = np.sort(np.concatenate(positions)) if positions else np.array([], dtype = np.int64)
+        return self.df.iloc[positions]
+
+    def get_groups(self) -> Dict[Any, pd.DataFrame]:
+        """
+        Return the rows of the table grouped by key.
+        """
+        return {key : self.df.iloc[positions] for key, positions in self.positions.items()}
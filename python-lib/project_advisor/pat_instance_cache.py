@@ -0,0 +1,82 @@
+# PAT Instance info & settings cache
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import dataikuapi
+
+from project_advisor.pat_logging import logger
+
+
+class InstanceInfoCache():
+    """
+    Run scoped cache of the instance level facts read by the assessments (instance info, general settings).
+    - One entry per client & fact, fetched on first use then shared by all the assessments of the run.
+    - Errors are not cached : the next caller tries again.
+    - invalidate() drops entries explicitly, Ex : after changing the instance settings within a run.
+    """
+
+    def __init__(self):
+        self._entries : Dict[Tuple[int, str], Tuple[dataikuapi.dssclient.DSSClient, Any]] = {}
+        self._key_locks : Dict[Tuple[int, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits" : 0, "misses" : 0}
+
+    def get(self, client : dataikuapi.dssclient.DSSClient, fact : str, loader : Callable[[], Any]) -> Any:
+        """
+        Return a cached fact of the instance of the client, calling the loader only once per client.
+        """
+        # Entries are keyed by client object, the client is kept in the entry so that its id cannot be reused.
+        key = (id(client), fact)
+        with self._lock:
+            if key in self._entries:
+                self.stats["hits"] += 1
+                return self._entries[key][1]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.stats["hits"] += 1
+                    return self._entries[key][1]
+            value = loader()
+            with self._lock:
+                self._entries[key] = (client, value)
+                self.stats["misses"] += 1
+            logger.debug(f"Cached instance {fact}")
+            return value
+
+    def invalidate(self, client : dataikuapi.dssclient.DSSClient = None, fact : str = None) -> None:
+        """
+        Drop the cached facts of a client (all clients if None), only the given fact if provided.
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if (client is None or key[0] == id(client)) and (fact is None or key[1] == fact):
+                    del self._entries[key]
+
+    ##################
+    # Instance facts #
+    ##################
+
+    def get_instance_info(self, client : dataikuapi.dssclient.DSSClient) -> dict:
+        """
+        Raw instance info of the client (dssVersion, dataDirPath, nodeType...).
+        """
+        return self.get(client, "instance_info", lambda : client.get_instance_info().raw)
+
+    def get_dss_version(self, client : dataikuapi.dssclient.DSSClient) -> str:
+        return self.get_instance_info(client)["dssVersion"]
+
+    def get_data_dir_path(self, client : dataikuapi.dssclient.DSSClient) -> str:
+        return self.get_instance_info(client)["dataDirPath"]
+
+    def get_general_settings(self, client : dataikuapi.dssclient.DSSClient) -> dict:
+        """
+        Raw general settings of the instance. Requires an admin client.
+        Note : The returned dict is shared by all the callers and must be treated as read only.
+        """
+        return self.get(client, "general_settings", lambda : client.get_general_settings().settings)
+
+    def get_container_settings(self, client : dataikuapi.dssclient.DSSClient) -> dict:
+        return self.get_general_settings(client).get("containerSettings", {})
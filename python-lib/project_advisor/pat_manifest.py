@@ -0,0 +1,51 @@
+# PAT static manifest of the built-in assessment modules
+# Standard library only : built outside of DSS by "make assessment-manifest" (python3 python-lib/project_advisor/pat_manifest.py)
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, List
+
+LIB_FOLDER = Path(__file__).resolve().parents[1] # python-lib
+MANIFEST_PATH = str(Path(__file__).resolve().parent / "assessments" / "assessment_manifest.json")
+
+BUILT_IN_PACKAGES = ["project_advisor.assessments.metrics.project_metrics",
+                     "project_advisor.assessments.checks.project_checks",
+                     "project_advisor.assessments.metrics.instance_metrics",
+                     "project_advisor.assessments.checks.instance_checks"]
+
+
+def walk_module_names(package_folder : str, package_name : str) -> List[str]:
+    """
+    List the names of all the modules under the folder of a package, in a stable order.
+    """
+    module_folder_root = Path(package_folder)
+    module_names = []
+    for root, sub_folders, files in os.walk(module_folder_root):
+        sub_folders[:] = sorted(folder for folder in sub_folders if folder != "__pycache__")
+        for item in sorted(files):
+            if item.endswith(".py") and item != "__init__.py":
+                rel_path = Path(root, item).relative_to(module_folder_root)
+                module_names.append(package_name + "." + rel_path.as_posix()[:-3].replace("/", "."))
+    return module_names
+
+
+def build_manifest(lib_folder : Path = LIB_FOLDER) -> Dict[str, List[str]]:
+    """
+    Build the manifest of the modules of the built-in assessment packages.
+    """
+    return {package_name : walk_module_names(str(lib_folder.joinpath(*package_name.split("."))), package_name) for package_name in BUILT_IN_PACKAGES}
+
+
+def write_manifest(manifest_path : str = MANIFEST_PATH) -> Dict[str, List[str]]:
+    """
+    Write the manifest, to be rebuilt & committed whenever an assessment module is added, renamed or removed.
+    """
+    manifest = build_manifest()
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent = 2)
+    return manifest
+
+
+if __name__ == "__main__":
+    write_manifest()
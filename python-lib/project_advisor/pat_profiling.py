@@ -0,0 +1,369 @@
+# PAT run profiling : API calls & time spent
+
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import pandas as pd
+
+
+class APIProfiler():
+    """
+    Process wide profile of the HTTP calls made by the PAT clients.
+    - Each call is attributed to the current scope (stage, project & assessment), see scope().
+      Scopes are context variables : pool threads started by PAT (ConcurrencyBudget, timeouts) inherit the scope of their caller.
+    - Per endpoint template (Ex : GET /projects/{id}/recipes/{id}/status) : call count, errors, bytes sent & received
+      and a latency histogram.
+    - Per scope : call count, errors, bytes & total latency.
+    """
+
+    latency_buckets_ms = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000] # Upper bounds, + overflow bucket
+    default_scope = {"stage" : "other", "project" : "", "assessment" : ""}
+    id_pattern = re.compile(r"^(\d+|[0-9a-fA-F-]{16,})$") # Numeric or uuid like
+
+    def __init__(self):
+        self._scope : contextvars.ContextVar = contextvars.ContextVar("pat_profile_scope", default = self.default_scope)
+        self._endpoints : Dict[Tuple[str, str], dict] = {}
+        self._scopes : Dict[Tuple[str, str, str], list] = {}
+        self._templates : Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.start_time = time.time()
+
+    def reset(self) -> None:
+        """
+        Start a new profile, Ex : at the start of a run.
+        """
+        with self._lock:
+            self._endpoints = {}
+            self._scopes = {}
+            self.start_time = time.time()
+
+    ##########
+    # Scopes #
+    ##########
+
+    @contextmanager
+    def scope(self, **attributes):
+        """
+        Attribute the calls made within the block to a stage, project and/or assessment.
+        Nested scopes inherit the attributes they do not set.
+        """
+        scope = dict(self._scope.get())
+        scope.update({k : v for k, v in attributes.items() if v is not None})
+        token = self._scope.set(scope)
+        try:
+            yield scope
+        finally:
+            self._scope.reset(token)
+
+    def current_scope(self) -> dict:
+        return self._scope.get()
+
+    #############
+    # Recording #
+    #############
+
+    def get_endpoint_template(self, url : str) -> str:
+        """
+        Replace the object identifiers of a DSS API path by {id}.
+        Segments following a collection (plural segment, Ex : projects, recipes) and numeric or uuid like segments are identifiers.
+        """
+        path = urlparse(url).path
+        template = self._templates.get(path)
+        if template is None:
+            segments = path.strip("/").split("/")
+            templated = []
+            for i, segment in enumerate(segments):
+                previous = segments[i - 1] if i > 0 else ""
+                if self.id_pattern.match(segment) or (previous.endswith("s") and templated[-1] != "{id}"):
+                    templated.append("{id}")
+                else:
+                    templated.append(segment)
+            template = "/" + "/".join(templated)
+            if len(self._templates) < 10000:
+                self._templates[path] = template
+        return template
+
+    def record(self, method : str, url : str, latency : float, bytes_sent : int = 0, bytes_received : int = 0, error : bool = False) -> None:
+        """
+        Record an HTTP call in the profile of its endpoint & of the current scope.
+        """
+        scope = self._scope.get()
+        endpoint_key = (method, self.get_endpoint_template(url))
+        scope_key = (scope["stage"], scope["project"], scope["assessment"])
+        latency_ms = latency * 1000
+        bucket = next((i for i, upper in enumerate(self.latency_buckets_ms) if latency_ms <= upper), len(self.latency_buckets_ms))
+        with self._lock:
+            endpoint = self._endpoints.get(endpoint_key)
+            if endpoint is None:
+                endpoint = self._endpoints[endpoint_key] = {"count" : 0, "errors" : 0, "bytes_sent" : 0, "bytes_received" : 0,
+                                                            "total_latency" : 0.0, "max_latency" : 0.0,
+                                                            "histogram" : [0] * (len(self.latency_buckets_ms) + 1)}
+            endpoint["count"] += 1
+            endpoint["errors"] += int(error)
+            endpoint["bytes_sent"] += bytes_sent
+            endpoint["bytes_received"] += bytes_received
+            endpoint["total_latency"] += latency
+            endpoint["max_latency"] = max(endpoint["max_latency"], latency)
+            endpoint["histogram"][bucket] += 1
+
+            counters = self._scopes.get(scope_key)
+            if counters is None:
+                counters = self._scopes[scope_key] = [0, 0, 0, 0.0] # count, errors, bytes, total latency
+            counters[0] += 1
+            counters[1] += int(error)
+            counters[2] += bytes_sent + bytes_received
+            counters[3] += latency
+
+    ###########
+    # Reports #
+    ###########
+
+    def get_percentile(self, histogram : List[int], percentile : float, max_latency : float) -> Optional[float]:
+        """
+        Estimate a latency percentile (seconds) as the upper bound of the histogram bucket it falls in, capped by the max latency.
+        """
+        count = sum(histogram)
+        if count == 0:
+            return None
+        rank = percentile * count
+        cumulated = 0
+        for i, bucket_count in enumerate(histogram):
+            cumulated += bucket_count
+            if cumulated >= rank:
+                if i == len(self.latency_buckets_ms):
+                    return max_latency
+                return min(self.latency_buckets_ms[i] / 1000, max_latency)
+        return None
+
+    def get_endpoints_df(self) -> pd.DataFrame:
+        """
+        One row per endpoint template, the most time consuming first.
+        """
+        with self._lock:
+            endpoints = {key : dict(value, histogram = list(value["histogram"])) for key, value in self._endpoints.items()}
+        rows = []
+        for (method, template), endpoint in endpoints.items():
+            rows.append({
+                "method" : method,
+                "endpoint" : template,
+                "count" : endpoint["count"],
+                "errors" : endpoint["errors"],
+                "bytes_sent" : endpoint["bytes_sent"],
+                "bytes_received" : endpoint["bytes_received"],
+                "total_latency" : endpoint["total_latency"],
+                "mean_latency" : endpoint["total_latency"] / endpoint["count"],
+                "p50_latency" : self.get_percentile(endpoint["histogram"], 0.5, endpoint["max_latency"]),
+                "p95_latency" : self.get_percentile(endpoint["histogram"], 0.95, endpoint["max_latency"]),
+                "max_latency" : endpoint["max_latency"],
+                "histogram" : endpoint["histogram"]
+            })
+        df = pd.DataFrame(rows, columns = ["method", "endpoint", "count", "errors", "bytes_sent", "bytes_received", "total_latency",
+                                           "mean_latency", "p50_latency", "p95_latency", "max_latency", "histogram"])
+        return df.sort_values("total_latency", ascending = False, ignore_index = True)
+
+    def get_scopes_df(self) -> pd.DataFrame:
+        """
+        One row per stage, project & assessment that made calls.
+        """
+        with self._lock:
+            rows = [{"stage" : stage, "project_id" : project, "assessment" : assessment,
+                     "count" : counters[0], "errors" : counters[1], "bytes" : counters[2], "total_latency" : counters[3]}
+                    for (stage, project, assessment), counters in self._scopes.items()]
+        return pd.DataFrame(rows, columns = ["stage", "project_id", "assessment", "count", "errors", "bytes", "total_latency"])
+
+    def get_summary(self, top : int = 20) -> dict:
+        """
+        JSON serializable summary of the profile : totals, endpoints, stages and the top projects & assessments by API time.
+        """
+        endpoints_df = self.get_endpoints_df()
+        scopes_df = self.get_scopes_df()
+
+        def top_by(column : str) -> List[dict]:
+            df = scopes_df[scopes_df[column] != ""]
+            if len(df) == 0:
+                return []
+            df = df.groupby(column, as_index = False)[["count", "errors", "bytes", "total_latency"]].sum()
+            return df.sort_values("total_latency", ascending = False).head(top).to_dict(orient = "records")
+
+        return {
+            "duration" : time.time() - self.start_time,
+            "latency_buckets_ms" : self.latency_buckets_ms,
+            "totals" : {
+                "count" : int(endpoints_df["count"].sum()),
+                "errors" : int(endpoints_df["errors"].sum()),
+                "bytes_sent" : int(endpoints_df["bytes_sent"].sum()),
+                "bytes_received" : int(endpoints_df["bytes_received"].sum()),
+                "total_latency" : float(endpoints_df["total_latency"].sum())
+            },
+            "endpoints" : endpoints_df.to_dict(orient = "records"),
+            "stages" : top_by("stage"),
+            "projects" : top_by("project_id"),
+            "assessments" : top_by("assessment")
+        }
+
+
+class RunProfiler():
+    """
+    Process wide profile of the time spent by a run.
+    - Stage spans : init, metrics & project_standards (per project), instance_metrics, instance_checks, save...
+    - Assessment runtimes in seconds, recorded as the projects complete (before their results are released).
+    The summary gives the time per stage, the slowest projects & the critical path of the run,
+    the assessment table gives the p50/p95/max runtime per assessment.
+    """
+
+    def __init__(self):
+        self._spans : List[Tuple[str, str, float, float]] = [] # stage, project, start, end
+        self._runtimes : List[Tuple[str, str, str, float, str]] = [] # kind, assessment, project, runtime, status
+        self._lock = threading.Lock()
+        self.start_time = time.time()
+
+    def reset(self) -> None:
+        """
+        Start a new profile, Ex : at the start of a run.
+        """
+        with self._lock:
+            self._spans = []
+            self._runtimes = []
+            self.start_time = time.time()
+
+    #############
+    # Recording #
+    #############
+
+    @contextmanager
+    def span(self, stage : str, project : str = ""):
+        """
+        Record the time spent within the block as a span of a stage (of a project).
+        """
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.record_span(stage, project, start_time, time.time())
+
+    def record_span(self, stage : str, project : str, start_time : float, end_time : float) -> None:
+        with self._lock:
+            self._spans.append((stage, project or "", start_time, end_time))
+
+    def record_runtimes(self, kind : str, runtimes : Iterable[Tuple[str, Optional[float], str]], project : str = "") -> None:
+        """
+        Record the runtimes (seconds) of assessments, given as (name, runtime, status) tuples.
+        kind : Ex : project_metric, project_standard, instance_metric, instance_check
+        """
+        rows = [(kind, name, project or "", float(runtime), status) for name, runtime, status in runtimes if runtime is not None]
+        with self._lock:
+            self._runtimes.extend(rows)
+
+    ###########
+    # Reports #
+    ###########
+
+    def get_spans_df(self) -> pd.DataFrame:
+        with self._lock:
+            spans = list(self._spans)
+        df = pd.DataFrame(spans, columns = ["stage", "project_id", "start", "end"])
+        df["duration"] = df["end"] - df["start"]
+        return df
+
+    def get_assessment_runtimes_df(self) -> pd.DataFrame:
+        """
+        One row per assessment : number of runs, p50/p95/max & total runtime, errors & timeouts. The most time consuming first.
+        """
+        with self._lock:
+            runtimes = list(self._runtimes)
+        columns = ["kind", "assessment", "count", "p50_runtime", "p95_runtime", "max_runtime", "total_runtime", "errors", "timeouts"]
+        if len(runtimes) == 0:
+            return pd.DataFrame(columns = columns)
+        df = pd.DataFrame(runtimes, columns = ["kind", "assessment", "project_id", "runtime", "status"])
+        df["errors"] = df["status"] == "RUN_ERROR"
+        df["timeouts"] = df["status"] == "TIMEOUT"
+        grouped = df.groupby(["kind", "assessment"])
+        runtimes_df = grouped["runtime"].agg(count = "count",
+                                             p50_runtime = lambda runtime : runtime.quantile(0.5),
+                                             p95_runtime = lambda runtime : runtime.quantile(0.95),
+                                             max_runtime = "max",
+                                             total_runtime = "sum")
+        runtimes_df = runtimes_df.join(grouped[["errors", "timeouts"]].sum()).reset_index()
+        return runtimes_df[columns].sort_values("total_runtime", ascending = False, ignore_index = True)
+
+    def get_stages(self, spans_df : pd.DataFrame) -> List[dict]:
+        """
+        Time per stage : wall clock time (union of the spans) & total time (sum of the spans, Ex : over the projects run in parallel).
+        """
+        stages = []
+        for stage, stage_df in spans_df.groupby("stage", sort = False):
+            wall_time = 0.0
+            current_start, current_end = None, None
+            for start, end in sorted(zip(stage_df["start"], stage_df["end"])):
+                if current_end is None or start > current_end:
+                    if current_end is not None:
+                        wall_time += current_end - current_start
+                    current_start, current_end = start, end
+                else:
+                    current_end = max(current_end, end)
+            if current_end is not None:
+                wall_time += current_end - current_start
+            stages.append({"stage" : stage,
+                           "spans" : len(stage_df),
+                           "wall_time" : wall_time,
+                           "total_time" : float(stage_df["duration"].sum()),
+                           "start" : float(stage_df["start"].min()) - self.start_time,
+                           "end" : float(stage_df["end"].max()) - self.start_time})
+        return stages
+
+    def get_slowest_projects(self, spans_df : pd.DataFrame, top : int = 50) -> List[dict]:
+        """
+        The projects with the longest metrics & Project Standards spans, with the time of each stage.
+        """
+        project_spans_df = spans_df[spans_df["project_id"] != ""]
+        if len(project_spans_df) == 0:
+            return []
+        projects_df = project_spans_df.pivot_table(index = "project_id", columns = "stage", values = "duration", aggfunc = "sum", fill_value = 0)
+        projects_df["total_time"] = projects_df.sum(axis = 1)
+        projects_df = projects_df.sort_values("total_time", ascending = False).head(top).reset_index()
+        projects_df.columns.name = None
+        return projects_df.to_dict(orient = "records")
+
+    def get_critical_path(self, spans_df : pd.DataFrame) -> List[dict]:
+        """
+        Chain of spans that determined the end of the run, walking back from the last span to end : 
+        each span is preceded by the latest span that ended before it started (Ex : the Project Standards run of a project 
+        waits for its metrics, or for a run slot freed by another project). Gaps between spans are waits.
+        """
+        if len(spans_df) == 0:
+            return []
+        spans = sorted(zip(spans_df["end"], spans_df["start"], spans_df["stage"], spans_df["project_id"]))
+        ends = [span[0] for span in spans]
+        path = []
+        i = len(spans) - 1
+        while i >= 0:
+            end, start, stage, project = spans[i]
+            path.append({"stage" : stage, "project_id" : project, "start" : start - self.start_time, "duration" : end - start})
+            i = bisect.bisect_right(ends, start) - 1 # Latest span ended before this one started
+            previous_end = spans[i][0] if i >= 0 else self.start_time
+            if start - previous_end > 0.001:
+                path.append({"stage" : "wait", "project_id" : "", "start" : previous_end - self.start_time, "duration" : start - previous_end})
+        return path[::-1]
+
+    def get_summary(self) -> dict:
+        """
+        JSON serializable summary of the run profile : time per stage, slowest projects & critical path.
+        """
+        spans_df = self.get_spans_df()
+        return {
+            "duration" : time.time() - self.start_time,
+            "stages" : self.get_stages(spans_df),
+            "slowest_projects" : self.get_slowest_projects(spans_df),
+            "critical_path" : self.get_critical_path(spans_df)
+        }
+
+
+# Init profilers shared by all the PAT components of the process
+api_profiler = APIProfiler()
+run_profiler = RunProfiler()
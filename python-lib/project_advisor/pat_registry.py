@@ -0,0 +1,154 @@
+# PAT Assessment class registry
+
+import os
+import sys
+import json
+import inspect
+import importlib
+import threading
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+from project_advisor.pat_clients import client_factory
+from project_advisor.pat_logging import logger
+from project_advisor.pat_manifest import MANIFEST_PATH, walk_module_names
+
+
+class AssessmentRegistry():
+    """
+    Process wide registry of the assessment classes (built-in & add-on).
+    - The assessment modules are discovered & imported once per process, then every advisor reuses the same class lists.
+    - The built-in modules are listed in a static manifest (built by "make assessment-manifest"),
+      checked against a listing of the package folder so that a module added without rebuilding the manifest is still discovered.
+    - The add-on classes are loaded once from the "pat_custom_assessments" package of the default project library,
+      the project library being added to sys.path only once.
+    """
+
+    add_on_package = "pat_custom_assessments"
+
+    def __init__(self, manifest_path : str = None):
+        self.manifest_path = manifest_path if manifest_path is not None else MANIFEST_PATH
+        self._manifest : Optional[Dict[str, List[str]]] = None
+        self._modules : Dict[str, List[ModuleType]] = {}
+        self._classes : Dict[Tuple[str, type], List[type]] = {}
+        self._add_on_module : Optional[ModuleType] = None
+        self._add_on_loaded = False
+        self._lock = threading.RLock()
+
+    def get_classes(self, root_module : ModuleType, module_class : type) -> List[type]:
+        """
+        Return the built-in and add-on subclasses of module_class, discovering them on the first call only.
+        """
+        key = (root_module.__name__, module_class)
+        with self._lock:
+            if key not in self._classes:
+                built_in_classes = self.find_subclasses(self.get_modules(root_module), module_class)
+                add_on_classes = self.get_add_on_classes(module_class)
+                self._classes[key] = built_in_classes + add_on_classes
+                logger.debug(f"Registered {len(built_in_classes)} built-in and {len(add_on_classes)} add-on subclasses of {module_class.__name__}")
+            return list(self._classes[key])
+
+    def get_add_on_classes(self, module_class : type) -> List[type]:
+        """
+        Return the module_class sub classes within the default project lib.
+        """
+        add_on_module = self.get_add_on_module()
+        if add_on_module is None:
+            return []
+        try:
+            return self.find_subclasses(self.get_modules(add_on_module), module_class)
+        except Exception as error:
+            logger.warning(f"Failed to load custom assessment classes from '{self.add_on_package}' : {type(error).__name__}:{str(error)}")
+            return []
+
+    def clear(self) -> None:
+        """
+        Forget the discovered classes so that the next call discovers them again (Ex : after editing the add-on assessments).
+        """
+        with self._lock:
+            self._manifest = None
+            self._modules = {}
+            self._classes = {}
+            self._add_on_module = None
+            self._add_on_loaded = False
+
+    ####################
+    # Module discovery #
+    ####################
+
+    def get_modules(self, root_module : ModuleType) -> List[ModuleType]:
+        """
+        Import all the modules of a package, in the order of the manifest if it lists the same modules as the package folder.
+        """
+        with self._lock:
+            if root_module.__name__ not in self._modules:
+                module_names = self.walk_module_names(root_module)
+                manifest_module_names = self.get_manifest().get(root_module.__name__)
+                if manifest_module_names is not None and set(manifest_module_names) != set(module_names):
+                    logger.warning(f"Assessment manifest is out of date for {root_module.__name__}, using the modules of the package folder (run \"make assessment-manifest\")")
+                elif manifest_module_names is not None:
+                    module_names = manifest_module_names
+                self._modules[root_module.__name__] = [importlib.import_module(module_name) for module_name in module_names]
+            return self._modules[root_module.__name__]
+
+    def walk_module_names(self, root_module : ModuleType) -> List[str]:
+        """
+        List the names of all the modules under the folder of a package.
+        """
+        return walk_module_names(root_module.__path__[0], root_module.__name__)
+
+    def find_subclasses(self, modules : List[ModuleType], module_class : type) -> List[type]:
+        """
+        Find all the module_class sub classes within the modules.
+        """
+        classes = []
+        for module in modules:
+            for _, c in inspect.getmembers(module, inspect.isclass):
+                if issubclass(c, module_class) and module_class != c:
+                    classes.append(c)
+        return classes
+
+    def get_add_on_module(self) -> Optional[ModuleType]:
+        """
+        Import the add-on assessments package from the default project lib, once.
+        This requires the macro to be impersonated.
+        """
+        with self._lock:
+            if self._add_on_loaded:
+                return self._add_on_module
+            self._add_on_loaded = True
+            try:
+                local_client = client_factory.api_client()
+                project_key = local_client.get_default_project().project_key
+                dataDirPath = local_client.get_instance_info().raw["dataDirPath"]
+                proj_py_lib_root = dataDirPath + f"/config/projects/{project_key}/lib/python"
+                if proj_py_lib_root not in sys.path:
+                    sys.path.append(proj_py_lib_root)
+                self._add_on_module = importlib.import_module(self.add_on_package)
+            except Exception as error:
+                # Case were no custom assessments have been provided in the "pat_custom_assessments" Folder.
+                logger.debug(f"Failed to load custom assessment classes from project libraries folder '{self.add_on_package}', error : {str(error)}")
+            return self._add_on_module
+
+    ############
+    # Manifest #
+    ############
+
+    def get_manifest(self) -> Dict[str, List[str]]:
+        """
+        Load the static manifest of the built-in assessment modules, if one has been built.
+        """
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = {}
+                if os.path.exists(self.manifest_path):
+                    try:
+                        with open(self.manifest_path) as f:
+                            self._manifest = json.load(f)
+                    except Exception as error:
+                        logger.warning(f"Failed to read the assessment manifest {self.manifest_path} : {type(error).__name__}:{str(error)}")
+            return self._manifest
+
+
+# Init registry shared by all the advisors of the process
+assessment_registry = AssessmentRegistry()
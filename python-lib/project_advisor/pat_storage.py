@@ -0,0 +1,677 @@
+# PAT Storage formats & helpers
+
+import gzip
+import json
+import math
+import shutil
+import tempfile
+import importlib.util
+from datetime import datetime
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from project_advisor.pat_logging import logger
+
+# Version of the layout of the PAT tables written to managed folders.
+# Increase when the way tables are encoded changes in a non backward compatible way.
+SCHEMA_VERSION = 1
+
+# Delta snapshots : "<timestamp>.delta<extension>" files holding the rows inserted / updated / deleted since the previous snapshot.
+DELTA_MARKER = ".delta"
+DELTA_OP_COLUMN = "pat_delta_op"
+DELTA_UPSERT = "upsert"
+DELTA_DELETE = "delete"
+
+# Number of rows encoded at a time by the streaming writers
+STREAM_CHUNK_ROWS = 10000
+STREAM_BUFFER_BYTES = 1024 * 1024
+
+
+def write_csv_chunks(df : pd.DataFrame, stream, header : bool = True, encoding : str = "utf-8") -> None:
+    """
+    Encode a DataFrame as CSV into a binary stream, STREAM_CHUNK_ROWS rows at a time, so the full encoded file is never held in memory.
+    """
+    for start in range(0, max(len(df), 1), STREAM_CHUNK_ROWS):
+        text = df.iloc[start:start + STREAM_CHUNK_ROWS].to_csv(index=False, header = header and start == 0)
+        stream.write(text.encode(encoding))
+
+
+class ByteCountingStream():
+    """
+    Write only binary stream adapter tracking its position, for writers that need tell() (Ex : parquet) 
+    on top of folder writers.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.stream.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        return
+
+    def writable(self) -> bool:
+        return True
+
+
+class TableFormat(ABC):
+    """
+    Abstract base class for the serialization formats of the PAT tables stored in managed folders.
+    """
+    name : str = None
+    extension : str = None
+
+    @abstractmethod
+    def write(self, df : pd.DataFrame, stream) -> None:
+        """
+        Serialize a DataFrame into a writable binary stream.
+        """
+        return
+
+    @abstractmethod
+    def read(self, stream) -> pd.DataFrame:
+        """
+        Deserialize a DataFrame from a readable binary stream.
+        """
+        return
+
+    def write_chunks(self, chunks : Iterable[pd.DataFrame], stream) -> None:
+        """
+        Serialize DataFrames with the same columns as a single table. 
+        Formats that cannot append to a table concatenate the chunks first.
+        """
+        chunks = [chunk for chunk in chunks if len(chunk.columns) > 0]
+        self.write(pd.concat(chunks, ignore_index = True) if chunks else pd.DataFrame(), stream)
+
+    def read_chunks(self, stream) -> Iterator[pd.DataFrame]:
+        """
+        Deserialize a table as DataFrames of about STREAM_CHUNK_ROWS rows.
+        Formats that cannot be read in chunks return a single DataFrame.
+        """
+        yield self.read(stream)
+
+
+class CSVTableFormat(TableFormat):
+    """
+    Legacy CSV format. dtypes are re-inferred on read and nested columns are returned as strings.
+    Rows are encoded & written in chunks.
+    """
+    name = "csv"
+    extension = ".csv"
+
+    def write(self, df : pd.DataFrame, stream) -> None:
+        write_csv_chunks(df, stream)
+
+    def read(self, stream) -> pd.DataFrame:
+        return pd.read_csv(stream)
+
+    def write_chunks(self, chunks : Iterable[pd.DataFrame], stream) -> None:
+        """
+        Append the chunks one after the other, aligned on the columns of the first non empty chunk.
+        """
+        columns = None
+        for chunk in chunks:
+            if len(chunk.columns) == 0:
+                continue
+            if columns is None:
+                columns = list(chunk.columns)
+                write_csv_chunks(chunk, stream)
+            else:
+                write_csv_chunks(chunk.reindex(columns = columns), stream, header = False)
+
+    def read_chunks(self, stream) -> Iterator[pd.DataFrame]:
+        try:
+            yield from pd.read_csv(stream, chunksize = STREAM_CHUNK_ROWS)
+        except pd.errors.EmptyDataError:
+            return
+
+
+class CSVGzipTableFormat(CSVTableFormat):
+    """
+    Gzip compressed CSV format. Rows are encoded & compressed in chunks and decompressed while being read.
+    """
+    name = "csv_gzip"
+    extension = ".csv.gz"
+
+    def __init__(self, compression_level : int = 6):
+        self.compression_level = compression_level
+
+    def write(self, df : pd.DataFrame, stream) -> None:
+        with gzip.GzipFile(fileobj = stream, mode = "wb", compresslevel = self.compression_level) as gzip_stream:
+            super().write(df, gzip_stream)
+
+    def read(self, stream) -> pd.DataFrame:
+        return pd.read_csv(stream, compression = "gzip")
+
+    def write_chunks(self, chunks : Iterable[pd.DataFrame], stream) -> None:
+        with gzip.GzipFile(fileobj = stream, mode = "wb", compresslevel = self.compression_level) as gzip_stream:
+            super().write_chunks(chunks, gzip_stream)
+
+    def read_chunks(self, stream) -> Iterator[pd.DataFrame]:
+        try:
+            yield from pd.read_csv(stream, compression = "gzip", chunksize = STREAM_CHUNK_ROWS)
+        except pd.errors.EmptyDataError:
+            return
+
+
+class ParquetTableFormat(TableFormat):
+    """
+    Typed & compressed columnar format (requires pyarrow).
+    Nested columns (lists, dicts) are stored as JSON and decoded on read, the list of encoded columns
+    and the schema version are kept in the parquet file metadata.
+    """
+    name = "parquet"
+    extension = ".parquet"
+    metadata_key = b"pat"
+
+    def __init__(self, compression : str = "zstd"):
+        self.compression = compression
+
+    def write(self, df : pd.DataFrame, stream) -> None:
+        """
+        Write the DataFrame one row group of STREAM_CHUNK_ROWS rows at a time, straight into the stream.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        json_columns = get_nested_columns(df)
+        schema = pa.Schema.from_pandas(encode_nested_columns(df.head(0), json_columns)[0], preserve_index=False)
+        schema = schema_with_string_columns(schema, df)
+        metadata = dict(schema.metadata or {})
+        metadata[self.metadata_key] = json.dumps({
+            "schema_version" : SCHEMA_VERSION,
+            "json_columns" : json_columns
+        }).encode("utf-8")
+        schema = schema.with_metadata(metadata)
+
+        with pq.ParquetWriter(pa.PythonFile(ByteCountingStream(stream), mode = "w"), schema, compression = self.compression) as writer:
+            for start in range(0, max(len(df), 1), STREAM_CHUNK_ROWS):
+                chunk, _ = encode_nested_columns(df.iloc[start:start + STREAM_CHUNK_ROWS], json_columns)
+                writer.write_table(pa.Table.from_pandas(chunk, schema = schema, preserve_index=False))
+
+    def read(self, stream) -> pd.DataFrame:
+        chunks = list(self.read_chunks(stream))
+        return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index = True)
+
+    def read_chunks(self, stream) -> Iterator[pd.DataFrame]:
+        """
+        Read the table one batch of STREAM_CHUNK_ROWS rows at a time.
+        Folder download streams are not seekable & parquet needs random access to the footer : the file is spooled to a temporary file first.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryFile() as spool:
+            shutil.copyfileobj(stream, spool, STREAM_BUFFER_BYTES)
+            spool.seek(0)
+            parquet_file = pq.ParquetFile(spool)
+            schema = parquet_file.schema_arrow
+            pat_metadata = json.loads((schema.metadata or {}).get(self.metadata_key, b"{}"))
+            schema_version = pat_metadata.get("schema_version", SCHEMA_VERSION)
+            if schema_version > SCHEMA_VERSION:
+                logger.warning(f"Table was written with PAT schema version {schema_version}, newer than the supported version {SCHEMA_VERSION}")
+            json_columns = pat_metadata.get("json_columns", [])
+
+            empty = True
+            for batch in parquet_file.iter_batches(batch_size = STREAM_CHUNK_ROWS):
+                empty = False
+                yield decode_nested_columns(pa.Table.from_batches([batch], schema = schema).to_pandas(), json_columns)
+            if empty:
+                yield decode_nested_columns(schema.empty_table().to_pandas(), json_columns)
+
+
+TABLE_FORMATS = {
+    CSVTableFormat.name : CSVTableFormat,
+    CSVGzipTableFormat.name : CSVGzipTableFormat,
+    ParquetTableFormat.name : ParquetTableFormat,
+}
+
+DEFAULT_REPORT_FORMAT = CSVTableFormat.name # Format of the PAT report files when the run config does not set one, read by external consumers of the report folders
+
+
+def pyarrow_available() -> bool:
+    """
+    Return True if pyarrow is installed in the code env.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def get_table_format(name : str = None) -> TableFormat:
+    """
+    Return the TableFormat matching a format name, falling back on CSV if the format cannot be used.
+    """
+    if name is None:
+        name = ParquetTableFormat.name
+    format_class = TABLE_FORMATS.get(name)
+    if format_class is None:
+        logger.warning(f"Unknown PAT table format {name}, falling back to {CSVTableFormat.name}")
+        return CSVTableFormat()
+    if format_class is ParquetTableFormat and not pyarrow_available():
+        logger.warning(f"pyarrow is not installed, falling back to {CSVTableFormat.name} for PAT tables")
+        return CSVTableFormat()
+    return format_class()
+
+
+def get_table_format_from_filename(filename : str) -> TableFormat:
+    """
+    Return the TableFormat able to read a file given its extension.
+    """
+    for format_class in TABLE_FORMATS.values():
+        if filename.endswith(format_class.extension):
+            return format_class()
+    raise ValueError(f"No PAT table format can read file {filename}")
+
+
+def split_filename(filename : str) -> Tuple[str, str]:
+    """
+    Split a PAT table file name into its snapshot id (timestamp) and its extension.
+    """
+    for format_class in TABLE_FORMATS.values():
+        if filename.endswith(format_class.extension):
+            return filename[:-len(format_class.extension)], format_class.extension
+    return filename, ""
+
+
+def write_table(folder, full_path : str, df : pd.DataFrame, table_format : TableFormat) -> None:
+    """
+    Stream a DataFrame into a managed folder file.
+    """
+    with folder.get_writer(full_path) as stream:
+        table_format.write(df, stream)
+
+
+def write_table_chunks(folder, full_path : str, chunks : Iterable[pd.DataFrame], table_format : TableFormat) -> None:
+    """
+    Stream DataFrames produced one at a time into a single managed folder file.
+    """
+    with folder.get_writer(full_path) as stream:
+        table_format.write_chunks(chunks, stream)
+
+
+def read_table_chunks(folder, full_path : str) -> Iterator[pd.DataFrame]:
+    """
+    Read a managed folder file written by write_table in chunks, the format is resolved from the file extension.
+    """
+    table_format = get_table_format_from_filename(full_path)
+    with folder.get_download_stream(full_path) as stream:
+        yield from table_format.read_chunks(stream)
+
+
+def read_table(folder, full_path : str) -> pd.DataFrame:
+    """
+    Read a managed folder file written by write_table, the format is resolved from the file extension.
+    """
+    table_format = get_table_format_from_filename(full_path)
+    with folder.get_download_stream(full_path) as stream:
+        return table_format.read(stream)
+
+
+def is_delta_file(filename : str) -> bool:
+    """
+    Return True if a PAT table file is a delta snapshot.
+    """
+    return split_filename(filename)[0].endswith(DELTA_MARKER)
+
+
+def snapshot_timestamp(filename : str) -> str:
+    """
+    Return the timestamp of a full or delta snapshot file.
+    """
+    snapshot_id = split_filename(filename)[0]
+    if snapshot_id.endswith(DELTA_MARKER):
+        return snapshot_id[:-len(DELTA_MARKER)]
+    return snapshot_id
+
+
+def resolve_snapshot_chains(filenames : List[str]) -> Dict[str, List[str]]:
+    """
+    Return for every snapshot file the list of files needed to reconstruct it : 
+    the latest full snapshot before it followed by all the delta snapshots up to it.
+    Delta snapshots with no full snapshot before them get a chain starting with a delta.
+    """
+    chains = {}
+    chain = []
+    for filename in sorted(filenames, key = snapshot_timestamp):
+        if is_delta_file(filename):
+            chain = chain + [filename]
+        else:
+            chain = [filename]
+        chains[filename] = chain
+    return chains
+
+
+################################
+# Nested column helper methods #
+################################
+
+def _is_null(value : Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def get_nested_columns(df : pd.DataFrame) -> List[str]:
+    """
+    Return the object columns that do not only contain strings (nested or mixed type values).
+    """
+    json_columns = []
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        if all(isinstance(v, str) for v in df[column] if not _is_null(v)):
+            continue
+        json_columns.append(column)
+    return json_columns
+
+
+def encode_nested_columns(df : pd.DataFrame, json_columns : List[str] = None) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    JSON encode the nested columns of a DataFrame (all the nested columns if json_columns is None).
+    Returns the encoded copy of the DataFrame and the list of encoded columns.
+    """
+    if json_columns is None:
+        json_columns = get_nested_columns(df)
+    encoded = {}
+    for column in json_columns:
+        encoded[column] = [None if _is_null(v) else json.dumps(v, default = str) for v in df[column]]
+
+    if json_columns:
+        df = df.assign(**encoded)
+    return df, json_columns
+
+
+def schema_with_string_columns(schema, df : pd.DataFrame):
+    """
+    Object columns only contain strings once the nested columns are encoded. Their type cannot be inferred 
+    from an empty DataFrame, set it explicitly so that all the row groups of a file share one schema.
+    """
+    import pyarrow as pa
+
+    for i, field in enumerate(schema):
+        if df[field.name].dtype == object:
+            column_type = pa.string() if df[field.name].notna().any() else pa.null()
+            schema = schema.set(i, field.with_type(column_type))
+    return schema
+
+
+def _normalize(value : Any) -> Any:
+    """
+    Normalize a cell value so that values read back from a file compare equal to freshly built values.
+    """
+    if isinstance(value, (list, dict)):
+        return value
+    if _is_null(value):
+        return None
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        try:
+            return value.item() # numpy scalars
+        except (ValueError, TypeError):
+            return value
+    return value
+
+
+def decode_nested_columns(df : pd.DataFrame, json_columns : List[str]) -> pd.DataFrame:
+    """
+    Decode the columns that were JSON encoded by encode_nested_columns.
+    """
+    decoded = {}
+    for column in json_columns:
+        if column in df.columns:
+            decoded[column] = [None if _is_null(v) else json.loads(v) for v in df[column]]
+    if decoded:
+        df = df.assign(**decoded)
+    return df
+
+
+############
+# Manifest #
+############
+
+MANIFEST_PATH = "/manifest.json"
+
+
+class TableManifest():
+    """
+    Index of the latest snapshot of every table stored in a managed folder.
+    Lets readers resolve the latest file of a table without listing the whole folder.
+    """
+
+    def __init__(self, tables : Dict[str, dict] = None):
+        self.tables : Dict[str, dict] = tables if tables is not None else {}
+
+    @classmethod
+    def load(cls, folder) -> "TableManifest":
+        """
+        Load the manifest of a folder. Returns None if it is missing or corrupt.
+        """
+        try:
+            raw = folder.read_json(MANIFEST_PATH)
+        except Exception as error:
+            logger.debug(f"No readable manifest in folder, error : {type(error).__name__}:{str(error)}")
+            return None
+        if not isinstance(raw, dict) or not isinstance(raw.get("tables"), dict):
+            logger.warning(f"Manifest {MANIFEST_PATH} is corrupt and will be ignored")
+            return None
+        return cls(raw["tables"])
+
+    @classmethod
+    def get_version(cls, folder) -> Optional[Tuple]:
+        """
+        Cheap version of the manifest of a folder : its modification time & size from the folder metadata (no download).
+        Returns None if the manifest is missing or the metadata is unavailable.
+        """
+        try:
+            details = folder.get_path_details(MANIFEST_PATH)
+        except Exception as error:
+            logger.debug(f"Failed to read the manifest metadata, error : {type(error).__name__}:{str(error)}")
+            return None
+        if not details or not details.get("exists", True):
+            return None
+        return (details.get("lastModified"), details.get("size"))
+
+    def save(self, folder) -> None:
+        """
+        Write the manifest in a single upload, once all the files it references have been written.
+        """
+        folder.write_json(MANIFEST_PATH, {"schema_version" : SCHEMA_VERSION, "tables" : self.tables})
+
+    def get_entry(self, table : str) -> dict:
+        entry = self.tables.get(table)
+        if isinstance(entry, dict) and entry.get("file"):
+            return entry
+        return None
+    
+    def get_chain(self, table : str) -> List[str]:
+        """
+        Return the files needed to reconstruct the latest snapshot of a table (None if the table has no entry).
+        """
+        entry = self.get_entry(table)
+        if entry is None:
+            return None
+        chain = entry.get("chain")
+        return chain if isinstance(chain, list) and chain else [entry["file"]]
+
+    def set_entry(self, table : str, file : str, row_count : int, build_time : str, table_format : str, build_state : dict = None, chain : List[str] = None) -> None:
+        """
+        Set the latest snapshot of a table.
+        build_state holds any builder specific information needed by the next build (Ex : project versions for incremental builds).
+        chain lists the files needed to reconstruct the snapshot (a full snapshot followed by delta snapshots).
+        """
+        self.tables[table] = {
+            "file" : file,
+            "chain" : chain if chain else [file],
+            "row_count" : row_count,
+            "build_time" : build_time,
+            "format" : table_format,
+            "schema_version" : SCHEMA_VERSION,
+            "build_state" : build_state if build_state is not None else {}
+        }
+
+
+#############
+# Retention #
+#############
+
+ARCHIVE_FOLDER = "/_archive" # Compacted snapshots, one append-only part per table & garbage collection
+ARCHIVE_SNAPSHOT_COLUMN = "pat_snapshot_id"
+ARCHIVE_COLUMNS_COLUMN = "pat_snapshot_columns" # JSON list of the columns of the archived snapshot
+
+
+class RetentionPolicy():
+    """
+    Snapshots of a table to keep in a managed folder :
+    - keep_last : the N most recent snapshots
+    - keep_daily : the most recent snapshot of each of the last N days that have snapshots
+    - keep_weekly : the most recent snapshot of each of the last N (ISO) weeks that have snapshots
+    """
+
+    def __init__(self, keep_last : int = 5, keep_daily : int = 7, keep_weekly : int = 4):
+        self.keep_last = max(1, int(keep_last)) # The latest snapshot is always kept
+        self.keep_daily = max(0, int(keep_daily))
+        self.keep_weekly = max(0, int(keep_weekly))
+
+    def select_snapshots_to_keep(self, snapshot_ids : List[str]) -> List[str]:
+        """
+        Return the snapshot ids (timestamps) to keep. Snapshot ids that are not timestamps are always kept.
+        """
+        keep = set()
+        dated = []
+        for snapshot_id in snapshot_ids:
+            try:
+                dated.append((datetime.fromisoformat(snapshot_id), snapshot_id))
+            except ValueError:
+                keep.add(snapshot_id)
+        dated.sort(reverse = True)
+
+        keep.update(snapshot_id for _, snapshot_id in dated[:self.keep_last])
+        for nbr_periods, period_of in [(self.keep_daily, lambda dt : dt.date()), 
+                                       (self.keep_weekly, lambda dt : dt.isocalendar()[:2])]:
+            periods = set()
+            for dt, snapshot_id in dated:
+                period = period_of(dt)
+                if period in periods:
+                    continue
+                if len(periods) >= nbr_periods:
+                    break
+                periods.add(period)
+                keep.add(snapshot_id)
+        return [snapshot_id for snapshot_id in snapshot_ids if snapshot_id in keep]
+
+
+def archive_snapshot(snapshot_id : str, df : pd.DataFrame) -> pd.DataFrame:
+    """
+    Tag the rows of a snapshot with its id & its own columns, so that it can be extracted from an archive
+    shared with snapshots of other columns.
+    """
+    return df.assign(**{ARCHIVE_SNAPSHOT_COLUMN : snapshot_id, ARCHIVE_COLUMNS_COLUMN : json.dumps(list(df.columns))})
+
+
+def get_archived_snapshot(archive_df : pd.DataFrame, snapshot_id : str) -> pd.DataFrame:
+    """
+    Extract a snapshot from an archive, with exactly its own columns.
+    """
+    df = archive_df[archive_df[ARCHIVE_SNAPSHOT_COLUMN] == snapshot_id]
+    columns = df[ARCHIVE_COLUMNS_COLUMN].dropna() if ARCHIVE_COLUMNS_COLUMN in df.columns else []
+    if len(columns) > 0:
+        return df[json.loads(columns.iloc[0])].reset_index(drop = True)
+    # Snapshots archived before the columns were recorded : all null columns are assumed to belong to other snapshots
+    df = df.drop(columns = [column for column in [ARCHIVE_SNAPSHOT_COLUMN, ARCHIVE_COLUMNS_COLUMN] if column in df.columns])
+    return df.dropna(axis = 1, how = "all").reset_index(drop = True)
+
+
+def reconstruct_from_archive(archive_df : pd.DataFrame, as_of_str : str, keys : List[str], deltas : List[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Reconstruct a table from an archive as of a point in time : the latest archived full snapshot at or before as_of, 
+    the archived delta snapshots that follow it, then the given (not archived) deltas.
+    Returns None if the archive has no full snapshot at or before as_of.
+    """
+    if archive_df is None or archive_df.empty:
+        return None
+    snapshot_ids = sorted([snapshot_id for snapshot_id in archive_df[ARCHIVE_SNAPSHOT_COLUMN].unique()
+                           if snapshot_timestamp(snapshot_id) <= as_of_str], key = snapshot_timestamp)
+    base_ids = [snapshot_id for snapshot_id in snapshot_ids if not snapshot_id.endswith(DELTA_MARKER)]
+    if not base_ids:
+        return None
+
+    df = get_archived_snapshot(archive_df, base_ids[-1])
+    if DELTA_OP_COLUMN in df.columns:
+        df = df.drop(columns = [DELTA_OP_COLUMN])
+    archived_deltas = [get_archived_snapshot(archive_df, snapshot_id) for snapshot_id in snapshot_ids[snapshot_ids.index(base_ids[-1]) + 1:]]
+    for delta in archived_deltas + list(deltas or []):
+        df = apply_table_delta(df, delta, keys)
+    return df
+
+
+###################
+# Delta snapshots #
+###################
+
+def _row_key(row : dict, keys : List[str]) -> tuple:
+    return tuple(_normalize(row[key]) for key in keys)
+
+
+def _row_signature(row : dict, columns : List[str]) -> str:
+    return json.dumps([_normalize(row[column]) for column in columns], default = str)
+
+
+def compute_table_delta(previous : pd.DataFrame, current : pd.DataFrame, keys : List[str]) -> pd.DataFrame:
+    """
+    Return the rows of current that were inserted or updated since previous (op upsert) and the keys of the rows 
+    that were deleted (op delete), keyed by the natural key of the table.
+    Returns None if the tables cannot be delta encoded (columns changed, missing or duplicated keys).
+    """
+    if set(previous.columns) != set(current.columns) or DELTA_OP_COLUMN in current.columns:
+        return None
+    if not keys or not set(keys).issubset(current.columns):
+        return None
+    if previous.duplicated(subset = keys).any() or current.duplicated(subset = keys).any():
+        return None
+
+    columns = list(current.columns)
+    previous_signatures = {_row_key(row, keys) : _row_signature(row, columns) for row in previous.to_dict("records")}
+    current_keys = set()
+    is_upsert = []
+    for row in current.to_dict("records"):
+        key = _row_key(row, keys)
+        current_keys.add(key)
+        is_upsert.append(previous_signatures.get(key) != _row_signature(row, columns))
+
+    parts = [current[is_upsert].assign(**{DELTA_OP_COLUMN : DELTA_UPSERT})]
+    deleted_keys = [key for key in previous_signatures.keys() if key not in current_keys]
+    if deleted_keys:
+        parts.append(pd.DataFrame(deleted_keys, columns = keys).assign(**{DELTA_OP_COLUMN : DELTA_DELETE}))
+    return pd.concat(parts, ignore_index = True) if len(parts) > 1 else parts[0].reset_index(drop = True)
+
+
+def apply_table_delta(base : pd.DataFrame, delta : pd.DataFrame, keys : List[str]) -> pd.DataFrame:
+    """
+    Apply a delta computed by compute_table_delta to a table.
+    """
+    if delta.empty:
+        return base
+    delta_keys = set(zip(*[delta[key].map(_normalize) for key in keys]))
+    base_keys = zip(*[base[key].map(_normalize) for key in keys])
+    kept = base[[key not in delta_keys for key in base_keys]]
+
+    upserts = delta[delta[DELTA_OP_COLUMN] == DELTA_UPSERT].drop(columns = [DELTA_OP_COLUMN]).reindex(columns = base.columns)
+    for column, dtype in base.dtypes.items():
+        # Delete rows can change the dtype of the delta columns (Ex : int -> float), restore the table dtypes
+        if upserts[column].dtype != dtype:
+            try:
+                upserts[column] = upserts[column].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+    if upserts.empty:
+        return kept.reset_index(drop = True)
+    if kept.empty:
+        return upserts.reset_index(drop = True)
+    return pd.concat([kept, upserts], ignore_index = True)
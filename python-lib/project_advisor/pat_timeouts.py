@@ -0,0 +1,156 @@
+# PAT Timeouts & time budgets
+
+import contextvars
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from project_advisor.pat_logging import logger
+
+
+class PATTimeoutError(TimeoutError):
+    """
+    Raised when an assessment, a project or a run exceeds its time budget.
+    """
+
+
+class RunDeadline():
+    """
+    Wall clock time budget, nested within the budget of its parent (Ex : a project within the run).
+    - A budget of None or 0 is unlimited, the time left is then the time left to the parent.
+    - The budget starts when start() is called, or on creation with started = True.
+    """
+
+    def __init__(self, timeout : Optional[float] = None, parent : "RunDeadline" = None, name : str = "Run", started : bool = True):
+        self.timeout = float(timeout) if timeout else None
+        self.parent = parent
+        self.name = name
+        self.start_time : Optional[float] = time.monotonic() if started else None
+
+    @classmethod
+    def from_run_config(cls, run_config : dict) -> "RunDeadline":
+        """
+        Build the time budget of a run from the run_timeout run config parameter, started now.
+        """
+        return cls(run_config.get("run_timeout", None), name = "Run")
+
+    def start(self) -> "RunDeadline":
+        """
+        Start the budget, if not started yet.
+        """
+        if self.start_time is None:
+            self.start_time = time.monotonic()
+        return self
+
+    def own_remaining(self) -> Optional[float]:
+        if self.timeout is None:
+            return None
+        if self.start_time is None:
+            return self.timeout
+        return max(self.timeout - (time.monotonic() - self.start_time), 0)
+
+    def remaining(self) -> Optional[float]:
+        """
+        Return the time left in seconds, within the parent budgets. None if unlimited.
+        """
+        return self.clamp(self.own_remaining(), include_self = False)
+
+    def clamp(self, timeout : Optional[float], include_self : bool = True) -> Optional[float]:
+        """
+        Return the smallest of a timeout & the time left to the budget (None if both are unlimited).
+        """
+        limits = [timeout]
+        if include_self:
+            limits.append(self.own_remaining())
+        if self.parent is not None:
+            limits.append(self.parent.remaining())
+        limits = [limit for limit in limits if limit is not None]
+        return min(limits) if limits else None
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def reason(self) -> str:
+        """
+        Describe the budget that has been exhausted, outermost first.
+        """
+        if self.parent is not None and self.parent.expired():
+            return self.parent.reason()
+        return f"{self.name} timeout of {round(self.timeout, 1):g}s reached"
+
+    def check(self) -> None:
+        """
+        Raise a PATTimeoutError if the budget is exhausted.
+        """
+        if self.expired():
+            raise PATTimeoutError(self.reason())
+
+
+def call_with_timeout(fn : Callable[[], Any], timeout : Optional[float], name : str) -> Any:
+    """
+    Call fn, raising a PATTimeoutError if it does not return within timeout seconds (no timeout if None).
+    Python threads cannot be killed : a call that times out keeps running in a daemon thread & its result is dropped,
+    but the caller (Ex : a pool slot) is released. The call runs within a copy of the caller's context.
+    The number of timed out calls still running is capped (see TimedOutCalls), calls are refused above the cap.
+    """
+    if timeout is None:
+        return fn()
+    timed_out_calls.check(name)
+
+    outcome = {}
+    def target():
+        try:
+            outcome["result"] = fn()
+        except BaseException as error:
+            outcome["error"] = error
+
+    thread = threading.Thread(target = contextvars.copy_context().run, args = (target,), name = f"pat-timeout-{name}", daemon = True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        running = timed_out_calls.add(thread)
+        logger.warning(f"{name} timed out after {round(timeout, 1):g}s, leaving it running in the background ({running} timed out calls still running)")
+        raise PATTimeoutError(f"{name} timed out after {round(timeout, 1):g}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+class TimedOutCalls():
+    """
+    Timed out calls still running in the background, each of them can keep making API calls after its slot is freed.
+    Above max_running, new timed calls are refused (PATTimeoutError) until some of them end, so repeated timeouts cannot pile up.
+    """
+
+    def __init__(self, max_running : int = 16):
+        self.max_running = max_running
+        self.total = 0
+        self._threads : List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def running(self) -> int:
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            return len(self._threads)
+
+    def add(self, thread : threading.Thread) -> int:
+        """
+        Track a timed out call, returns the number of timed out calls still running.
+        """
+        with self._lock:
+            self._threads.append(thread)
+            self.total += 1
+        return self.running()
+
+    def check(self, name : str) -> None:
+        """
+        Raise a PATTimeoutError if too many timed out calls are still running.
+        """
+        running = self.running()
+        if running >= self.max_running:
+            raise PATTimeoutError(f"{name} not started : {running} timed out calls are still running in the background")
+
+
+# Init tracking of the timed out calls shared by all the assessments of the process
+timed_out_calls = TimedOutCalls()
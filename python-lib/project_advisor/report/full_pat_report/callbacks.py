@@ -18,6 +18,7 @@ from project_advisor.report.full_pat_report.tools import (enrich_project_list,
 from project_advisor.report.full_pat_report.tabs.single_pat_report import (generate_layout_single_pat, generate_project_details)
 from project_advisor.report.full_pat_report.tabs.batch_pat_report import (generate_layout_batch_pat, generate_batch_details)
 from project_advisor.report.full_pat_report.tabs.instance_pat_report import (generate_layout_instance_pat, generate_instance_details)
+from project_advisor.report.full_pat_report.tabs.profiling_pat_report import (generate_layout_profiling_pat, generate_profiling_details)
 
 def get_authenticated_user_id():
     """
@@ -45,6 +46,7 @@ def load_callbacks(app, data):
     list_pat_project_ids = data["list_pat_project_ids"]
     
     has_instance_report = data["has_instance_report"]
+    run_profiles = data["run_profiles"]
     
     user_to_project_df = data["user_to_project_df"]
     status_to_project = data["status_to_project"]
@@ -82,8 +84,13 @@ def load_callbacks(app, data):
         else:
             instance_pat_tab = {'label': html.Span(['Instance Assessment Tool', html.I(className="fas fa-lock", style={'margin-left': '10px'})]), 'value': 'instance', 'disabled': True}
         
+        if user_is_admin(user_login) and run_profiles: # Run profiles cover all the projects, admin only.
+            profiling_pat_tab = {'label': 'Run Profiling', 'value': 'profiling'}
+        else:
+            profiling_pat_tab = {'label': html.Span(['Run Profiling', html.I(className="fas fa-lock", style={'margin-left': '10px'})]), 'value': 'profiling', 'disabled': True}
+        
         # Define drop down options
-        options = [project_pat_tab, batch_pat_tab, instance_pat_tab]
+        options = [project_pat_tab, batch_pat_tab, instance_pat_tab, profiling_pat_tab]
         
         main_drop_down = dcc.Dropdown(
                                     id='layout-dropdown',
@@ -154,7 +161,23 @@ def load_callbacks(app, data):
         # Instance PAT Settings
         instance_pat_settings = html.Div("The Instance PAT report is not configurable.", id = "instance-pat-settings", style = {'display': 'none'}) # Hide by default
         
-        tab_settings = [single_pat_settings, batch_pat_settings, instance_pat_settings]
+        # Run Profiling Settings
+        options_run = [{'label': run_id, 'value': run_id} for run_id in run_profiles.keys()]
+        profiling_pat_settings = html.Div([
+                    html.P("Please select a run:", style={"color": "white", "font-size": 14}),
+                    dcc.Dropdown(
+                        id='profile-run-dropdown',
+                        options=options_run,
+                        value=options_run[0]['value'] if options_run else None, # Latest run
+                        placeholder="Select a run",
+                        className='mb-3',
+                        style=styles["dropdown_style"],
+                    )],
+                id = "profiling-pat-settings",
+                style = {'display': 'none'} # Hide by default
+        )
+        
+        tab_settings = [single_pat_settings, batch_pat_settings, instance_pat_settings, profiling_pat_settings]
      
         return f"Hello {user_name}", main_drop_down, tab_settings 
   
@@ -167,17 +190,19 @@ def load_callbacks(app, data):
          Output('single-pat-settings', 'style'),
          Output('batch-pat-settings', 'style'),
          Output('instance-pat-settings', 'style'),
+         Output('profiling-pat-settings', 'style'),
         ],
         [Input('layout-dropdown', 'value'),
          Input('project-dropdown', 'value'),
          Input('project-status-dropdown', 'value'),
          Input('project-tag-dropdown', 'value'),
+         Input('profile-run-dropdown', 'value'),
          
          # All all extra report settings here 
         ],
         prevent_initial_call=True
     )
-    def update_main_content(selected_tool, selected_project, status_filter, tag_filter):
+    def update_main_content(selected_tool, selected_project, status_filter, tag_filter, selected_run):
         """
         Update main content
         """
@@ -196,6 +221,8 @@ def load_callbacks(app, data):
             logging.info("project-tag-dropdown has been updated")
         elif ctx.triggered_id == "project-status-dropdown":
             logging.info("project-status-dropdown has been updated")
+        elif ctx.triggered_id == "profile-run-dropdown":
+            logging.info("profile-run-dropdown has been updated")
         elif ctx.triggered_id == "layout-dropdown":
             logging.info("layout-dropdown has been updated")
         else:
@@ -217,7 +244,7 @@ def load_callbacks(app, data):
         logging.info(f"Final nbr of projects available to users : {len(user_project_list)}")
         
         
-        tab_setting_display = [{'display': 'none'},  {'display': 'none'},  {'display': 'none'}]
+        tab_setting_display = [{'display': 'none'},  {'display': 'none'},  {'display': 'none'},  {'display': 'none'}]
         
         # Determine which input triggered the callback
         if not ctx.triggered or selected_tool == 'project':
@@ -249,6 +276,12 @@ def load_callbacks(app, data):
             display = generate_layout_instance_pat(list_pat_projects_enriched, data)
             details = generate_instance_details(list_pat_projects_enriched, data)
         
+        elif selected_tool == 'profiling':
+            logging.info(f"Display layout for Run Profiling Report for run {selected_run}")
+            tab_setting_display[3] = {'display': 'block'}
+            display = generate_layout_profiling_pat(selected_run, data)
+            details = generate_profiling_details(selected_run, data)
+        
         else:
             logging.info("WARNING : selected_tool is not compatible")
             display = None
@@ -575,6 +575,82 @@ def metric_evolution(df : pd.DataFrame) -> go.Figure:
     )
 
     return fig
+
+
+def create_profile_table(df : pd.DataFrame, page_size : int = 15) -> dash_table.DataTable:
+    """
+    Sortable & filterable table of a run profile, times are rounded to the ms.
+    """
+    logger.info(f"Building create_profile_table")
+    df = df.round(3)
+    return dash_table.DataTable(
+        columns=[{"name": format_name(i), "id": i} for i in df.columns],
+        data=df.to_dict('records'),
+        sort_action='native',
+        filter_action='native',
+        page_size=page_size,
+        style_table={'overflowX': 'auto'},
+        style_cell={'textAlign': 'left', 'padding': '5px', 'font-family': font_family},
+        style_as_list_view=True,
+        style_header={
+            'backgroundColor': 'white',
+            'fontWeight': 'bold'
+        },
+    )
+
+def stage_time_bars(stages : List[dict]) -> go.Figure:
+    """
+    Wall clock & total time (summed over the projects run in parallel) per run stage.
+    input : stages of a run profile
+    """
+    logger.info(f"Building stage_time_bars")
+    df = pd.DataFrame(stages, columns = ["stage", "wall_time", "total_time"])
+    df = df.melt(id_vars = "stage", value_vars = ["wall_time", "total_time"], var_name = "time", value_name = "seconds")
+    df["time"] = df["time"].map(format_name)
+    fig = px.bar(df, 
+                 x="stage", 
+                 y="seconds", 
+                 color="time", 
+                 barmode="group",
+                 color_discrete_sequence=base_colors,
+                 title="")
+    fig.update_layout(plot_bgcolor='white', 
+                      font=dict(family=font_family, size=14),
+                      xaxis=dict(title=None),
+                      yaxis=dict(title='Seconds', showgrid=True, gridcolor='LightGray'),
+                      legend=dict(title=None),
+                      height=350,
+                      margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+def critical_path_chart(critical_path : List[dict]) -> go.Figure:
+    """
+    Gantt chart of the spans on the critical path of a run, in seconds from the start of the run.
+    input : critical_path of a run profile
+    """
+    logger.info(f"Building critical_path_chart")
+    df = pd.DataFrame(critical_path, columns = ["stage", "project_id", "start", "duration"])
+    df["label"] = [f"{i + 1}. {stage} {project_id}".strip() for i, (stage, project_id) in enumerate(zip(df["stage"], df["project_id"]))] # Unique, waits repeat
+    stage_colors = {stage : base_colors[i % len(base_colors)] for i, stage in enumerate(df["stage"].unique())}
+    stage_colors["wait"] = styles["colors"]["GRAY"]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=df["label"],
+        x=df["duration"],
+        base=df["start"],
+        orientation='h',
+        marker=dict(color=df["stage"].map(stage_colors)),
+        hovertemplate='%{y}<br>Start: %{base:.1f}s<br>Duration: %{x:.1f}s<extra></extra>'
+    ))
+    fig.update_layout(plot_bgcolor='white', 
+                      font=dict(family=font_family, size=14),
+                      xaxis=dict(title='Seconds from the start of the run', showgrid=True, gridcolor='LightGray'),
+                      yaxis=dict(title=None, autorange='reversed', type='category'),
+                      showlegend=False,
+                      height=max(250, 30 * len(df)),
+                      margin=dict(l=10, r=10, t=10, b=10))
+    return fig
             
     
 def generate_colors(num_categories):
@@ -4,11 +4,13 @@ import dataiku
 
 from project_advisor.assessments.config_builder import DSSAssessmentConfigBuilder
 from project_advisor.pat_backend import PATBackendClient
+from project_advisor.pat_clients import client_factory
 
 def setup_configs(plugin_config : dict) -> None:
     # Set admin client
-    admin_client = DSSAssessmentConfigBuilder.build_admin_design_client(plugin_config)
     run_config = DSSAssessmentConfigBuilder.build_run_config(plugin_config)
+    client_factory.configure(run_config)
+    admin_client = DSSAssessmentConfigBuilder.build_admin_design_client(plugin_config)
     
     configs["client"] = admin_client    
     configs["pat_backend_client"] = PATBackendClient(dss_client = admin_client,run_config = run_config) # Not use so far
@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 
 from project_advisor.pat_logging import logger
+from project_advisor.pat_storage import read_table
 
 from project_advisor.report.full_pat_report.config import configs
 from project_advisor.report.full_pat_report.tools import (get_status_to_project_mapping,
@@ -28,8 +29,7 @@ def load_report_from_folder(folder_handle : dataiku.Folder, folder_path : str, n
     for file_path in files[:n]:
         logger.debug(f"loading file {file_path}")
         try:
-            with folder_handle.get_download_stream(file_path) as stream:
-                reports.append(pd.read_csv(stream))
+            reports.append(read_table(folder_handle, file_path)) # CSV or compressed CSV
         except pd.errors.EmptyDataError:
             logger.debug(f"file {file_path} is empty, skipping")
     if reports:
@@ -37,6 +37,32 @@ def load_report_from_folder(folder_handle : dataiku.Folder, folder_path : str, n
     else:
         return None
 
+def load_run_profiles_from_folder(folder_handle : dataiku.Folder, n : int) -> dict:
+    """
+    Load the profiles of the last n runs (run id -> run profile, API profile & assessment runtimes), the latest run first.
+    """
+    files = [f for f in folder_handle.list_paths_in_partition() if f.startswith("/profiles/")]
+    run_ids = sorted({f.split("/")[2] for f in files}, reverse = True)[:n]
+    profiles = {}
+    for run_id in run_ids:
+        run_files = [f for f in files if f.startswith(f"/profiles/{run_id}/")]
+        profile = {"run_profile" : None, "api_profile" : None, "assessment_runtimes" : None}
+        try:
+            for file_path in run_files:
+                filename = file_path.split("/")[-1]
+                if filename == "run_profile.json":
+                    profile["run_profile"] = folder_handle.read_json(file_path)
+                elif filename == "api_profile.json":
+                    profile["api_profile"] = folder_handle.read_json(file_path)
+                elif filename.startswith("assessment_runtimes"):
+                    profile["assessment_runtimes"] = read_table(folder_handle, file_path)
+        except Exception as error:
+            logger.warning(f"Failed to load the profile of run {run_id} : {type(error).__name__}:{str(error)}")
+            continue
+        if profile["run_profile"] is not None:
+            profiles[run_id] = profile
+    return profiles
+
 
 def load_pat_report_data(input_config):
     """
@@ -57,6 +83,8 @@ def load_pat_report_data(input_config):
     instance_metric_df = load_report_from_folder(pat_report_folder,"/metrics/instance", last_n_reports)
     project_metric_df = load_report_from_folder(pat_report_folder,"/metrics/project", last_n_reports)
     logger.info(f"Input Metric & Check Reports have been loaded")
+    run_profiles = load_run_profiles_from_folder(pat_report_folder, last_n_reports)
+    logger.info(f"{len(run_profiles)} run profiles have been loaded")
 
     has_instance_report = True if instance_check_df is not None else False
     logger.info(f"Webapp is running on instance report datasets : {has_instance_report}")
@@ -118,7 +146,9 @@ def load_pat_report_data(input_config):
         "severity_by_instance_df" : severity_by_instance_df,
         "instance_check_with_tag_df" : instance_check_with_tag_df,
         "severity_by_instance_tag_df" : severity_by_instance_tag_df,
-        "instance_metric_df" : instance_metric_df
+        "instance_metric_df" : instance_metric_df,
+
+        "run_profiles" : run_profiles
     }
     logger.info("All data is loaded and precomputed!")
     return data
\ No newline at end of file
@@ -33,7 +33,10 @@ def build_layout(input_config, data):
                                         dcc.Dropdown(id = "project-tag-dropdown")
                                     ],id = "batch-pat-settings"
                                 ),
-                                html.Div([],id = "instance-pat-settings")
+                                html.Div([],id = "instance-pat-settings"),
+                                html.Div([
+                                        dcc.Dropdown(id = "profile-run-dropdown")
+                                    ],id = "profiling-pat-settings")
                              ],
                              id="layout-settings-container"
                     ),
@@ -0,0 +1,146 @@
+# Run Profiling Report Generation (in the main display)
+
+from dash import dcc, html
+import dash_bootstrap_components as dbc
+import pandas as pd
+from typing import Dict, Any, Optional
+
+from project_advisor.pat_logging import logger
+
+from project_advisor.report.full_pat_report.style import styles
+
+from project_advisor.report.full_pat_report.components import (create_profile_table,
+                                                               stage_time_bars,
+                                                               critical_path_chart
+                                                              )
+
+
+def build_profile_card(header : str, content, md : int = 12) -> dbc.Col:
+    """
+    Card of the profiling tab.
+    """
+    return dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader(header, style={"font-size": 20}),
+                    dbc.CardBody([content]),
+                ], className="mb-4"),
+            ], md=md)
+
+def no_profile_data(message : str) -> html.P:
+    return html.P(message, className="text-muted")
+
+
+def generate_layout_profiling_pat(run_id : Optional[str], data : Dict[str, Any]):
+    """
+    Generate Layout for the Run Profiling TAB
+    """
+    logger.info(f"Generate Layout for the Run Profiling TAB for run {run_id}")
+
+    run_profiles = data["run_profiles"]
+    if not run_profiles:
+        return html.Div([
+                    html.Div("No run profile found in the PAT report folder, profiles are saved by the Batch & Instance PAT runs.", style=styles["homepage_single_pat"])
+                ], style=styles["div_homepage_single_pat"])
+
+    run_id = run_id if run_id in run_profiles else next(iter(run_profiles)) # Latest run by default
+    run_profile = run_profiles[run_id]["run_profile"]
+    api_profile = run_profiles[run_id]["api_profile"]
+    assessment_runtimes_df = run_profiles[run_id]["assessment_runtimes"]
+
+    # Time per stage & critical path
+    stages = run_profile.get("stages", [])
+    critical_path = run_profile.get("critical_path", [])
+    fig_stages = dcc.Graph(figure=stage_time_bars(stages)) if stages else no_profile_data("No stage recorded.")
+    fig_critical_path = dcc.Graph(figure=critical_path_chart(critical_path)) if critical_path else no_profile_data("No stage recorded.")
+
+    # Assessment runtimes, the most time consuming first
+    if assessment_runtimes_df is not None and len(assessment_runtimes_df) > 0:
+        table_assessment_runtimes = create_profile_table(assessment_runtimes_df)
+    else:
+        table_assessment_runtimes = no_profile_data("No assessment runtime recorded.")
+
+    # Slowest projects
+    slowest_projects = run_profile.get("slowest_projects", [])
+    table_slowest_projects = create_profile_table(pd.DataFrame(slowest_projects), page_size = 10) if slowest_projects else no_profile_data("No project recorded.")
+
+    # API calls per endpoint
+    if api_profile and api_profile.get("endpoints"):
+        endpoints_df = pd.DataFrame(api_profile["endpoints"]).drop(columns = ["histogram"], errors = "ignore")
+        table_endpoints = create_profile_table(endpoints_df, page_size = 10)
+    else:
+        table_endpoints = no_profile_data("No API call recorded.")
+
+    run_duration = run_profile.get("duration", 0)
+    critical_wait = sum(span["duration"] for span in critical_path if span["stage"] == "wait")
+
+    # Layout structure
+    layout = dbc.Row([
+        dbc.Col([
+
+            # Row containing the run summary
+            dbc.Row(
+                [
+                    dbc.Col(
+                        html.Div(
+                            [
+                                html.Span("Run duration: ", style={"font-weight": "bold", "font-size": 20}),
+                                html.Span(f"{run_duration:.1f}s", id="run_duration"),
+                                html.Span(f" (waiting on the critical path: {critical_wait:.1f}s)", style={"font-size": "14px"}),
+                            ],
+                            style={"font-size": "16px"},
+                        ),
+                        width=6,
+                    ),
+                    dbc.Col(
+                        html.Div(
+                            [
+                                html.Span("Run: ", style={"font-weight": "bold", "font-size": 20}),
+                                html.Span(run_id, id="profile_run_id"),
+                            ],
+                            style={"font-size": "16px", "text-align": "right"},
+                        ),
+                        width=6,
+                    ),
+                ],
+                className="align-items-center",
+                style= {"margin-bottom": "20px"}
+            ),
+
+            # Time per stage & critical path
+            dbc.Row([
+                build_profile_card("Time per stage", fig_stages, md=5),
+                build_profile_card("Critical path", fig_critical_path, md=7),
+            ]),
+
+            # Assessments to optimize or disable
+            html.H3("Assessment runtimes", className="display-6", style={"padding": "10px", "font-size": "24px"}),
+            html.P("Runtimes in seconds over all the projects of the run, the most time consuming assessments first.", style={"padding": "10px", "font-style": "italic"}),
+            dbc.Row([
+                build_profile_card("Runtime per assessment", table_assessment_runtimes),
+            ]),
+
+            # Projects & API calls
+            html.H3("Projects & API calls", className="display-6", style={"padding": "10px", "font-size": "24px"}),
+            dbc.Row([
+                build_profile_card("Slowest projects (seconds per stage)", table_slowest_projects),
+            ]),
+            dbc.Row([
+                build_profile_card("API calls per endpoint (latencies in seconds)", table_endpoints),
+            ]),
+        ], style=styles["content_page"])
+    ], style=styles["content_page_row"])
+
+    return layout
+
+def generate_profiling_details(run_id : Optional[str], data : Dict[str, Any]):
+    """
+    Run Profiling Details to be displayed in the side Bar.
+    """
+    logger.info("Generate generate_profiling_details")
+
+    run_profiles = data["run_profiles"]
+    if not run_profiles:
+        return "No run profile available."
+    run_id = run_id if run_id in run_profiles else next(iter(run_profiles))
+    nbr_projects = len(run_profiles[run_id]["run_profile"].get("slowest_projects", []))
+    return f"Run profile of {run_id} : {len(run_profiles)} profiled runs available, the {nbr_projects} slowest projects shown."
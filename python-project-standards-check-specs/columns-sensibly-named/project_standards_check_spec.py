@@ -4,116 +4,8 @@ from dataiku.project_standards import (
 )
 from collections import defaultdict
 from project_advisor.pat_tools import md_print_list
-import re
-from typing import List, Optional, Set
-
-
-def _parse_allowed_from_charclass_pattern(pattern: str) -> Optional[Set[str]]:
-    """
-    Parse simple charclass forms like: ^[a-z0-9_]+$ and build an allowed ASCII set.
-    Returns None if the pattern is more complex (fallback will handle).
-    """
-    m = re.match(r'^\^\[([^\]]+)\][+*]\$$', pattern or "")
-    if not m:
-        return None
-    body = m.group(1)
-    allowed: Set[str] = set()
-    i = 0
-    while i < len(body):
-        ch = body[i]
-        # escaped char
-        if ch == '\\' and i + 1 < len(body):
-            allowed.add(body[i + 1])
-            i += 2
-            continue
-        # range a-z / 0-9
-        if i + 2 < len(body) and body[i + 1] == '-' and body[i + 2] not in (']',):
-            start, end = ord(body[i]), ord(body[i + 2])
-            if start <= end:
-                for c in range(start, end + 1):
-                    allowed.add(chr(c))
-            i += 3
-            continue
-        # literal
-        allowed.add(ch)
-        i += 1
-    return allowed
-
-
-def diagnose_nonmatch(name: str, pattern: str) -> List[str]:
-    """
-    Return human-readable reasons why 'name' failed 'pattern'.
-    If the only issue is the presence of spaces, return just ["contains spaces"].
-    """
-    reasons: List[str] = []
-    if name == "":
-        return ["empty/blank name"]
-
-    # Detect spaces (not generic whitespace)
-    has_spaces = (' ' in name)
-    if has_spaces:
-        reasons.append("contains spaces")
-        # Note: we'll compress to only ["contains spaces"] at the end if that's the sole issue
-        if name != name.strip(' '):
-            reasons.append("leading/trailing whitespace")
-
-    # Non-ASCII
-    if any(not c.isascii() for c in name):
-        reasons.append("contains non-ASCII characters")
-
-    # Starts-with rules
-    if pattern.startswith('^[A-Za-z]') or pattern.startswith('^[a-zA-Z]'):
-        if not re.match(r'^[A-Za-z]', name or ""):
-            reasons.append("must start with a letter")
-
-    # Lowercase-only heads (e.g., ^[a-z][a-z0-9_]*$)
-    if pattern.startswith('^[a-z]') and re.search(r'[A-Z]', name):
-        reasons.append("uppercase letters not allowed")
-
-    # Character-class analysis (ignore spaces when categorizing special chars)
-    allowed = _parse_allowed_from_charclass_pattern(pattern or "")
-    if allowed is not None:
-        offenders = {c for c in name if c not in allowed}
-        offenders_no_space = offenders - {' '}  # <-- key change: ignore spaces here
-
-        if offenders_no_space:
-            if any(c in "-–—" for c in offenders_no_space):
-                reasons.append("contains hyphen/dash")
-            if "." in offenders_no_space:
-                reasons.append("contains dot")
-            if any(c in "/\\" for c in offenders_no_space):
-                reasons.append("contains slash or backslash")
-            if any(c in "'\"" for c in offenders_no_space):
-                reasons.append("contains quotes")
-            if any(c in "()[]{}" for c in offenders_no_space):
-                reasons.append("contains brackets/parentheses")
-
-            remaining = [c for c in offenders_no_space if c not in set("-–—./\\'\"()[]{}")]
-            if remaining:
-                reasons.append(f"contains special characters: {''.join(sorted(set(remaining)))}")
-    else:
-        if not reasons:
-            reasons.append("does not satisfy the selected naming rule")
-
-    seen = set()
-    reasons = [r for r in reasons if not (r in seen or seen.add(r))]
-
-    # If spaces are the only problem, return only that reason
-    only_spaces_issue = all(r in {"contains spaces", "leading/trailing whitespace"} for r in reasons) and has_spaces
-    if only_spaces_issue:
-        return ["contains spaces"]
-
-    return reasons
-
-
-    # dedupe, preserve order
-    seen = set()
-    out = []
-    for r in reasons:
-        if r not in seen:
-            seen.add(r)
-            out.append(r)
-    return out
+from project_advisor.pat_concurrency import CostClass, map_on_lane
+from project_advisor.pat_cpu_tasks import get_non_conforming_names
 
 
 class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
@@ -136,6 +28,8 @@ class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
         If you are running Project Standards on a bundle, the temporary project is a copy of the content of the bundle.
     """
 
+    cost_class = CostClass.CPU_BOUND # Naming diagnosis runs in the process lane
+
     def _add(self, usage, dataset, where):
         if dataset:
             dataset = str(dataset).strip()
@@ -169,19 +63,15 @@ class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
 
         datasets = [dataset for dataset in self.project.list_datasets() if dataset['type'] in connections_in_scope]
 
-        # Check each dataset name
-        for dataset in datasets:
-            column_names = [item['name'] for item in dataset['schema']['columns']]
-            for column_name in column_names:
-                if re.fullmatch(pattern, column_name):
-                    continue
-                else:
-                    datasets_with_non_conforming_columns.append(dataset['name'])
-                    self._add(non_conforming_column_names, dataset['name'], column_name)
-
-                    # NEW: aggregate reasons globally
-                    for r in diagnose_nonmatch(column_name, pattern):
-                        rejection_reasons.add(r)
+        # Check the column names of each dataset, only the names are shipped to the process lane
+        columns_to_check = [(dataset['name'], [item['name'] for item in dataset['schema']['columns']], pattern) for dataset in datasets]
+        for dataset_name, non_conforming_columns in map_on_lane(self, get_non_conforming_names, columns_to_check):
+            for column_name, reasons in non_conforming_columns.items():
+                datasets_with_non_conforming_columns.append(dataset_name)
+                self._add(non_conforming_column_names, dataset_name, column_name)
+
+                # NEW: aggregate reasons globally
+                rejection_reasons.update(reasons)
 
         non_conforming_column_names = dict(non_conforming_column_names)
         total_non_conforming_columns = sum(len(v) for v in non_conforming_column_names.values())
@@ -41,7 +41,7 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
             )
 
         pat_backend_client.load_latest(["plugins_usage"])
-        plugins_usage = pat_backend_client.get_table("plugins_usage")
+        plugins_usage = pat_backend_client.get_rows("plugins_usage", project_key = self.original_project_key)
         
         if plugins_usage is None:
             return ProjectStandardsCheckRunResult.not_applicable(
@@ -49,15 +49,10 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
                 details = details
             ) 
         
-        plugins_usage = plugins_usage[plugins_usage["project_key"] == self.original_project_key]
-        used_plugins = set(plugins_usage["plugin_id"])
-        plugins_usage.drop_duplicates()
         project_plugin_usage = {}
-        for plugin_id in used_plugins:
-            uses = []
-            for idx, row in plugins_usage[plugins_usage["plugin_id"] == plugin_id].iterrows():
-                uses.append((row["object_type"], row["object_id"]))
-            project_plugin_usage[plugin_id] = uses
+        for plugin_id, object_type, object_id in zip(plugins_usage["plugin_id"], plugins_usage["object_type"], plugins_usage["object_id"]):
+            project_plugin_usage.setdefault(plugin_id, []).append((object_type, object_id))
+        used_plugins = set(project_plugin_usage.keys())
         details["all_plugin_usage"] = project_plugin_usage
  
         if not used_plugins:
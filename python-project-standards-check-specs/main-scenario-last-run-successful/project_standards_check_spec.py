@@ -3,6 +3,7 @@ from dataiku.project_standards import (
     ProjectStandardsCheckRunResult,
     ProjectStandardsCheckSpec,
 )
+from project_advisor.pat_clients import client_factory
 
 
 class MainScenarioLastRunSuccessfulCheckSpec(ProjectStandardsCheckSpec):
@@ -14,7 +15,7 @@ class MainScenarioLastRunSuccessfulCheckSpec(ProjectStandardsCheckSpec):
         Checks that there is a global tag category named 'Scenario Type' that has the tag 'main'.
         :return: boolean
         """
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
 
         global_tags = self.client.get_general_settings().get_raw()["globalTagsCategories"]
         if (
@@ -8,6 +8,7 @@ import re
 from collections import defaultdict
 
 from project_advisor.pat_tools import md_print_list
+from project_advisor.pat_clients import client_factory
 
 def _add(usage, env, where):
     if env:
@@ -23,7 +24,7 @@ class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
         Minimum acceptable version is used as the cutoff.
         """     
 
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
 
         details = {}
         flagged_env_names = []
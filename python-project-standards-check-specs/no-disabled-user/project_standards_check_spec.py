@@ -3,6 +3,7 @@ from dataiku.project_standards import (
     ProjectStandardsCheckRunResult,
     ProjectStandardsCheckSpec,
 )
+from project_advisor.pat_clients import client_factory
 
 
 class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
@@ -28,7 +29,7 @@ class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
         """
 
         
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
         self.source_project = self.client.get_project(self.original_project_key)
 
         disabledUsers=[]
@@ -4,6 +4,7 @@ from dataiku.project_standards import (
     ProjectStandardsCheckRunResult,
     ProjectStandardsCheckSpec,
 )
+from project_advisor.pat_clients import client_factory
 
 
 class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
@@ -32,7 +33,7 @@ class MyProjectStandardsCheckSpec(ProjectStandardsCheckSpec):
             Use `ProjectStandardsCheckRunResult.error(message)` if you want to mark the check as an error. You can also raise an Exception.
         """
 
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
 
         check_pass = False
         message = "This project does not have a scenario tagged as 'main'."
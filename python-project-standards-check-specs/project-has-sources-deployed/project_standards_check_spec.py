@@ -14,17 +14,18 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
         
         # Load all project dependencies projects
         self.pat_backend_client.load_latest(["project_dependencies"])
-        project_dependencies_df = self.pat_backend_client.get_table("project_dependencies")
-        project_dependencies_df = project_dependencies_df[project_dependencies_df["target_project_key"] == self.original_project_key]
+        project_dependencies_df = self.pat_backend_client.get_rows("project_dependencies", target_project_key = self.original_project_key)
         imported_objects = []
         shared_objs = {}
         source_projects = set()
-        for idx, shared_obj in project_dependencies_df.iterrows():
-            source_projects.add(shared_obj["source_project_key"])
-            imported_objects.append(f"{shared_obj['source_project_key']}:{shared_obj['type']}:{shared_obj['local_name']}")
-            shared_objs.setdefault(shared_obj["source_project_key"], []).append({
-                "type" : shared_obj["type"],
-                "local_name" : shared_obj["local_name"]
+        for source_project_key, object_type, local_name in zip(project_dependencies_df["source_project_key"],
+                                                               project_dependencies_df["type"],
+                                                               project_dependencies_df["local_name"]):
+            source_projects.add(source_project_key)
+            imported_objects.append(f"{source_project_key}:{object_type}:{local_name}")
+            shared_objs.setdefault(source_project_key, []).append({
+                "type" : object_type,
+                "local_name" : local_name
             })
         
         return {
@@ -37,27 +38,26 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
     def _find_all_missing_deployments_from_pat_backend(self,source_projects):
 
         self.pat_backend_client.load_latest(["project_deployments"])
-        project_deployments_df = pat_backend_client.get_table("project_deployments")
 
         # Load all deployments for the project
-        target_project_deployments_df = project_deployments_df[project_deployments_df["active_bundle_source_project_key"] == self.original_project_key]
+        target_project_deployments_df = self.pat_backend_client.get_rows("project_deployments", active_bundle_source_project_key = self.original_project_key)
         project_infras = set(target_project_deployments_df["infra_id"])
-        
-        result["project_infras"] = list(project_infras)
 
         # Load all the relevant source project deployments.
-        source_project_deployments_df = project_deployments_df[
-            project_deployments_df["deployed_project_key"].isin(source_projects) & 
-            project_deployments_df["infra_id"].isin(project_infras) & 
-            ~project_deployments_df["neverEverDeployed"]
+        source_project_deployments_df = self.pat_backend_client.get_rows_in("project_deployments", "deployed_project_key", source_projects)
+        source_project_deployments_df = source_project_deployments_df[
+            source_project_deployments_df["infra_id"].isin(project_infras) & 
+            ~source_project_deployments_df["neverEverDeployed"]
         ]
+        infra_to_deployed_projects = {}
+        for infra_id, deployed_project_key in zip(source_project_deployments_df["infra_id"], source_project_deployments_df["deployed_project_key"]):
+            infra_to_deployed_projects.setdefault(infra_id, set()).add(deployed_project_key)
 
         # Find all of the missing deployments
         all_missing_projects = {}
         missing_projects_count = 0
         for infra_id in project_infras:
-            infra_projs = source_project_deployments_df[source_project_deployments_df["infra_id"] == infra_id]
-            missing_projects_on_infra = source_projects - set(infra_projs)
+            missing_projects_on_infra = source_projects - infra_to_deployed_projects.get(infra_id, set())
             if missing_projects_on_infra:
                 missing_projects_count += 1
             all_missing_projects[infra_id] = list(missing_projects_on_infra)
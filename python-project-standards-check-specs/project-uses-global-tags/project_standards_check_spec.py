@@ -5,6 +5,7 @@ from dataiku.project_standards import (
 )
 
 from project_advisor.pat_tools import md_print_list
+from project_advisor.pat_clients import client_factory
 
 class ProjectStandardsCheck(ProjectStandardsCheckSpec):
 
@@ -12,7 +13,7 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
         """
         Check that the project only uses global tags
         """
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
 
         details = {}
         inst_tagCat= self.client.get_general_settings().get_raw()["globalTagsCategories"]
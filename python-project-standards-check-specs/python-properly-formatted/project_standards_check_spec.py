@@ -4,8 +4,8 @@ from dataiku.project_standards import (
     ProjectStandardsCheckRunResult,
     ProjectStandardsCheckSpec,
 )
-from yapf.yapflib.yapf_api import FormatCode
-from yapf.yapflib.errors import YapfError
+from project_advisor.pat_concurrency import CostClass, map_on_lane
+from project_advisor.pat_cpu_tasks import get_python_formatting_status
 
 from typing import List, Dict, Tuple
 from dataikuapi.dss.projectlibrary import DSSLibraryFile
@@ -14,6 +14,8 @@ from dataikuapi.dss.projectlibrary import DSSLibraryFolder
 
 class ProjectStandardsCheck(ProjectStandardsCheckSpec):
 
+    cost_class = CostClass.CPU_BOUND # yapf formatting runs in the process lane
+
     def _get_formatting_status(
         self, py_scripts: List[Tuple[str, str]]
     ) -> List[Dict[str, int]]:
@@ -25,26 +27,11 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
         Returns:
             List[Dict[str, int]]: Dictionary contain number of lines in script and number of lines to be formatted
         """
-        results = []
-        for script in py_scripts:
-            n_lines = script[1].count("\n")
-            try:
-                n_lines_to_format = FormatCode(
-                    script[1], print_diff=True, style_config=self.format_style
-                )[0].count("\n-")
-            except YapfError:
-                raise Exception(
-                    f"Found a syntax error in {script[0]}; unable to evaluate formatting.",
-                )
-
-            results.append(
-                {
-                    "name": script[0],
-                    "n_lines": n_lines,
-                    "n_lines_to_format": n_lines_to_format,
-                }
-            )
-        return results
+        return map_on_lane(
+            self,
+            get_python_formatting_status,
+            [(name, code, self.format_style) for name, code in py_scripts],
+        )
 
     def _get_py_files_from_dss_library(self) -> List[DSSLibraryFile]:
 
@@ -4,6 +4,7 @@ from dataiku.project_standards import (
     ProjectStandardsCheckSpec,
 )
 from project_advisor.pat_tools import md_print_list
+from project_advisor.pat_clients import client_factory
 
 class HeavilySharedDatasetsAreInCollection(ProjectStandardsCheckSpec):
 
@@ -27,7 +28,7 @@ class HeavilySharedDatasetsAreInCollection(ProjectStandardsCheckSpec):
         
         # Checking Datasets in Data Collections
         
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
         
         # Step 1: Get datasets shared in more than 2 projects
         exposed_objects = self.project.get_settings().get_raw().get("exposedObjects", {})
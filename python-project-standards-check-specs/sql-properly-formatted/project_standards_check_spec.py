@@ -5,8 +5,8 @@ from dataiku.project_standards import (
     ProjectStandardsCheckSpec,
 )
 from project_advisor.pat_tools import dss_obj_to_dss_obj_md_link
-
-import sqlfluff
+from project_advisor.pat_concurrency import CostClass, map_on_lane
+from project_advisor.pat_cpu_tasks import get_sql_formatting_status
 
 from typing import List, Dict, Tuple
 from dataikuapi.dss.projectlibrary import DSSLibraryFile
@@ -32,6 +32,8 @@ CONNECTION_TYPE_TO_SQLFLUFF_DIALECT_MAP = {
 
 class ProjectStandardsCheck(ProjectStandardsCheckSpec):
 
+    cost_class = CostClass.CPU_BOUND # sqlfluff linting runs in the process lane
+
     def _get_recipe_to_sql_dialect_mappings(self) -> List[Tuple[str, str]]:
         """
         Identifies all SQL recipes in the project and maps them to their SQL dialect based on the connection type of their input dataset.
@@ -78,20 +80,15 @@ class ProjectStandardsCheck(ProjectStandardsCheckSpec):
         Returns:
             List[Dict[str, int]]: Dictionary containing recipe name and number of lines to be formatted
         """
-        results = []
+        # Fetch the queries here (IO-bound), only the query text is shipped to the process lane
+        sql_queries = []
         for recipe in recipe_name_dialect_mappings:
             recipe_name = recipe[0]
             sql_query = self.project.get_recipe(recipe_name).get_settings().get_payload()
             sql_dialect = CONNECTION_TYPE_TO_SQLFLUFF_DIALECT_MAP.get(recipe[1], "ansi")
-            n_formatting_changes = len(sqlfluff.lint(sql_query, dialect=sql_dialect))
+            sql_queries.append((recipe_name, sql_query, sql_dialect))
 
-            results.append(
-                {
-                    "name": recipe_name,
-                    "n_formatting_changes": n_formatting_changes,
-                }
-            )
-        return results
+        return map_on_lane(self, get_sql_formatting_status, sql_queries)
 
 
     def run(self):
@@ -11,6 +11,8 @@ from project_advisor.advisors.batch_project_advisor import (
 from project_advisor.assessments.config_builder import DSSAssessmentConfigBuilder
 
 from project_advisor.pat_logging import logger, set_logging_level
+from project_advisor.pat_clients import client_factory
+from project_advisor.pat_profiling import api_profiler, run_profiler
 
 class MyRunnable(Runnable):
     """The base interface for a Python runnable"""
@@ -21,7 +23,7 @@ class MyRunnable(Runnable):
         :param config: the dict of the configuration of the object
         :param plugin_config: contains the plugin settings
         """
-        client = dataiku.api_client()
+        client = client_factory.api_client()
         
         ### INITIALISATION 
         set_logging_level(logger, plugin_config)
@@ -33,6 +35,8 @@ class MyRunnable(Runnable):
         project_tags = config.get("project_tags", [])
         pat_report_folder_id = config.get("pat_report_folder", None)
         self.rebuild_pat_backend = config.get("rebuild_pat_backend", False)
+        incremental_run = config.get("incremental_run", False)
+        resume_run_id = config.get("resume_run_id", None) or None
 
         if config.get("run_on") == "current":
             project_filters = ProjectFilters(
@@ -59,7 +63,9 @@ class MyRunnable(Runnable):
         self.batch_project_advisor = BatchProjectAdvisor(client = assessment_config.admin_design_client,
                                                     config = assessment_config, 
                                                     project_filters = project_filters,
-                                                    pat_report_folder = pat_report_folder)
+                                                    pat_report_folder = pat_report_folder,
+                                                    incremental = incremental_run,
+                                                    resume_run_id = resume_run_id)
         
     def get_progress_target(self):
         """
@@ -75,9 +81,10 @@ class MyRunnable(Runnable):
         
         if self.rebuild_pat_backend:
             logger.info("Rebuilding the PAT backend before the run")
-            self.batch_project_advisor.config.pat_backend_client.client = dataiku.api_client() # Workaround because of user API permission issue
-            self.batch_project_advisor.config.pat_backend_client.build()
-            self.batch_project_advisor.config.pat_backend_client.save()
+            self.batch_project_advisor.config.pat_backend_client.client = client_factory.api_client() # Workaround because of user API permission issue
+            with api_profiler.scope(stage = "backend"), run_profiler.span("backend"):
+                self.batch_project_advisor.config.pat_backend_client.build()
+                self.batch_project_advisor.config.pat_backend_client.save()
         else:
             logger.info("Skipping the rebuilding of the PAT backend before the run")
         
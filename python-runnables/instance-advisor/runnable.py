@@ -10,6 +10,8 @@ from project_advisor.advisors.instance_advisor import InstanceAdvisor
 from project_advisor.assessments.config_builder import DSSAssessmentConfigBuilder
 
 from project_advisor.pat_logging import logger, set_logging_level
+from project_advisor.pat_clients import client_factory
+from project_advisor.pat_profiling import api_profiler, run_profiler
 
 class MyRunnable(Runnable):
     """The base interface for a Python runnable"""
@@ -20,7 +22,7 @@ class MyRunnable(Runnable):
         :param config: the dict of the configuration of the object
         :param plugin_config: contains the plugin settings
         """
-        client = dataiku.api_client()
+        client = client_factory.api_client()
         
         ### INITIALISATION 
         set_logging_level(logger, plugin_config)
@@ -28,6 +30,8 @@ class MyRunnable(Runnable):
         # Load component specific parameters
         pat_report_folder_id = config.get("pat_report_folder",None)
         self.rebuild_pat_backend = config.get("rebuild_pat_backend", False)
+        incremental_run = config.get("incremental_run", False)
+        resume_run_id = config.get("resume_run_id", None) or None
         
         # Init Advisor
         pat_report_folder = dataiku.Folder(pat_report_folder_id)
@@ -36,7 +40,9 @@ class MyRunnable(Runnable):
         logger.info(f"Macro instantating instance advisor")
         self.instance_advisor = InstanceAdvisor(client = client, # Requires an admin client 
                                                 config = assessment_config, 
-                                                pat_report_folder = pat_report_folder)
+                                                pat_report_folder = pat_report_folder,
+                                                incremental = incremental_run,
+                                                resume_run_id = resume_run_id)
         
         logger.info(f"Macro sucessfully instantiated instance advisor")
         
@@ -55,9 +61,10 @@ class MyRunnable(Runnable):
         
         if self.rebuild_pat_backend:
             logger.info("Rebuilding the PAT backend before the run")
-            self.instance_advisor.config.pat_backend_client.client = dataiku.api_client() # Workaround because of user API permission issue
-            self.instance_advisor.config.pat_backend_client.build()
-            self.instance_advisor.config.pat_backend_client.save()
+            self.instance_advisor.config.pat_backend_client.client = client_factory.api_client() # Workaround because of user API permission issue
+            with api_profiler.scope(stage = "backend"), run_profiler.span("backend"):
+                self.instance_advisor.config.pat_backend_client.build()
+                self.instance_advisor.config.pat_backend_client.save()
         else:
             logger.info("Skipping the rebuilding of the PAT backend before the run")
         
@@ -5,6 +5,7 @@ from dataiku.runnables import Runnable
 import re
 import json
 import os
+from project_advisor.pat_clients import client_factory
 
 class MyRunnable(Runnable):
     """The base interface for a Python runnable"""
@@ -25,7 +26,7 @@ class MyRunnable(Runnable):
         self.ignore_checks = config.get("ignore_checks", False)
         self.checks_to_ignore = config.get("checks_to_ignore", [])
         
-        self.client = dataiku.api_client()
+        self.client = client_factory.api_client()
         
     def get_progress_target(self):
         """
@@ -57,7 +58,7 @@ class MyRunnable(Runnable):
         Find all the implementations of Project Standards Check Specs in a plugins and return their ID.
         """
         pat_plugin_id = "instance-insights"
-        client = dataiku.api_client()
+        client = client_factory.api_client()
         instance_info = client.get_instance_info()
         data_dir = instance_info.raw.get("dataDirPath")
         
@@ -3,6 +3,8 @@ import dataiku
 
 from project_advisor.pat_logging import logger, set_logging_level
 from project_advisor.assessments.config_builder import DSSAssessmentConfigBuilder
+from project_advisor.pat_storage import RetentionPolicy
+from project_advisor.pat_clients import client_factory
 
 class MyRunnable(Runnable):
     """The base interface for a Python runnable"""
@@ -29,12 +31,22 @@ class MyRunnable(Runnable):
         pat_backend_tables = self.config.get("pat_backend_tables")
         pat_backend_client = self.pat_config.pat_backend_client
         
-        self.pat_config.pat_backend_client.client = dataiku.api_client() # Workaround while waiting for a fix in 14.1? Needed to call the users API.
+        self.pat_config.pat_backend_client.client = client_factory.api_client() # Workaround while waiting for a fix in 14.1? Needed to call the users API.
         
-        pat_backend_client.build(data_tables = pat_backend_tables)
+        incremental_build = self.config.get("incremental_build", False)
+        pat_backend_client.build(data_tables = pat_backend_tables, incremental = incremental_build)
         pat_backend_client.save(data_tables = pat_backend_tables)
         
-        return f"The following tables have been rebuilt in folder : {pat_backend_client.backend_folder.full_name}\nTables : {', '.join(pat_backend_tables)}"
+        result = f"The following tables have been rebuilt in folder : {pat_backend_client.backend_folder.full_name}\nTables : {', '.join(pat_backend_tables)}"
+        
+        if self.config.get("run_gc", False):
+            retention_policy = RetentionPolicy(keep_last = self.config.get("retention_keep_last", 5),
+                                               keep_daily = self.config.get("retention_keep_daily", 7),
+                                               keep_weekly = self.config.get("retention_keep_weekly", 4))
+            gc_report = pat_backend_client.garbage_collect(retention_policy, compact = self.config.get("compact_old_snapshots", True))
+            result += f"\nDeleted {gc_report['deleted_files']} old snapshot(s) ({gc_report['archived_snapshots']} archived), reclaimed {round(gc_report['bytes_reclaimed'] / (1024 * 1024), 2)} MB"
+        
+        return result
         
         
         
\ No newline at end of file
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Shared fixtures of the unit tests
+
+import io
+import sys
+import json
+import types
+import contextlib
+
+import pytest
+
+
+def register_dataiku_stub() -> None:
+    """
+    Register a minimal "dataiku" module, only available within DSS, so that the PAT modules can be imported by the unit tests.
+    """
+    if "dataiku" in sys.modules:
+        return
+    try:
+        import dataiku # Running within a DSS code env
+        return
+    except ImportError:
+        pass
+
+    class ProjectStandardsCheckSpec():
+        def __init__(self, *args, **kwargs):
+            self.config = kwargs.get("config", {})
+
+    class ProjectStandardsCheckRunResult():
+        @staticmethod
+        def success(message : str = "", details : dict = None):
+            return {"run_status" : "success", "message" : message, "details" : details or {}}
+
+        @staticmethod
+        def failure(severity, message : str = "", details : dict = None):
+            return {"run_status" : "failure", "severity" : severity, "message" : message, "details" : details or {}}
+
+        @staticmethod
+        def not_applicable(message : str = "", details : dict = None):
+            return {"run_status" : "not_applicable", "message" : message, "details" : details or {}}
+
+        @staticmethod
+        def error(message : str = "", details : dict = None):
+            return {"run_status" : "error", "message" : message, "details" : details or {}}
+
+    def api_client():
+        raise RuntimeError("No DSS instance available in the unit tests")
+
+    dataiku = types.ModuleType("dataiku")
+    dataiku.Folder = type("Folder", (), {})
+    dataiku.api_client = api_client
+    dataiku.default_project_key = lambda : "UNIT_TESTS"
+    project_standards = types.ModuleType("dataiku.project_standards")
+    project_standards.ProjectStandardsCheckSpec = ProjectStandardsCheckSpec
+    project_standards.ProjectStandardsCheckRunResult = ProjectStandardsCheckRunResult
+    dataiku.project_standards = project_standards
+    sys.modules["dataiku"] = dataiku
+    sys.modules["dataiku.project_standards"] = project_standards
+
+
+register_dataiku_stub()
+
+
+class MemoryFolder():
+    """
+    In memory stand-in of a dataiku managed folder, with the methods used by the PAT storage.
+    """
+    full_name = "TEST.memory_folder"
+
+    def __init__(self):
+        self.files = {}
+
+    def _path(self, path : str) -> str:
+        return path if path.startswith("/") else "/" + path
+
+    def list_paths_in_partition(self):
+        return sorted(self.files)
+
+    @contextlib.contextmanager
+    def get_writer(self, path : str):
+        stream = io.BytesIO()
+        yield stream
+        self.files[self._path(path)] = stream.getvalue()
+
+    def get_download_stream(self, path : str):
+        return io.BytesIO(self.files[self._path(path)])
+
+    def read_json(self, path : str):
+        return json.loads(self.files[self._path(path)])
+
+    def write_json(self, path : str, obj) -> None:
+        self.files[self._path(path)] = json.dumps(obj).encode("utf-8")
+
+    def upload_data(self, path : str, data : bytes) -> None:
+        self.files[self._path(path)] = data
+
+    def delete_path(self, path : str) -> None:
+        path = self._path(path)
+        for file_path in list(self.files):
+            if file_path == path or file_path.startswith(path.rstrip("/") + "/"):
+                del self.files[file_path]
+
+    def get_path_details(self, path : str = "/"):
+        path = self._path(path)
+        return {"exists" : path in self.files, "size" : len(self.files.get(path, b"")), "lastModified" : 0}
+
+
+@pytest.fixture
+def memory_folder():
+    return MemoryFolder()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the incremental batch runs : projects re-assessed or carried forward
+
+import types
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from project_advisor.advisors.batch_project_advisor import BatchProjectAdvisor
+from project_advisor.pat_storage import CSVTableFormat, write_table
+
+PREVIOUS_TS = "2024-01-01T00:00:00"
+
+
+class FakeProjectAdvisor():
+    def __init__(self, project_key : str, metric_names : list):
+        self.project = types.SimpleNamespace(project_key = project_key)
+        self.metrics = [types.SimpleNamespace(name = metric_name) for metric_name in metric_names]
+        self.checks = None
+
+
+def build_advisor(folder, project_versions : dict, check_configs : dict = None, metric_names : list = ("nbr_recipes",), 
+                  project_standards_checks : list = ("PROJECT:has_wiki",)) -> BatchProjectAdvisor:
+    """
+    Batch advisor on fake projects, without DSS instance.
+    """
+    checks = [types.SimpleNamespace(check_element_type = check.split(":")[0], name = check.split(":")[1]) for check in project_standards_checks]
+    project_standards = types.SimpleNamespace(list_checks = lambda : checks)
+    advisor = BatchProjectAdvisor.__new__(BatchProjectAdvisor)
+    advisor.config = types.SimpleNamespace(config = {"check_configs" : check_configs or {"max_nbr_recipes" : 10}, "run_config" : {}},
+                                           pat_backend_client = types.SimpleNamespace(get_project_versions = lambda : project_versions),
+                                           admin_design_client = types.SimpleNamespace(get_project_standards = lambda : project_standards))
+    advisor.pat_report_folder = folder
+    advisor.project_advisors = [FakeProjectAdvisor(project_key, metric_names) for project_key in project_versions]
+    advisor.config_hash = None
+    advisor.project_fingerprints = {}
+    advisor.previous_incremental_state = {}
+    advisor.carried_forward_reports = {}
+    advisor.carried_forward_max_severity = None
+    return advisor
+
+
+@pytest.fixture
+def previous_run(memory_folder):
+    """
+    Report & incremental state of a previous run that assessed A, B & D, D having no check rows.
+    """
+    previous_advisor = build_advisor(memory_folder, {"A" : "v1", "B" : "v1", "D" : "v1"})
+    write_table(memory_folder, f"/metrics/project/{PREVIOUS_TS}.csv", pd.DataFrame({"project_id" : ["A", "B", "D"], "value" : [1, 2, 3]}), CSVTableFormat())
+    write_table(memory_folder, f"/checks/project/{PREVIOUS_TS}.csv", pd.DataFrame({"project_id" : ["A", "A", "B"], "severity" : [1, 3, 4]}), CSVTableFormat())
+    memory_folder.write_json(BatchProjectAdvisor.incremental_state_path, {
+        "config_hash" : previous_advisor.get_config_hash(),
+        "projects" : {project_key : {"fingerprint" : "v1", "timestamp" : PREVIOUS_TS} for project_key in ["A", "B", "D"]}
+    })
+    return memory_folder
+
+
+def assessed_project_keys(advisor : BatchProjectAdvisor) -> list:
+    return [pa.project.project_key for pa in advisor.project_advisors]
+
+
+def test_unchanged_projects_are_carried_forward(previous_run):
+    advisor = build_advisor(previous_run, {"A" : "v1", "B" : "v2", "C" : "v1", "D" : "v1"}) # B changed, C new
+
+    advisor.plan_incremental_run()
+
+    assert assessed_project_keys(advisor) == ["B", "C", "D"] # D has no checks in the previous report
+    assert advisor.carried_forward_reports[PREVIOUS_TS]["project_keys"] == {"A"}
+    assert advisor.carried_forward_max_severity == 3
+
+
+@pytest.mark.parametrize("changed_config", [
+    {"check_configs" : {"max_nbr_recipes" : 20}},
+    {"metric_names" : ["nbr_recipes", "nbr_datasets"]},
+    {"project_standards_checks" : ["PROJECT:has_wiki", "PROJECT:has_description"]},
+])
+def test_config_change_runs_all_the_projects(previous_run, changed_config):
+    advisor = build_advisor(previous_run, {"A" : "v1", "B" : "v1"}, **changed_config)
+
+    advisor.plan_incremental_run()
+
+    assert assessed_project_keys(advisor) == ["A", "B"]
+    assert advisor.carried_forward_reports == {}
+
+
+def test_plugin_version_change_runs_all_the_projects(previous_run, monkeypatch):
+    advisor = build_advisor(previous_run, {"A" : "v1", "B" : "v1"})
+    monkeypatch.setattr(advisor, "get_plugin_version", lambda : "0.0.1-test")
+
+    advisor.plan_incremental_run()
+
+    assert assessed_project_keys(advisor) == ["A", "B"]
+
+
+def test_run_control_params_are_not_hashed(memory_folder):
+    check_configs = {"max_nbr_recipes" : 10}
+    advisor = build_advisor(memory_folder, {"A" : "v1"}, check_configs = check_configs)
+    run_control_advisor = build_advisor(memory_folder, {"A" : "v1"}, check_configs = {**check_configs, "project_keys" : ["A"], "incremental_run" : True})
+
+    assert advisor.get_config_hash() == run_control_advisor.get_config_hash()
+
+
+def test_saved_state_keeps_the_carried_forward_and_assessed_projects(previous_run):
+    advisor = build_advisor(previous_run, {"A" : "v1", "B" : "v2", "C" : "v1", "D" : "v1"})
+    advisor.checkpoint = types.SimpleNamespace(completed_projects = {})
+    advisor.plan_incremental_run()
+    for pa in advisor.project_advisors:
+        pa.checks = [] if pa.project.project_key == "C" else ["check"] # C failed to run
+
+    advisor.save_incremental_state(datetime(2024, 1, 2))
+
+    projects = previous_run.read_json(BatchProjectAdvisor.incremental_state_path)["projects"]
+    assert projects["A"] == {"fingerprint" : "v1", "timestamp" : "2024-01-02T00:00:00"} # Carried forward rows are copied to the new report
+    assert projects["B"] == {"fingerprint" : "v2", "timestamp" : "2024-01-02T00:00:00"}
+    assert "C" not in projects
+
+
+def test_plugin_version_is_read_from_plugin_json(memory_folder):
+    assert build_advisor(memory_folder, {}).get_plugin_version() is not None
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the PAT backend snapshots : archiving & point in time loads
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from project_advisor.pat_backend import PATBackendClient
+from project_advisor.pat_storage import RetentionPolicy
+
+
+def build_backend(folder) -> PATBackendClient:
+    return PATBackendClient(dss_client = None, 
+                            run_config = {"pat_backend_folder" : folder, 
+                                          "pat_backend_format" : "parquet",
+                                          "pat_backend_storage" : "delta",
+                                          "use_pat_backend_cache" : False})
+
+
+def test_load_as_of_archived_snapshots(memory_folder):
+    backend = build_backend(memory_folder)
+    snapshots = {
+        "2024-01-01T00:00:00" : pd.DataFrame({"login" : ["a", "b"], "email" : [None, None]}),
+        "2024-01-02T00:00:00" : pd.DataFrame({"login" : ["a", "c"], "email" : ["a@x", None]}),
+        "2024-01-03T00:00:00" : pd.DataFrame({"login" : ["c"], "email" : ["c@x"]}),
+    }
+    for dt_str, df in snapshots.items():
+        backend.write_dataframe_to_folder("users", dt_str, df)
+
+    report = backend.garbage_collect(RetentionPolicy(keep_last = 1, keep_daily = 0, keep_weekly = 0))
+    assert report["archived_snapshots"] == 2
+
+    for dt_str, df in snapshots.items():
+        backend.load_as_of(dt_str, ["users"])
+        loaded = backend.data["users"]
+        assert list(loaded.columns) == list(df.columns) # All null columns are kept
+        loaded = loaded.sort_values("login").reset_index(drop = True)
+        pd.testing.assert_frame_equal(loaded.fillna("").astype(str), df.fillna("").astype(str)) # Nulls are read back as NaN
+
+
+def test_load_as_of_before_first_snapshot(memory_folder):
+    backend = build_backend(memory_folder)
+    backend.write_dataframe_to_folder("users", "2024-01-02T00:00:00", pd.DataFrame({"login" : ["a"]}))
+
+    backend.load_as_of("2024-01-01T00:00:00", ["users"])
+
+    assert backend.data["users"] is None
+
+
+def test_garbage_collections_append_archive_parts(memory_folder):
+    backend = build_backend(memory_folder)
+    retention_policy = RetentionPolicy(keep_last = 1, keep_daily = 0, keep_weekly = 0)
+    backend.write_dataframe_to_folder("users", "2024-01-01T00:00:00", pd.DataFrame({"login" : ["a"]}))
+    backend.write_dataframe_to_folder("users", "2024-01-02T00:00:00", pd.DataFrame({"login" : ["b"]}))
+    backend.garbage_collect(retention_policy)
+    first_parts = {path : data for path, data in memory_folder.files.items() if path.startswith("/_archive/")}
+
+    backend.write_dataframe_to_folder("users", "2024-01-03T00:00:00", pd.DataFrame({"login" : ["c"]}))
+    backend.garbage_collect(retention_policy)
+
+    parts = backend.list_archive_parts("users")
+    assert len(parts) == 2
+    assert all(memory_folder.files[path] == data for path, data in first_parts.items()) # Existing parts are never rewritten
+    for dt_str, login in [("2024-01-01T00:00:00", "a"), ("2024-01-02T00:00:00", "b"), ("2024-01-03T00:00:00", "c")]:
+        backend.load_as_of(dt_str, ["users"])
+        assert list(backend.data["users"]["login"]) == [login]
+
+
+def test_unreadable_archive_part_is_skipped(memory_folder):
+    backend = build_backend(memory_folder)
+    backend.write_dataframe_to_folder("users", "2024-01-01T00:00:00", pd.DataFrame({"login" : ["a"]}))
+    backend.write_dataframe_to_folder("users", "2024-01-02T00:00:00", pd.DataFrame({"login" : ["b"]}))
+    backend.garbage_collect(RetentionPolicy(keep_last = 1, keep_daily = 0, keep_weekly = 0))
+    memory_folder.upload_data("/_archive/users/9999-01-01T00:00:00.parquet", b"partial write")
+
+    backend.load_as_of("2024-01-01T00:00:00", ["users"])
+
+    assert list(backend.data["users"]["login"]) == ["a"]
+
+
+def test_incremental_build_drops_dependencies_on_deleted_projects(memory_folder):
+    backend = build_backend(memory_folder)
+    previous_df = pd.DataFrame({"source_project_key" : ["A", "A", "B"], 
+                                "target_project_key" : ["B", "DELETED", "A"]})
+
+    merged_df = backend.merge_incremental_build(table = "project_dependencies",
+                                                key_column = "source_project_key",
+                                                project_versions = {"A" : "1", "B" : "1", "C" : "2"},
+                                                fetched_project_keys = ["C"],
+                                                failed_project_keys = set(),
+                                                previous_df = previous_df,
+                                                rows = [{"source_project_key" : "C", "target_project_key" : "A"}],
+                                                related_key_columns = ["target_project_key"])
+
+    assert list(zip(merged_df["source_project_key"], merged_df["target_project_key"])) == [("A", "B"), ("B", "A"), ("C", "A")]
+
+
+class FakeProject():
+    def __init__(self, permissions : list):
+        self.permissions = permissions
+
+    def get_permissions(self) -> dict:
+        return {"permissions" : self.permissions}
+
+
+class FakeClient():
+    """
+    Instance of users, groups & projects with their permissions.
+    """
+
+    def __init__(self, users : list, projects : list, permissions : dict):
+        self.users = users
+        self.projects = projects
+        self.permissions = permissions
+
+    def list_users(self) -> list:
+        return self.users
+
+    def list_groups(self) -> list:
+        return [{"name" : group} for group in sorted({group for user in self.users for group in user["groups"]})]
+
+    def list_projects(self) -> list:
+        return self.projects
+
+    def get_project(self, project_key : str) -> FakeProject:
+        return FakeProject(self.permissions[project_key])
+
+
+def grant(user : str = None, group : str = None, admin : bool = False, write : bool = False) -> dict:
+    return {"user" : user, "group" : group, "admin" : admin, "writeProjectContent" : write, "readProjectContent" : True}
+
+
+def baseline_user_to_project_mapping(client : FakeClient) -> pd.DataFrame:
+    """
+    Nested loop over the users, projects & permissions the mapping used to be built with.
+    """
+    user_to_project_mapping = []
+    for user in client.list_users():
+        for p in client.list_projects():
+            is_project_owner = False
+            is_shared_by_user = False
+            is_shared_by_group = False
+            if user["login"] == p["ownerLogin"]:
+                is_project_owner = True
+            else:
+                for permission in client.get_project(p["projectKey"]).get_permissions()["permissions"]:
+                    if any([permission["admin"], permission["writeProjectContent"]]):
+                        if permission.get("user") == user["login"]:
+                            is_shared_by_user = True
+                        if permission.get("group") in user["groups"]:
+                            is_shared_by_group = True
+            if any([is_project_owner, is_shared_by_user, is_shared_by_group]):
+                user_to_project_mapping.append({"user_login" : user["login"], 
+                                                "project_key" : p["projectKey"], 
+                                                "is_project_owner" : is_project_owner, 
+                                                "is_shared_by_user" : is_shared_by_user, 
+                                                "is_shared_by_group" : is_shared_by_group})
+    return pd.DataFrame.from_dict(user_to_project_mapping)
+
+
+def test_user_to_project_mapping_matches_the_nested_loops(memory_folder):
+    users = [{"login" : "alice", "groups" : ["data_team", "admins"]},
+             {"login" : "bob", "groups" : ["data_team"]},
+             {"login" : "carol", "groups" : []},
+             {"login" : "dave", "groups" : ["readers"]}]
+    projects = [{"projectKey" : "ZETA", "ownerLogin" : "bob"}, # Not listed in key order
+                {"projectKey" : "ALPHA", "ownerLogin" : "alice"},
+                {"projectKey" : "MID", "ownerLogin" : "deleted_user"},
+                {"projectKey" : "BETA", "ownerLogin" : "carol"}]
+    permissions = {
+        "ZETA" : [grant(group = "data_team", write = True), grant(user = "bob", admin = True)], # Owner also granted
+        "ALPHA" : [grant(user = "carol", write = True), grant(group = "readers"), grant(user = "alice", write = True)],
+        "MID" : [grant(group = "admins", admin = True), grant(user = "bob", write = True), grant(group = "data_team", write = True)],
+        "BETA" : [grant(user = "dave"), grant(group = "unknown_group", write = True)],
+    }
+    client = FakeClient(users, projects, permissions)
+    backend = build_backend(memory_folder)
+    backend.client = client
+
+    backend.build_user_to_project_mapping()
+
+    pd.testing.assert_frame_equal(backend.data["user_to_project_mapping"], baseline_user_to_project_mapping(client))
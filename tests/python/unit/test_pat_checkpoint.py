@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the batch run checkpoints : resume after an interruption
+
+import pandas as pd
+import pytest
+
+from project_advisor.pat_checkpoint import RunCheckpoint
+from project_advisor.pat_storage import CSVTableFormat
+
+RUN_ID = "2024-01-01T00-00-00"
+
+
+def save_projects(checkpoint : RunCheckpoint, project_keys : list) -> None:
+    for project_key in project_keys:
+        metrics_df = pd.DataFrame({"project_key" : [project_key, project_key], "metric" : ["m1", "m2"]})
+        checks_df = pd.DataFrame({"project_key" : [project_key], "check" : ["c1"]})
+        checkpoint.save_project(project_key, metrics_df, checks_df, max_severity = 2)
+    checkpoint.flush()
+
+
+def test_resume_skips_the_completed_projects(memory_folder):
+    save_projects(RunCheckpoint(memory_folder, RUN_ID, CSVTableFormat()), ["A", "B"]) # Interrupted before complete()
+
+    checkpoint = RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat())
+
+    assert checkpoint.completed_project_keys == {"A", "B"}
+    assert checkpoint.completed_projects["A"]["max_severity"] == 2
+    metrics_df = pd.concat(checkpoint.read_shards("metrics"), ignore_index = True)
+    checks_df = pd.concat(checkpoint.read_shards("checks"), ignore_index = True)
+    assert sorted(metrics_df["project_key"]) == ["A", "A", "B", "B"]
+    assert sorted(checks_df["project_key"]) == ["A", "B"]
+
+
+def test_resumed_run_adds_projects(memory_folder):
+    save_projects(RunCheckpoint(memory_folder, RUN_ID, CSVTableFormat()), ["A"])
+    checkpoint = RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat())
+
+    save_projects(checkpoint, ["B"])
+
+    assert RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat()).completed_project_keys == {"A", "B"}
+
+
+def test_resume_of_older_manifest_listing_the_projects(memory_folder):
+    save_projects(RunCheckpoint(memory_folder, RUN_ID, CSVTableFormat()), ["A"])
+    manifest = memory_folder.read_json(f"/_runs/{RUN_ID}/manifest.json")
+    manifest["completed_projects"] = {"OLD" : {"project_key" : "OLD", "max_severity" : 0}}
+    memory_folder.write_json(f"/_runs/{RUN_ID}/manifest.json", manifest)
+
+    checkpoint = RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat())
+
+    assert checkpoint.completed_project_keys == {"A", "OLD"}
+
+
+def test_resume_of_unknown_run_starts_from_scratch(memory_folder):
+    assert RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat()).completed_project_keys == set()
+
+
+def test_complete_removes_the_shards_and_markers(memory_folder):
+    checkpoint = RunCheckpoint(memory_folder, RUN_ID, CSVTableFormat())
+    save_projects(checkpoint, ["A", "B"])
+
+    checkpoint.complete()
+
+    assert memory_folder.list_paths_in_partition() == [f"/_runs/{RUN_ID}/manifest.json"]
+    assert memory_folder.read_json(f"/_runs/{RUN_ID}/manifest.json")["nbr_completed_projects"] == 2
+    with pytest.raises(Exception, match = "already completed"):
+        RunCheckpoint.resume(memory_folder, RUN_ID, CSVTableFormat())
+
+
+def test_failed_write_does_not_complete_the_project(memory_folder, monkeypatch):
+    checkpoint = RunCheckpoint(memory_folder, RUN_ID, CSVTableFormat())
+    def failing_write_json(path, obj):
+        if "/done/" in path:
+            raise IOError("folder unavailable")
+    monkeypatch.setattr(memory_folder, "write_json", failing_write_json)
+
+    future = checkpoint.save_project("A", pd.DataFrame({"metric" : ["m1"]}), pd.DataFrame({"check" : ["c1"]}), max_severity = 0)
+
+    with pytest.raises(IOError):
+        future.result()
+    assert checkpoint.completed_project_keys == set()
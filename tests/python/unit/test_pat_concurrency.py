@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the PAT concurrency helpers
+
+import time
+import types
+import threading
+
+import pytest
+
+from project_advisor.pat_concurrency import AdaptiveLimiter, ConcurrencyBudget, CostClass, ProcessLane, SharedListings, map_on_lane
+from project_advisor.pat_cpu_tasks import get_non_conforming_names
+
+
+COLUMNS_TO_CHECK = [(f"dataset_{i}", ["good_name", "Bad Name"], r"[a-z_]+") for i in range(4)]
+
+
+@pytest.fixture
+def process_lane():
+    yield ProcessLane(2)
+    ProcessLane.shutdown()
+
+
+def test_process_lane_reuses_its_pool(process_lane):
+    expected = [get_non_conforming_names(item) for item in COLUMNS_TO_CHECK]
+
+    assert process_lane.map(get_non_conforming_names, COLUMNS_TO_CHECK) == expected
+    pool = ProcessLane._pool
+    assert pool is not None
+    assert ProcessLane(2).map(get_non_conforming_names, COLUMNS_TO_CHECK) == expected
+    assert ProcessLane._pool is pool
+
+
+def test_process_lane_is_opt_in():
+    assert ProcessLane.from_run_config({}).map(get_non_conforming_names, COLUMNS_TO_CHECK[:2]) == [get_non_conforming_names(item) for item in COLUMNS_TO_CHECK[:2]]
+    assert ProcessLane._pool is None
+
+
+@pytest.mark.parametrize("cost_class", [CostClass.IO_BOUND, CostClass.CPU_BOUND])
+def test_map_on_lane_of_the_cost_class(cost_class):
+    spec = types.SimpleNamespace(cost_class = cost_class, plugin_config = {"cpu_process_workers" : 0})
+
+    assert map_on_lane(spec, get_non_conforming_names, COLUMNS_TO_CHECK) == [get_non_conforming_names(item) for item in COLUMNS_TO_CHECK]
+
+
+class InFlight():
+    """
+    Track the peak number of calls running at the same time.
+    """
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def call(self, item):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.threads.add(threading.get_ident())
+        time.sleep(0.01)
+        with self._lock:
+            self.running -= 1
+        return item * 2
+
+
+def test_nested_maps_never_exceed_the_budget():
+    budget = ConcurrencyBudget(3)
+    in_flight = InFlight()
+
+    results = budget.map(lambda item : budget.map_with_free_slots(in_flight.call, range(item, item + 4)), range(5))
+
+    assert results == [[2 * i for i in range(item, item + 4)] for item in range(5)]
+    assert 1 < in_flight.peak <= 3
+
+
+def test_concurrent_maps_never_exceed_the_budget():
+    budget = ConcurrencyBudget(3)
+    in_flight = InFlight()
+    threads = [threading.Thread(target = budget.map, args = (in_flight.call, range(6))) for _ in range(3)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert 1 < in_flight.peak <= 3
+
+
+def test_no_helper_without_free_slot():
+    budget = ConcurrencyBudget(2)
+    in_flight = InFlight()
+
+    with budget.slot(), budget.slot():
+        results = budget.map_with_free_slots(in_flight.call, range(4))
+
+    assert results == [0, 2, 4, 6]
+    assert in_flight.threads == {threading.get_ident()}
+
+
+def test_errors_are_raised_once_all_items_are_processed():
+    budget = ConcurrencyBudget(2)
+    processed = []
+
+    def fail_on_one(item):
+        if item == 1:
+            raise ValueError("failed item")
+        processed.append(item)
+
+    with pytest.raises(ValueError, match = "failed item"):
+        budget.map_with_free_slots(fail_on_one, range(6))
+
+    assert sorted(processed) == [0, 2, 3, 4, 5]
+    assert [budget._semaphore.acquire(blocking = False) for _ in range(2)] == [True, True] # All the slots were released
+
+
+def test_shared_listing_is_fetched_once():
+    listings = SharedListings()
+    fetches = []
+
+    def list_projects():
+        fetches.append(1)
+        time.sleep(0.05)
+        return [{"projectKey" : "A"}]
+
+    results = []
+    threads = [threading.Thread(target = lambda : results.append(listings.get("projects", list_projects))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+
+
+def record_window(limiter : AdaptiveLimiter, latency : float = 0.1, errors : int = 0, saturated : bool = False) -> None:
+    """
+    Record a full window of calls, reaching the limit first if saturated.
+    """
+    if saturated:
+        slots = [limiter.slot() for _ in range(limiter.current_limit)]
+        for slot in slots:
+            slot.__enter__()
+        for slot in slots:
+            slot.__exit__(None, None, None)
+    for i in range(limiter.window_size):
+        limiter.record(latency, error = i < errors)
+
+
+def test_limiter_backs_off_on_errors():
+    limiter = AdaptiveLimiter(initial_limit = 10, window_size = 10)
+
+    record_window(limiter, errors = 1, saturated = True) # 10% errors
+
+    assert limiter.current_limit == 7
+    assert limiter.decisions[-1]["reason"] == "error rate 10%"
+
+
+def test_limiter_backs_off_on_latency():
+    limiter = AdaptiveLimiter(initial_limit = 10, window_size = 10)
+    record_window(limiter, latency = 0.1) # Baseline
+
+    record_window(limiter, latency = 0.15) # Within the tolerance
+    assert limiter.current_limit == 10
+    record_window(limiter, latency = 0.3, saturated = True)
+
+    assert limiter.current_limit == 7
+    assert limiter.decisions[-1]["reason"].startswith("latency above")
+
+
+def test_limiter_grows_only_when_saturated():
+    limiter = AdaptiveLimiter(initial_limit = 2, max_limit = 8, window_size = 10)
+
+    record_window(limiter)
+    assert limiter.current_limit == 2
+    record_window(limiter, saturated = True)
+    assert limiter.current_limit == 3
+    record_window(limiter)
+    assert limiter.current_limit == 3
+
+
+def test_limiter_stays_within_its_bounds():
+    limiter = AdaptiveLimiter(initial_limit = 4, min_limit = 2, max_limit = 6, window_size = 10)
+
+    for _ in range(10):
+        record_window(limiter, errors = 5)
+    assert limiter.current_limit == 2
+    for _ in range(10):
+        record_window(limiter, saturated = True)
+    assert limiter.current_limit == 6
+    assert [decision["limit"] for decision in limiter.decisions] == [2, 3, 4, 5, 6]
+
+
+def test_limiter_slots_follow_the_limit():
+    limiter = AdaptiveLimiter(initial_limit = 2, window_size = 10)
+    acquired = threading.Event()
+
+    with limiter.slot(), limiter.slot():
+        waiting = threading.Thread(target = lambda : limiter.slot().__enter__() or acquired.set())
+        waiting.start()
+        assert not acquired.wait(0.05) # Third slot above the limit
+    assert acquired.wait(1)
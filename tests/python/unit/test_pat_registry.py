@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the assessment registry & its static manifest
+
+import sys
+import json
+import importlib
+
+import pytest
+
+from project_advisor.pat_manifest import MANIFEST_PATH, build_manifest
+from project_advisor.pat_registry import AssessmentRegistry
+
+
+@pytest.fixture
+def test_package(tmp_path, monkeypatch):
+    """
+    Package of two assessment modules, first & second.
+    """
+    package_folder = tmp_path / "pat_test_assessments"
+    package_folder.mkdir()
+    for module_name in ["first", "second"]:
+        (package_folder / f"{module_name}.py").write_text(f"class {module_name.capitalize()}():\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield importlib.import_module("pat_test_assessments")
+    for module_name in ["pat_test_assessments", "pat_test_assessments.first", "pat_test_assessments.second"]:
+        sys.modules.pop(module_name, None)
+
+
+def load_module_names(tmp_path, package, manifest : dict) -> list:
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+    registry = AssessmentRegistry(manifest_path = str(manifest_path))
+    return [module.__name__ for module in registry.get_modules(package)]
+
+
+def test_committed_manifest_is_up_to_date():
+    with open(MANIFEST_PATH) as f:
+        assert json.load(f) == build_manifest(), "Run \"make assessment-manifest\" & commit the manifest"
+
+
+def test_module_missing_from_manifest_is_discovered(tmp_path, test_package):
+    module_names = load_module_names(tmp_path, test_package, {"pat_test_assessments" : ["pat_test_assessments.first"]})
+
+    assert module_names == ["pat_test_assessments.first", "pat_test_assessments.second"]
+
+
+def test_manifest_order_is_used_when_up_to_date(tmp_path, test_package):
+    module_names = load_module_names(tmp_path, test_package, {"pat_test_assessments" : ["pat_test_assessments.second", "pat_test_assessments.first"]})
+
+    assert module_names == ["pat_test_assessments.second", "pat_test_assessments.first"]
+
+
+def test_package_missing_from_manifest_is_walked(tmp_path, test_package):
+    module_names = load_module_names(tmp_path, test_package, {})
+
+    assert module_names == ["pat_test_assessments.first", "pat_test_assessments.second"]
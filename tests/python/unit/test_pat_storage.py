@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the PAT table storage : delta snapshots & archives
+
+import pandas as pd
+import pytest
+
+from project_advisor import pat_storage
+from project_advisor.pat_storage import (DELTA_MARKER,
+                                         CSVGzipTableFormat,
+                                         CSVTableFormat,
+                                         ParquetTableFormat,
+                                         apply_table_delta,
+                                         archive_snapshot,
+                                         compute_table_delta,
+                                         get_archived_snapshot,
+                                         read_table,
+                                         read_table_chunks,
+                                         reconstruct_from_archive,
+                                         write_table,
+                                         write_table_chunks)
+
+KEYS = ["login"]
+
+
+def sort_rows(df : pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(KEYS).reset_index(drop = True)
+
+
+def test_compute_and_apply_delta():
+    previous = pd.DataFrame({"login" : ["a", "b", "c"], "groups" : [1, 2, 3]})
+    current = pd.DataFrame({"login" : ["a", "b", "d"], "groups" : [1, 5, 4]})
+
+    delta = compute_table_delta(previous, current, KEYS)
+
+    assert len(delta) == 3 # b updated, d inserted, c deleted
+    pd.testing.assert_frame_equal(sort_rows(apply_table_delta(previous, delta, KEYS)), sort_rows(current))
+
+
+def test_compute_delta_of_unchanged_table_is_empty():
+    df = pd.DataFrame({"login" : ["a", "b"], "groups" : [1, 2]})
+
+    delta = compute_table_delta(df, df.copy(), KEYS)
+
+    assert delta.empty
+    pd.testing.assert_frame_equal(apply_table_delta(df, delta, KEYS), df)
+
+
+@pytest.mark.parametrize("current", [
+    pd.DataFrame({"login" : ["a"], "groups" : [1], "email" : ["a@x"]}), # Columns changed
+    pd.DataFrame({"login" : ["a", "a"], "groups" : [1, 2]}), # Duplicated keys
+])
+def test_compute_delta_not_possible(current):
+    previous = pd.DataFrame({"login" : ["a"], "groups" : [1]})
+
+    assert compute_table_delta(previous, current, KEYS) is None
+
+
+def test_archived_snapshot_keeps_its_all_null_columns():
+    old = pd.DataFrame({"login" : ["a"], "legacy" : ["x"]})
+    base = pd.DataFrame({"login" : ["a", "b"], "email" : [None, None]}) # All null, but part of the snapshot
+    archive_df = pd.concat([archive_snapshot("2024-01-01T00:00:00", old), 
+                            archive_snapshot("2024-01-02T00:00:00", base)], ignore_index = True)
+
+    pd.testing.assert_frame_equal(get_archived_snapshot(archive_df, "2024-01-02T00:00:00"), base, check_dtype = False)
+    pd.testing.assert_frame_equal(get_archived_snapshot(archive_df, "2024-01-01T00:00:00"), old)
+
+
+def test_archive_round_trip(memory_folder):
+    pytest.importorskip("pyarrow")
+    base = pd.DataFrame({"login" : ["a", "b"], "email" : [None, None], "groups" : [1, 2]})
+    current = pd.DataFrame({"login" : ["a", "c"], "email" : [None, None], "groups" : [3, 4]})
+    delta = compute_table_delta(base, current, KEYS)
+    archive_df = pd.concat([archive_snapshot("2024-01-01T00:00:00", base),
+                            archive_snapshot("2024-01-02T00:00:00" + DELTA_MARKER, delta)], ignore_index = True)
+
+    write_table(memory_folder, "/_archive/users.parquet", archive_df, ParquetTableFormat())
+    read_archive_df = read_table(memory_folder, "/_archive/users.parquet")
+
+    as_of_base = reconstruct_from_archive(read_archive_df, "2024-01-01T12:00:00", KEYS)
+    as_of_delta = reconstruct_from_archive(read_archive_df, "2024-01-03T00:00:00", KEYS)
+    assert list(as_of_base.columns) == list(base.columns)
+    pd.testing.assert_frame_equal(sort_rows(as_of_base), sort_rows(base), check_dtype = False)
+    pd.testing.assert_frame_equal(sort_rows(as_of_delta), sort_rows(current), check_dtype = False)
+
+
+def test_reconstruct_before_first_snapshot():
+    archive_df = archive_snapshot("2024-01-02T00:00:00", pd.DataFrame({"login" : ["a"]}))
+
+    assert reconstruct_from_archive(archive_df, "2024-01-01T00:00:00", KEYS) is None
+    assert reconstruct_from_archive(None, "2024-01-01T00:00:00", KEYS) is None
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(pat_storage, "STREAM_CHUNK_ROWS", 2)
+
+
+@pytest.mark.parametrize("table_format", [CSVTableFormat(), CSVGzipTableFormat(), ParquetTableFormat()], ids = lambda table_format : table_format.name)
+def test_table_formats_stream_in_chunks(memory_folder, small_chunks, table_format):
+    if table_format.name == "parquet":
+        pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"login" : ["a", "b", "c", "d", "e"], "groups" : [1, 2, 3, 4, 5]})
+    full_path = "/users" + table_format.extension
+
+    write_table(memory_folder, full_path, df, table_format)
+    chunks = list(read_table_chunks(memory_folder, full_path))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index = True), df)
+    pd.testing.assert_frame_equal(read_table(memory_folder, full_path), df)
+
+
+@pytest.mark.parametrize("table_format", [CSVTableFormat(), CSVGzipTableFormat()], ids = lambda table_format : table_format.name)
+def test_csv_chunks_are_appended_on_the_first_columns(memory_folder, small_chunks, table_format):
+    chunks = [pd.DataFrame({"login" : ["a", "b", "c"], "groups" : [1, 2, 3]}),
+              pd.DataFrame(),
+              pd.DataFrame({"groups" : [4], "login" : ["d"]})]
+    full_path = "/users" + table_format.extension
+
+    write_table_chunks(memory_folder, full_path, chunks, table_format)
+
+    pd.testing.assert_frame_equal(read_table(memory_folder, full_path), 
+                                  pd.DataFrame({"login" : ["a", "b", "c", "d"], "groups" : [1, 2, 3, 4]}))
+
+
+def test_parquet_keeps_nested_columns_and_empty_tables(memory_folder, small_chunks):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"login" : ["a", "b", "c"], "groups" : [["g1"], [], ["g1", "g2"]]})
+
+    write_table(memory_folder, "/users.parquet", df, ParquetTableFormat())
+    write_table(memory_folder, "/empty.parquet", df.head(0), ParquetTableFormat())
+
+    assert list(read_table(memory_folder, "/users.parquet")["groups"]) == [["g1"], [], ["g1", "g2"]]
+    empty_chunks = list(read_table_chunks(memory_folder, "/empty.parquet"))
+    assert len(empty_chunks) == 1 and list(empty_chunks[0].columns) == ["login", "groups"]
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Unit tests of the assessment timeouts & time budgets
+
+import time
+import types
+import threading
+import subprocess
+
+import pytest
+
+from project_advisor import pat_timeouts
+from project_advisor.assessments import DSSAssessmentStatus
+from project_advisor.assessments.dss_assessment import DSSAssessment
+from project_advisor.pat_timeouts import PATTimeoutError, RunDeadline, TimedOutCalls, call_with_timeout
+
+
+class FakeAssessment(DSSAssessment):
+    """
+    Assessment running a function, without DSS instance.
+    """
+
+    def __init__(self, run_fn, timeout : float = None):
+        super().__init__(client = None, 
+                         config = types.SimpleNamespace(config = {"run_config" : {}}, deadline = None), 
+                         name = "fake_assessment", 
+                         description = "Fake assessment")
+        self.run_fn = run_fn
+        self.timeout = timeout
+        self.value = None
+        self.details = []
+
+    def run(self):
+        self.run_fn(self)
+        return self
+
+
+@pytest.fixture(autouse = True)
+def timed_out_calls(monkeypatch):
+    """
+    Track the timed out calls of each test apart.
+    """
+    calls = TimedOutCalls(max_running = 16)
+    monkeypatch.setattr(pat_timeouts, "timed_out_calls", calls)
+    return calls
+
+
+@pytest.fixture
+def release():
+    """
+    Event ending the slow runs left in the background, at the end of the test.
+    """
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_slow_run_times_out(release):
+    def slow_run(assessment):
+        release.wait(5)
+        assessment.value = "late"
+        assessment.details.append("late")
+
+    assessment = FakeAssessment(slow_run, timeout = 0.05).safe_run()
+    release.set()
+    time.sleep(0.05)
+
+    assert assessment.status == DSSAssessmentStatus.TIMEOUT
+    assert assessment.run_result["error"] == "PATTimeoutError"
+    assert assessment.value is None # Late outputs are dropped
+    assert assessment.details == []
+
+
+def test_run_in_time_keeps_outputs():
+    def run(assessment):
+        assessment.value = 42
+        assessment.details.append("detail")
+
+    assessment = FakeAssessment(run, timeout = 5).safe_run()
+
+    assert assessment.status == DSSAssessmentStatus.RUN_SUCCESS
+    assert (assessment.value, assessment.details) == (42, ["detail"])
+
+
+def test_run_without_timeout_runs_in_place():
+    runs = []
+    assessment = FakeAssessment(lambda a : runs.append(a)).safe_run()
+
+    assert runs == [assessment]
+    assert assessment.status == DSSAssessmentStatus.RUN_SUCCESS
+
+
+def test_exhausted_deadline_times_out_without_running():
+    runs = []
+    assessment = FakeAssessment(lambda a : runs.append(a))
+    assessment.deadline = RunDeadline(0.01, name = "Project")
+    time.sleep(0.02)
+
+    assessment.safe_run()
+
+    assert runs == []
+    assert assessment.status == DSSAssessmentStatus.TIMEOUT
+    assert "Project timeout" in assessment.run_result["error_message"]
+
+
+def test_timeout_is_clamped_to_the_deadline():
+    assessment = FakeAssessment(lambda a : None, timeout = 60)
+    assessment.deadline = RunDeadline(1, parent = RunDeadline(None), name = "Project")
+
+    assert assessment.get_timeout() <= 1
+
+
+def test_subprocess_timeout_is_a_timeout():
+    def du_timing_out(assessment):
+        raise subprocess.TimeoutExpired(cmd = "du", timeout = 1)
+
+    assessment = FakeAssessment(du_timing_out).safe_run()
+
+    assert assessment.status == DSSAssessmentStatus.TIMEOUT
+    assert assessment.run_result["error"] == "TimeoutExpired"
+
+
+def test_run_error_is_an_error():
+    def failing_run(assessment):
+        raise ValueError("failed")
+
+    assessment = FakeAssessment(failing_run, timeout = 5).safe_run()
+
+    assert assessment.status == DSSAssessmentStatus.RUN_ERROR
+    assert assessment.run_result == {"error" : "ValueError", "error_message" : "failed"}
+
+
+def test_timed_out_calls_are_capped(monkeypatch, release):
+    monkeypatch.setattr(pat_timeouts, "timed_out_calls", TimedOutCalls(max_running = 1))
+    with pytest.raises(PATTimeoutError):
+        call_with_timeout(lambda : release.wait(5), 0.01, "slow call")
+
+    calls = []
+    with pytest.raises(PATTimeoutError, match = "not started"):
+        call_with_timeout(lambda : calls.append(1), 5, "refused call")
+    assert calls == []
+
+    release.set()
+    time.sleep(0.05)
+    assert call_with_timeout(lambda : "done", 5, "call after the slow call ended") == "done"
+
+
+def test_fs_assessments_default_timeout():
+    assessment = FakeAssessment(lambda a : None)
+    assessment.uses_fs = True
+
+    assert assessment.get_timeout() == DSSAssessment.fs_timeout